@@ -1,11 +1,12 @@
 import React, { useEffect, useState } from 'react';
-import axios from 'axios';
+import cachedPost from '../cachedPost';
 import BackToHomeButton from './BackToHomeButton';
 import jsPDF from 'jspdf';
 import html2canvas from 'html2canvas';
 
 const AgingReportPage = ({ entityId }) => {
   const [report, setReport] = useState(null);
+  const [bucketInvoices, setBucketInvoices] = useState({});
   const [loading, setLoading] = useState(true);
   const [statusFilter, setStatusFilter] = useState(['APPROVED', 'DRAFT']);
 
@@ -14,12 +15,13 @@ const AgingReportPage = ({ entityId }) => {
   const loadReport = async () => {
     setLoading(true);
     try {
-      const res = await axios.post('http://localhost:8000/api/aging-report/', {
+      const res = await cachedPost('http://localhost:8000/api/aging-report/', {
         entity_id: entityId,
         statuses: statusFilter,
       });
       if (res.data.status === 'success') {
-        setReport(res.data.aging);
+        setReport(res.data.buckets);
+        setBucketInvoices({});
       }
     } catch (err) {
       console.error('❌ Aging Report Error:', err);
@@ -28,6 +30,31 @@ const AgingReportPage = ({ entityId }) => {
     }
   };
 
+  // Invoices are only fetched for the buckets the user opens, a page at a time
+  const loadBucket = async (bucket, page = 1) => {
+    try {
+      const res = await cachedPost('http://localhost:8000/api/aging-report/', {
+        entity_id: entityId,
+        statuses: statusFilter,
+        bucket,
+        page,
+        view: 'aging',
+      });
+      if (res.data.status === 'success') {
+        setBucketInvoices((prev) => ({
+          ...prev,
+          [bucket]: {
+            invoices: [...(page > 1 ? prev[bucket]?.invoices || [] : []), ...res.data.invoices],
+            page,
+            hasMore: res.data.hasMore,
+          },
+        }));
+      }
+    } catch (err) {
+      console.error('❌ Aging Bucket Error:', err);
+    }
+  };
+
   useEffect(() => {
     if (entityId) {
       loadReport();
@@ -118,12 +145,28 @@ const AgingReportPage = ({ entityId }) => {
         <p className="text-gray-600 text-center py-8">Loading report...</p>
       ) : report ? (
         <div id="reportContainer" className="grid grid-cols-1 md:grid-cols-2 gap-6">
-          {Object.entries(report).map(([bucket, invoices]) => (
+          {report.map(({ bucket, count, totals }) => {
+            const loaded = bucketInvoices[bucket];
+            return (
             <div key={bucket} className="bg-white shadow rounded-xl p-6 transition hover:shadow-lg">
-              <h2 className="text-lg font-semibold text-indigo-700 mb-4">{bucket}</h2>
-              {invoices.length === 0 ? (
+              <h2 className="text-lg font-semibold text-indigo-700 mb-1">{bucket}</h2>
+              <p className="text-sm text-gray-600 mb-4">
+                {count} invoice{count === 1 ? '' : 's'}
+                {Object.entries(totals).map(([currency, total]) => (
+                  <span key={currency} className="ml-3 font-medium">{currency} ${Number(total).toFixed(2)}</span>
+                ))}
+              </p>
+              {count === 0 ? (
                 <p className="text-gray-500 text-sm">No invoices</p>
+              ) : !loaded ? (
+                <button
+                  onClick={() => loadBucket(bucket)}
+                  className="text-indigo-600 hover:underline text-sm"
+                >
+                  Show invoices
+                </button>
               ) : (
+                <>
                 <table className="min-w-full text-sm">
                   <thead>
                     <tr className="border-b border-gray-200 text-gray-600">
@@ -134,7 +177,7 @@ const AgingReportPage = ({ entityId }) => {
                     </tr>
                   </thead>
                   <tbody>
-                    {invoices.map((inv) => (
+                    {loaded.invoices.map((inv) => (
                       <tr key={inv.id} className="border-b last:border-0">
                         <td className="py-2 pl-2 pr-4">{inv.vendor?.name || '—'}</td>
                         <td className="py-2 px-4">
@@ -148,9 +191,19 @@ const AgingReportPage = ({ entityId }) => {
                     ))}
                   </tbody>
                 </table>
+                {loaded.hasMore && (
+                  <button
+                    onClick={() => loadBucket(bucket, loaded.page + 1)}
+                    className="mt-3 text-indigo-600 hover:underline text-sm"
+                  >
+                    Load more
+                  </button>
+                )}
+                </>
               )}
             </div>
-          ))}
+            );
+          })}
         </div>
       ) : (
         <p className="text-red-500 text-center">Failed to load aging report.</p>
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import cachedPost from '../cachedPost';
 import BackToHomeButton from './BackToHomeButton';
 
 const ROLE_OPTIONS = ['admin', 'approver', 'general'];
@@ -16,7 +17,7 @@ const ApprovalPoliciesPage = ({ entityId }) => {
 
   const fetchPolicies = async () => {
     try {
-      const res = await axios.post('http://localhost:8000/api/entity/approval-policy/list/', {
+      const res = await cachedPost('http://localhost:8000/api/entity/approval-policy/list/', {
         entity_id: entityId,
       });
       if (res.data.status === 'success') {
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
+import cachedPost from '../cachedPost';
 import BackToHomeButton from './BackToHomeButton';
 
 const ROLE_OPTIONS = ['admin', 'approver', 'general'];
@@ -13,7 +14,7 @@ const EntityUsersPage = ({ entityId }) => {
 
   const fetchUsers = async () => {
     try {
-      const res = await axios.post('http://localhost:8000/api/entity/user/list/', {
+      const res = await cachedPost('http://localhost:8000/api/entity/user/list/', {
         entity_id: entityId,
       });
       if (res.data.status === 'success') {
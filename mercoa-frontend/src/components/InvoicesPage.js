@@ -1,6 +1,7 @@
 import React, { useEffect, useState, useCallback } from 'react';
 import { useNavigate } from 'react-router-dom';
 import axios from 'axios';
+import cachedPost from '../cachedPost';
 import { MercoaSession, PayableDetailsV1 } from '@mercoa/react';
 import '@mercoa/react/dist/style.css';
 import { motion, AnimatePresence } from 'framer-motion';
@@ -25,7 +26,7 @@ const InvoicesPage = ({ entityId, email }) => {
 
   const loadInvoices = useCallback(async () => {
     try {
-      const res = await axios.post('http://localhost:8000/api/invoices/', { entity_id: entityId });
+      const res = await cachedPost('http://localhost:8000/api/invoices/', { entity_id: entityId, view: 'grid' });
       if (res.data.status === 'success') setInvoices(res.data.invoices.data || []);
     } catch (err) {
       console.error('📄 Invoice fetch error:', err);
@@ -1,5 +1,5 @@
 import React, { useEffect, useState, useCallback } from 'react';
-import axios from 'axios';
+import cachedPost from '../cachedPost';
 import BackToHomeButton from './BackToHomeButton';
 
 const VendorsPage = ({ entityId }) => {
@@ -9,7 +9,7 @@ const VendorsPage = ({ entityId }) => {
 
   const loadInvoices = useCallback(async () => {
     try {
-      const res = await axios.post('http://localhost:8000/api/invoices/', { entity_id: entityId });
+      const res = await cachedPost('http://localhost:8000/api/invoices/', { entity_id: entityId });
       if (res.data.status === 'success') {
         setInvoices(res.data.invoices.data || []);
       }
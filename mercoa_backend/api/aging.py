@@ -0,0 +1,238 @@
+from bisect import bisect_left
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
+
+from .models import AgingAggregate, AgingState, MercoaInvoice
+from .projection import project
+
+# Upper bound (in days past due) of every bucket but the last one:
+# [0, 30, 60, 90] -> Current, 1-30 Days, 31-60 Days, 61-90 Days, 90+ Days
+DEFAULT_BOUNDARIES = [0, 30, 60, 90]
+CENTS = Decimal("0.01")
+
+
+def default_boundaries():
+    return list(getattr(settings, "AP_AGING_BOUNDARIES", DEFAULT_BOUNDARIES))
+
+
+def clean_boundaries(boundaries):
+    if boundaries is None:
+        return default_boundaries()
+    boundaries = sorted({int(b) for b in boundaries})
+    if not boundaries or boundaries[0] < 0:
+        raise ValueError("Aging boundaries must be a non-empty list of non-negative day counts")
+    return boundaries
+
+
+def bucket_labels(boundaries):
+    labels = []
+    for i, upper in enumerate(boundaries):
+        if i == 0:
+            labels.append("Current" if upper == 0 else f"0-{upper} Days")
+        else:
+            labels.append(f"{boundaries[i - 1] + 1}-{upper} Days")
+    labels.append(f"{boundaries[-1]}+ Days")
+    return labels
+
+
+def bucket_index(days_past_due, boundaries):
+    return bisect_left(boundaries, days_past_due)
+
+
+def today_utc():
+    return datetime.now(timezone.utc).date()
+
+
+def _midnight(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def bucket_filters(boundaries, today):
+    """Due-date range for every bucket, as queryset filter kwargs.
+
+    An invoice is ``(today - due day)`` days past due, so "at most b days past
+    due" is "due on or after midnight of today - b" - a plain range on the
+    indexed due_date column.
+    """
+    cutoffs = [_midnight(today - timedelta(days=b)) for b in boundaries]
+    filters = [{"due_date__gte": cutoffs[0]}]
+    for i in range(1, len(cutoffs)):
+        filters.append({"due_date__gte": cutoffs[i], "due_date__lt": cutoffs[i - 1]})
+    filters.append({"due_date__lt": cutoffs[-1]})
+    return filters
+
+
+def _grouped(qs, *fields):
+    return qs.values(*fields, "status", "currency").annotate(n=Count("id"), amount=Sum("amount"))
+
+
+def bucket_case(boundaries, today):
+    """The bucket index of every row, computed by the database."""
+    return Case(
+        *[When(then=Value(i), **filters) for i, filters in enumerate(bucket_filters(boundaries, today))],
+        output_field=IntegerField(),
+    )
+
+
+def aggregate_buckets(entity_id, boundaries, today, statuses=None):
+    """Compute {bucket: [(status, currency, count, total)]} straight from the
+    mirror table, in a single GROUP BY over (bucket, status, currency)."""
+    base = MercoaInvoice.objects.filter(entity_id=entity_id, due_date__isnull=False)
+    if statuses is not None:
+        base = base.filter(status__in=statuses)
+
+    result = {i: [] for i in range(len(boundaries) + 1)}
+    for row in _grouped(base.annotate(bucket=bucket_case(boundaries, today)), "bucket"):
+        # SQLite sums decimals as floats; the totals are whole cents
+        amount = (row["amount"] or Decimal("0")).quantize(CENTS)
+        result[row["bucket"]].append((row["status"], row["currency"], row["n"], amount))
+    return result
+
+
+def _add(entity_id, status, bucket, currency, count, total):
+    updated = AgingAggregate.objects.filter(
+        entity_id=entity_id, status=status, bucket=bucket, currency=currency
+    ).update(count=F("count") + count, total=F("total") + total)
+    if not updated:
+        AgingAggregate.objects.create(
+            entity_id=entity_id, status=status, bucket=bucket, currency=currency, count=count, total=total
+        )
+
+
+def rebuild(entity_id, today=None):
+    """Recompute an entity's aggregates from the mirror (after a full sync)."""
+    today = today or today_utc()
+    boundaries = default_boundaries()
+    with transaction.atomic():
+        AgingAggregate.objects.filter(entity_id=entity_id).delete()
+        AgingAggregate.objects.bulk_create([
+            AgingAggregate(entity_id=entity_id, status=status, bucket=bucket,
+                           currency=currency, count=count, total=total)
+            for bucket, rows in aggregate_buckets(entity_id, boundaries, today).items()
+            for status, currency, count, total in rows
+        ])
+        AgingState.objects.update_or_create(
+            entity_id=entity_id, defaults={"as_of": today, "boundaries": boundaries}
+        )
+
+
+def roll_forward(entity_id, state, today):
+    """Age the aggregates from ``state.as_of`` to ``today``.
+
+    Only invoices that crossed a boundary in between move: for boundary b,
+    those due in [as_of - b, today - b). An invoice crossing several
+    boundaries is moved once per boundary, which nets out correctly.
+    """
+    boundaries = state.boundaries
+    base = MercoaInvoice.objects.filter(entity_id=entity_id, due_date__isnull=False)
+    with transaction.atomic():
+        for i, b in enumerate(boundaries):
+            crossed = base.filter(
+                due_date__gte=_midnight(state.as_of - timedelta(days=b)),
+                due_date__lt=_midnight(today - timedelta(days=b)),
+            )
+            for row in _grouped(crossed):
+                amount = row["amount"] or Decimal("0")
+                _add(entity_id, row["status"], i, row["currency"], -row["n"], -amount)
+                _add(entity_id, row["status"], i + 1, row["currency"], row["n"], amount)
+        state.as_of = today
+        state.save(update_fields=["as_of"])
+
+
+def ensure_current(entity_id, today=None):
+    today = today or today_utc()
+    state = AgingState.objects.filter(entity_id=entity_id).first()
+    if state is None or state.boundaries != default_boundaries() or state.as_of > today:
+        rebuild(entity_id, today)
+    elif state.as_of < today:
+        roll_forward(entity_id, state, today)
+
+
+def _bucket_of(row, boundaries, today):
+    if row is None or row.due_date is None:
+        return None
+    return bucket_index((today - row.due_date.astimezone(timezone.utc).date()).days, boundaries)
+
+
+def apply_change(old, new):
+    """Move one invoice's contribution from its ``old`` mirror row to its
+    ``new`` one (either may be None). Entities without aggregates yet are
+    left alone; they are built on first use."""
+    for row, sign in ((old, -1), (new, 1)):
+        if row is None:
+            continue
+        state = AgingState.objects.filter(entity_id=row.entity_id).first()
+        if state is None:
+            continue
+        bucket = _bucket_of(row, state.boundaries, state.as_of)
+        if bucket is not None:
+            _add(row.entity_id, row.status, bucket, row.currency, sign, sign * (row.amount or Decimal("0")))
+
+
+def _summary_from(rows_by_bucket, boundaries):
+    summary = []
+    lower = None
+    for i, label in enumerate(bucket_labels(boundaries)):
+        count, totals = 0, {}
+        for _status, currency, n, amount in rows_by_bucket.get(i, []):
+            count += n
+            totals[currency] = totals.get(currency, Decimal("0")) + amount
+        summary.append({
+            "bucket": label,
+            "min_days": None if i == 0 else lower + 1,
+            "max_days": boundaries[i] if i < len(boundaries) else None,
+            "count": count,
+            "totals": {currency: str(total.quantize(CENTS)) for currency, total in sorted(totals.items())},
+        })
+        lower = boundaries[i] if i < len(boundaries) else lower
+    return summary
+
+
+def summary(entity_id, statuses, boundaries=None, today=None):
+    """Per-bucket count and total per currency. The configured default
+    boundaries are served from the running aggregates; custom ones are
+    aggregated in the database on the fly."""
+    today = today or today_utc()
+    boundaries = clean_boundaries(boundaries)
+    if boundaries != default_boundaries():
+        return _summary_from(aggregate_buckets(entity_id, boundaries, today, statuses), boundaries)
+
+    ensure_current(entity_id, today)
+    rows_by_bucket = {}
+    for agg in AgingAggregate.objects.filter(entity_id=entity_id, status__in=statuses, count__gt=0):
+        rows_by_bucket.setdefault(agg.bucket, []).append((agg.status, agg.currency, agg.count, agg.total))
+    return _summary_from(rows_by_bucket, boundaries)
+
+
+def resolve_bucket(bucket, boundaries):
+    labels = bucket_labels(boundaries)
+    if isinstance(bucket, int) and 0 <= bucket < len(labels):
+        return bucket
+    if bucket in labels:
+        return labels.index(bucket)
+    raise ValueError(f"Unknown aging bucket: {bucket}")
+
+
+def bucket_page(entity_id, statuses, bucket, page=1, page_size=50, boundaries=None, today=None, fields=None):
+    today = today or today_utc()
+    boundaries = clean_boundaries(boundaries)
+    index = resolve_bucket(bucket, boundaries)
+    qs = MercoaInvoice.objects.filter(
+        entity_id=entity_id, status__in=statuses, **bucket_filters(boundaries, today)[index]
+    ).order_by("due_date", "invoice_id")
+
+    page = max(int(page), 1)
+    page_size = max(1, min(int(page_size), 500))
+    start = (page - 1) * page_size
+    rows = list(qs[start:start + page_size + 1])
+    return {
+        "bucket": bucket_labels(boundaries)[index],
+        "page": page,
+        "page_size": page_size,
+        "hasMore": len(rows) > page_size,
+        "invoices": [project(row.data, fields) for row in rows[:page_size]],
+    }
@@ -6,3 +6,6 @@ class ApiConfig(AppConfig):
 
     def ready(self):
         import api.signals
+        from django.db.backends.signals import connection_created
+        from .metrics import instrument_connection
+        connection_created.connect(instrument_connection)
@@ -0,0 +1,773 @@
+"""``async def`` versions of the Mercoa proxy views.
+
+These are wired in by ``api/urls.py`` when the app is served through
+``mercoa_backend/asgi.py`` (or ``MERCOA_ASYNC_VIEWS=1``), so an upstream
+round-trip no longer pins a worker thread. Under WSGI the synchronous views
+in ``api/views.py`` are used unchanged.
+"""
+import io
+import json
+import logging
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, HttpResponseNotAllowed
+from django.views.decorators.csrf import csrf_exempt
+
+from . import aging, user_import
+from .fanout import afan_out
+from .invoice_mirror import aensure_fresh, aread_entity_invoices_raw, astream_entity_invoices, upsert_invoice
+from .streaming import aprime, streaming_response
+from .fast_json import FastJsonResponse, raw_json_response
+from .conditional import etag, not_modified, not_modified_response, with_etag
+from .projection import invoice_page, project, resolve_fields
+from .mercoa_client import get_async_client
+from .token_cache import aget_entity_token
+from .ref_cache import ref_cache
+from .single_flight import single_flight
+from .session_context import aentity_context, astore_entity_context
+from .resilience import UpstreamUnavailable
+from .user_import import user_payload
+from .views import (
+    APPROVER_USER_ID, aging_report_etag, already_onboarded, build_entity_payload, build_invoice_payload,
+    build_invoice_update_payload, build_policy_payload, bulk_approve_error, bulk_create_error, bulk_item_error,
+    bulk_summary, finish_onboarding, onboarding_profile, oversized_logo, queue_bulk_create, queue_job, queue_onboarding,
+    queue_upload_onboarding, queue_user_import, read_onboarding_upload, save_base64_documents,
+    unavailable_response, user_import_response, validate_invoice,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def upstream_error(e, message="Mercoa API error"):
+    response = getattr(e, "response", None)
+    return JsonResponse({
+        "status": "error",
+        "message": message,
+        "details": str(e),
+        "response": response.text if response is not None else None,
+    }, status=500)
+
+
+async def amint_entity_token(entity_id):
+    res = await get_async_client().post("/entity/{entity_id}/token", op="token", json={}, entity_id=entity_id)
+    res.raise_for_status()
+    return res.text.strip('"')
+
+
+@csrf_exempt
+async def get_mercoa_token(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        email = data.get("email")
+
+        context = await aentity_context(request, email)
+        if context is None:
+            return JsonResponse({"status": "error", "message": "Email required."}, status=400)
+
+        if not context["entity_id"]:
+            return JsonResponse({"status": "error", "message": "Entity not onboarded"}, status=400)
+
+        token = await aget_entity_token(context["entity_id"], amint_entity_token)
+        return JsonResponse({"status": "success", "token": token})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPStatusError as api_err:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API failed",
+            "details": str(api_err),
+            "response": api_err.response.text,
+        }, status=api_err.response.status_code)
+
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def list_invoices(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+
+        if not entity_id:
+            return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
+
+        try:
+            fields = resolve_fields(data.get("fields"), data.get("view"))
+        except ValueError as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+        stream = data.get("stream")
+        if stream:
+            invoices = await aprime(
+                project(invoice, fields) async for invoice in astream_entity_invoices(entity_id, data.get("max_age"))
+            )
+            return streaming_response(invoices, stream, "invoices")
+
+        version = await aensure_fresh(entity_id, max_age=data.get("max_age"))
+        tag = etag("invoices", entity_id, version, fields)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+
+        rows = await aread_entity_invoices_raw(entity_id)
+        return with_etag(raw_json_response("invoices", invoice_page(rows, fields)), tag)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e, "API request failed")
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def create_invoice(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+
+        error = validate_invoice(data)
+        if error:
+            return JsonResponse({"status": "error", "message": error}, status=400)
+
+        res = await get_async_client().post("/invoice", json=build_invoice_payload(data))
+        res.raise_for_status()
+        invoice = res.json()
+        await sync_to_async(upsert_invoice)(data["payerId"], invoice)
+        return JsonResponse({"status": "success", "invoice": invoice})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def approve_invoice(request):
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        invoice_id = data.get("invoice_id")
+
+        if not invoice_id:
+            return JsonResponse({"status": "error", "message": "Missing invoice_id"}, status=400)
+
+        response = await get_async_client().post(
+            "/invoice/{invoice_id}/approve", json={"userId": APPROVER_USER_ID}, invoice_id=invoice_id
+        )
+
+        if response.status_code == 200:
+            return JsonResponse({"status": "success"})
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API error",
+            "details": response.text
+        }, status=response.status_code)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+async def _proxy_entity_list(request, route, key, resource):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+
+        if not entity_id:
+            return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
+
+        async def load():
+            res = await get_async_client().get(route, entity_id=entity_id)
+            res.raise_for_status()
+            return res.content  # passed through undecoded
+
+        client = get_async_client()
+        shared_load = lambda: single_flight.ado(("raw", client.url(route, entity_id=entity_id)), load)
+        raw, digest = await ref_cache.aget_or_load_tagged(resource, entity_id, shared_load)
+        tag = etag(key, digest)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+        return with_etag(raw_json_response(key, raw), tag)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def list_vendors(request):
+    return await _proxy_entity_list(request, "/entity/{entity_id}/counterparty", "vendors", "vendors")
+
+
+@csrf_exempt
+async def list_entity_users(request):
+    return await _proxy_entity_list(request, "/entity/{entity_id}/users", "users", "users")
+
+
+@csrf_exempt
+async def list_approval_policies(request):
+    return await _proxy_entity_list(request, "/entity/{entity_id}/approval-policies", "policies", "approval_policies")
+
+
+@csrf_exempt
+async def list_payment_method_schemas(request):
+    if request.method != "GET":
+        return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
+
+    try:
+        async def load():
+            res = await get_async_client().get("/paymentMethod/schema")
+            res.raise_for_status()
+            return res.content
+
+        schemas, digest = await ref_cache.aget_or_load_tagged(
+            "payment_method_schemas", None,
+            lambda: single_flight.ado(("raw", get_async_client().url("/paymentMethod/schema")), load),
+        )
+        tag = etag("schemas", digest)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+        return with_etag(raw_json_response("schemas", schemas), tag)
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPStatusError as e:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API error",
+            "details": e.response.text
+        }, status=e.response.status_code)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def ap_aging_report(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+        if not entity_id:
+            return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
+
+        statuses = data.get("statuses", ["APPROVED"])
+        boundaries = data.get("boundaries")
+        fields = resolve_fields(data.get("fields"), data.get("view"))
+        version = await aensure_fresh(entity_id, max_age=data.get("max_age"))
+        tag = aging_report_etag(entity_id, version, data, fields)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+
+        if data.get("bucket") is not None:
+            page = await sync_to_async(aging.bucket_page)(
+                entity_id, statuses, data["bucket"],
+                page=data.get("page", 1), page_size=data.get("page_size", 50), boundaries=boundaries,
+                fields=fields,
+            )
+            return with_etag(FastJsonResponse({"status": "success", **page}), tag)
+
+        return with_etag(FastJsonResponse({
+            "status": "success",
+            "as_of": aging.today_utc().isoformat(),
+            "buckets": await sync_to_async(aging.summary)(entity_id, statuses, boundaries),
+        }), tag)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as api_err:
+        return JsonResponse({"status": "error", "message": str(api_err)}, status=500)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+async def aonboard_entity(profile, data, saved_files, entity_logo=""):
+    res = await get_async_client().post("/entity", json=build_entity_payload(data))
+    return await sync_to_async(finish_onboarding)(profile, data, res, saved_files, entity_logo)
+
+
+@csrf_exempt
+async def create_entity(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+    try:
+        data = json.loads(request.body)
+        email = data.get("email")
+        if not email:
+            return JsonResponse({"status": "error", "message": "Email required."}, status=400)
+        logo_error = oversized_logo(data)
+        if logo_error is not None:
+            return logo_error
+
+        profile = await sync_to_async(onboarding_profile)(email)
+        if profile is None:
+            return JsonResponse({"status": "error", "message": "User not found."}, status=400)
+        if profile.entity_id:
+            return already_onboarded(profile)
+
+        saved_files = await sync_to_async(save_base64_documents)(data)
+        if data.get("background"):
+            return await sync_to_async(queue_onboarding)(email, data, saved_files)
+
+        body, status = await aonboard_entity(profile, data, saved_files, entity_logo=data.get("logo", ""))
+        if status == 200:
+            await astore_entity_context(request, profile, email)
+        return JsonResponse(body, status=status)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as api_err:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API request failed.",
+            "details": str(api_err)
+        }, status=500)
+    except Exception as general_err:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({
+            "status": "error",
+            "message": f"Unexpected error: {str(general_err)}"
+        }, status=500)
+
+
+@csrf_exempt
+async def create_entity_upload(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        # Django's multipart parser is synchronous; the documents go to disk off the event loop
+        response, upload = await sync_to_async(read_onboarding_upload)(request)
+        if response is not None:
+            return response
+        email, data, profile, saved_files, entity_logo = upload
+        if data.get("background"):
+            return await sync_to_async(queue_upload_onboarding)(email, data, saved_files, entity_logo)
+
+        body, status = await aonboard_entity(profile, data, saved_files, entity_logo=entity_logo)
+        if status == 200:
+            await astore_entity_context(request, profile, email)
+        return JsonResponse(body, status=status)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as api_err:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API request failed.",
+            "details": str(api_err)
+        }, status=500)
+    except Exception as general_err:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({
+            "status": "error",
+            "message": f"Unexpected error: {str(general_err)}"
+        }, status=500)
+
+
+@csrf_exempt
+async def update_invoice(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        invoice_id = data.get("invoice_id")
+        if not invoice_id:
+            return JsonResponse({"status": "error", "message": "Missing invoice_id"}, status=400)
+
+        res = await get_async_client().post(
+            "/invoice/{invoice_id}", json=build_invoice_update_payload(data), invoice_id=invoice_id
+        )
+        res.raise_for_status()
+        invoice = res.json()
+        await sync_to_async(upsert_invoice)(data["payerId"], invoice)
+        return JsonResponse({"status": "success", "invoice": invoice})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPStatusError as e:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API error",
+            "details": str(e),
+            "response": e.response.text,
+        }, status=e.response.status_code)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+async def acreate_one_invoice(data):
+    res = await get_async_client().post("/invoice", op="bulk", json=build_invoice_payload(data))
+    res.raise_for_status()
+    return res.json()
+
+
+async def abulk_create_results(invoices, concurrency=None):
+    async for index, invoice, error in afan_out(acreate_one_invoice, invoices, concurrency):
+        if error is not None:
+            yield bulk_item_error(index, error)
+            continue
+        try:
+            await sync_to_async(upsert_invoice)(invoices[index]["payerId"], invoice)
+        except Exception as e:
+            logger.warning("⚠️ Created invoice not mirrored: %s", e)
+        yield {"index": index, "status": "success", "invoice": invoice}
+
+
+@csrf_exempt
+async def bulk_create_invoices(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        invoices = data.get("invoices")
+
+        error = bulk_create_error(invoices)
+        if error is not None:
+            return error
+
+        if data.get("background"):
+            return await sync_to_async(queue_bulk_create)(invoices, data.get("priority"))
+
+        logger.info("📦 Creating %d invoices", len(invoices))
+        results = abulk_create_results(invoices)
+        stream = data.get("stream")
+        if stream:
+            return streaming_response(results, stream, "results")
+        return FastJsonResponse(bulk_summary([result async for result in results]))
+
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+async def aapprove_one_invoice(invoice_id):
+    response = await get_async_client().post(
+        "/invoice/{invoice_id}/approve", op="bulk", json={"userId": APPROVER_USER_ID}, invoice_id=invoice_id
+    )
+    response.raise_for_status()
+    return invoice_id
+
+
+async def abulk_approve_results(invoice_ids):
+    async for index, _, error in afan_out(aapprove_one_invoice, invoice_ids):
+        if error is not None:
+            logger.warning("❌ Approval failed for %s: %s", invoice_ids[index], error)
+            yield {**bulk_item_error(index, error), "invoice_id": invoice_ids[index]}
+        else:
+            yield {"index": index, "status": "success", "invoice_id": invoice_ids[index]}
+
+
+@csrf_exempt
+async def bulk_approve_invoices(request):
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        invoice_ids = data.get("invoice_ids")
+
+        error = bulk_approve_error(invoice_ids)
+        if error is not None:
+            return error
+
+        if data.get("background"):
+            return await sync_to_async(queue_job)("bulk_approve_invoices", {"invoice_ids": invoice_ids}, data.get("priority"), 5)
+
+        logger.info("✅ Approving %d invoices", len(invoice_ids))
+        results = abulk_approve_results(invoice_ids)
+        stream = data.get("stream")
+        if stream:
+            return streaming_response(results, stream, "results")
+        return FastJsonResponse(bulk_summary([result async for result in results]))
+
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+
+@csrf_exempt
+async def create_entity_user(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+        payload = user_payload(data.get("email"), data.get("name", ""), data.get("roles", ["admin"]))
+
+        res = await get_async_client().post("/entity/{entity_id}/user", json=payload, entity_id=entity_id)
+        res.raise_for_status()
+        await ref_cache.ainvalidate("users", entity_id)
+        return JsonResponse({"status": "success", "user": res.json()})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def update_entity_user(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+        user_id = data.get("user_id")
+        if not entity_id or not user_id:
+            return JsonResponse({"status": "error", "message": "Missing entity_id or user_id"}, status=400)
+
+        payload = user_payload(data.get("email"), data.get("name"), data.get("roles", []))
+        res = await get_async_client().post(
+            "/entity/{entity_id}/user/{user_id}", json=payload, entity_id=entity_id, user_id=user_id
+        )
+        res.raise_for_status()
+        await ref_cache.ainvalidate("users", entity_id)
+        return JsonResponse({"status": "success", "user": res.json()})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def delete_entity_user(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+        user_id = data.get("user_id")
+        if not entity_id or not user_id:
+            return JsonResponse({"status": "error", "message": "Missing entity_id or user_id"}, status=400)
+
+        res = await get_async_client().delete("/entity/{entity_id}/user/{user_id}", entity_id=entity_id, user_id=user_id)
+        res.raise_for_status()
+        await ref_cache.ainvalidate("users", entity_id)
+        return JsonResponse({"status": "success", "message": "User deleted"})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def import_entity_users(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        # Parsing the multipart body reads the upload; keep that off the event loop
+        post, files = await sync_to_async(lambda: (request.POST, request.FILES))()
+        entity_id = post.get("entity_id")
+        upload = files.get("file")
+        if not entity_id or upload is None:
+            return JsonResponse({"status": "error", "message": "Missing entity_id or file"}, status=400)
+
+        if post.get("background"):
+            return await sync_to_async(queue_user_import)(entity_id, upload, post.get("priority"))
+
+        logger.info("👥 Importing users for %s from %s", entity_id, upload.name)
+        lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        results = await aprime(user_import.aimport_users(entity_id, lines))
+        return user_import_response(user_import.aresult_csv_lines(results))
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def create_approval_policy(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+        amount = data.get("amount")
+        roles = data.get("roles", [])
+        if not entity_id or not amount or not roles:
+            return JsonResponse({"status": "error", "message": "Missing required fields"}, status=400)
+
+        payload = build_policy_payload(amount, data.get("currency", "USD"), roles, data.get("num_approvers", 1))
+        res = await get_async_client().post("/entity/{entity_id}/approval-policy", json=payload, entity_id=entity_id)
+        res.raise_for_status()
+        await ref_cache.ainvalidate("approval_policies", entity_id)
+        return JsonResponse({"status": "success", "policy": res.json()})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def update_approval_policy(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+        policy_id = data.get("policy_id")
+        if not all([entity_id, policy_id]):
+            return JsonResponse({"status": "error", "message": "Missing entity_id or policy_id"}, status=400)
+
+        payload = build_policy_payload(
+            data.get("amount"), data.get("currency", "USD"), data.get("roles", []), data.get("num_approvers", 1)
+        )
+        res = await get_async_client().post(
+            "/entity/{entity_id}/approval-policy/{policy_id}",
+            json=payload, entity_id=entity_id, policy_id=policy_id,
+        )
+        res.raise_for_status()
+        await ref_cache.ainvalidate("approval_policies", entity_id)
+        return JsonResponse({"status": "success", "policy": res.json()})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        logger.warning("❌ Mercoa approval policy update failed: %s", e)
+        return upstream_error(e)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def delete_approval_policy(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        entity_id = data.get("entity_id")
+        policy_id = data.get("policy_id")
+        if not entity_id or not policy_id:
+            return JsonResponse({"status": "error", "message": "Missing entity_id or policy_id"}, status=400)
+
+        res = await get_async_client().delete(
+            "/entity/{entity_id}/approval-policy/{policy_id}",
+            entity_id=entity_id, policy_id=policy_id,
+        )
+        res.raise_for_status()
+        await ref_cache.ainvalidate("approval_policies", entity_id)
+        return JsonResponse({"status": "success", "message": "Policy deleted"})
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except httpx.HTTPError as e:
+        return upstream_error(e)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def create_payment_method_schema(request):
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
+
+    try:
+        payload = json.loads(request.body)
+        missing_keys = [key for key in ["name", "isSource", "isDestination", "fields"] if key not in payload]
+        if missing_keys:
+            return JsonResponse({"status": "error", "message": f"Missing fields: {', '.join(missing_keys)}"}, status=400)
+
+        response = await get_async_client().post("/paymentMethod/schema", json=payload)
+        if response.status_code in [200, 201]:
+            await ref_cache.ainvalidate("payment_method_schemas")
+            return JsonResponse({"status": "success", "schema": response.json()}, status=201)
+        logger.warning("❌ Mercoa API error: %s", response.status_code, extra={"payload": response.text})
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API error",
+            "details": response.text
+        }, status=response.status_code)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except json.JSONDecodeError:
+        return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
+    except Exception as e:
+        logger.exception("🔥 Payment method schema creation failed")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+@csrf_exempt
+async def delete_payment_method_schema(request):
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        schema_id = data.get("schema_id")
+        if not schema_id:
+            return JsonResponse({"status": "error", "message": "Missing schema_id"}, status=400)
+
+        logger.info("🗑️ Deleting schema %s", schema_id)
+        response = await get_async_client().delete("/paymentMethod/schema/{schema_id}", schema_id=schema_id)
+        if response.status_code in [200, 204]:
+            await ref_cache.ainvalidate("payment_method_schemas")
+            return JsonResponse({"status": "success", "message": "Schema deleted"})
+        logger.warning("❌ Mercoa API error: %s", response.status_code, extra={"payload": response.text})
+        return JsonResponse({"status": "error", "message": "Mercoa API error", "details": response.text}, status=500)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        logger.exception("❌ Exception during schema deletion")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
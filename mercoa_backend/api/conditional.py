@@ -0,0 +1,56 @@
+"""Strong ETags and ``If-None-Match`` for the list and report endpoints.
+
+Tags are built from version numbers or content digests the views already
+have at hand (the mirror version of an entity, the digest of a cached
+upstream body), so a matching request is answered with 304 before any
+response body is built::
+
+    tag = etag("invoices", entity_id, version, fields)
+    if not_modified(request, tag):
+        return not_modified_response(tag)
+    ...
+    return with_etag(response, tag)
+
+Most of these endpoints are POSTs carrying a JSON body; they only read, so
+``If-None-Match`` is honoured for them the same way as for GET.
+"""
+import hashlib
+
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from .fast_json import dumps
+
+# Browsers may keep the response, but have to revalidate before reusing it
+CACHE_CONTROL = "private, no-cache"
+
+
+def digest(raw):
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+def etag(*parts):
+    """Strong ETag for a response identified by ``parts`` (any JSON values)."""
+    return f'"{digest(dumps(parts))}"'
+
+
+def not_modified(request, tag):
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    # Weak comparison, as If-None-Match calls for: W/"x" matches "x"
+    return any(candidate == "*" or candidate.removeprefix("W/") == tag for candidate in parse_etags(header))
+
+
+def with_etag(response, tag):
+    if response.status_code == 200:
+        response["ETag"] = tag
+        response["Cache-Control"] = CACHE_CONTROL
+    return response
+
+
+def not_modified_response(tag):
+    response = HttpResponseNotModified()
+    response["ETag"] = tag
+    response["Cache-Control"] = CACHE_CONTROL
+    return response
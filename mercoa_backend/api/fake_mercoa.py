@@ -0,0 +1,297 @@
+"""In-process stand-in for the Mercoa API, for tests and load tests.
+
+Serves every route this backend calls from in-memory state, with configurable
+latency, error rate and dataset size:
+
+    fake = FakeMercoa(latency=0.05, error_rate=0.01, invoices_per_entity=1000)
+    base_url = fake.start()          # http://127.0.0.1:<port>
+    ...
+    fake.stop()
+
+or standalone with ``python manage.py run_fake_mercoa``. Point the backend at
+it with ``MERCOA_API_BASE``. Unknown entities are created on first use, so any
+``entity_id`` works. ``GET /_fake/stats`` returns request counts per route.
+"""
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+STATUSES = ["DRAFT", "NEW", "APPROVED", "SCHEDULED", "PAID"]
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class FakeMercoa:
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, invoices_per_entity=250,
+                 vendors_per_entity=20, users_per_entity=5, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.invoices_per_entity = invoices_per_entity
+        self.vendors_per_entity = vendors_per_entity
+        self.users_per_entity = users_per_entity
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.entities = {}
+        self.invoices = {}
+        self.schemas = {}
+        self.requests = Counter()
+        self.server = None
+        self.routes = [
+            ("POST", "/entity", self.create_entity),
+            ("POST", "/entity/{entity_id}/token", self.entity_token),
+            ("GET", "/entity/{entity_id}/invoices", self.list_invoices),
+            ("GET", "/entity/{entity_id}/counterparty", self.list_vendors),
+            ("GET", "/entity/{entity_id}/users", self.list_users),
+            ("POST", "/entity/{entity_id}/user", self.create_user),
+            ("POST", "/entity/{entity_id}/user/{user_id}", self.update_user),
+            ("DELETE", "/entity/{entity_id}/user/{user_id}", self.delete_user),
+            ("GET", "/entity/{entity_id}/approval-policies", self.list_policies),
+            ("POST", "/entity/{entity_id}/approval-policy", self.create_policy),
+            ("POST", "/entity/{entity_id}/approval-policy/{policy_id}", self.update_policy),
+            ("DELETE", "/entity/{entity_id}/approval-policy/{policy_id}", self.delete_policy),
+            ("POST", "/invoice", self.create_invoice),
+            ("POST", "/invoice/{invoice_id}/approve", self.approve_invoice),
+            ("POST", "/invoice/{invoice_id}", self.update_invoice),
+            ("GET", "/paymentMethod/schema", self.list_schemas),
+            ("POST", "/paymentMethod/schema", self.create_schema),
+            ("DELETE", "/paymentMethod/schema/{schema_id}", self.delete_schema),
+            ("GET", "/_fake/stats", self.stats),
+        ]
+        # Same route templates as the client uses; {name} matches one path segment
+        self.routes = [
+            (method, template, re.compile("^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template) + "$"), handler)
+            for method, template, handler in self.routes
+        ]
+
+    # -- dataset -------------------------------------------------------------
+
+    def _invoice(self, entity_id, vendor_id, n):
+        due = datetime.now(timezone.utc) + timedelta(days=self.rng.randint(-150, 45))
+        return {
+            "id": f"inv_{entity_id}_{n:06d}",
+            "status": self.rng.choice(STATUSES),
+            "payerId": entity_id,
+            "vendorId": vendor_id,
+            "invoiceNumber": f"INV-{n:06d}",
+            "amount": round(self.rng.uniform(10, 25000), 2),
+            "currency": "USD",
+            "dueDate": due.replace(hour=0, minute=0, second=0, microsecond=0).isoformat().replace("+00:00", "Z"),
+            "createdAt": _now(),
+            "updatedAt": _now(),
+            "lineItems": [],
+        }
+
+    def entity(self, entity_id):
+        """State of ``entity_id``, generated on first use. Call with the lock held."""
+        state = self.entities.get(entity_id)
+        if state is None:
+            vendors = [
+                {"id": f"ent_vendor_{entity_id}_{i}", "name": f"Vendor {i}", "accountType": "business"}
+                for i in range(self.vendors_per_entity)
+            ]
+            invoices = [
+                self._invoice(entity_id, vendors[n % len(vendors)]["id"] if vendors else None, n)
+                for n in range(self.invoices_per_entity)
+            ]
+            users = {}
+            for i in range(self.users_per_entity):
+                user_id = f"user_{entity_id}_{i}"
+                email = f"user{i}@{entity_id}.example.com"
+                users[user_id] = {"id": user_id, "email": email, "name": f"User {i}", "roles": ["admin"], "foreignId": email}
+            state = self.entities[entity_id] = {
+                "invoices": [invoice["id"] for invoice in invoices],
+                "vendors": vendors,
+                "users": users,
+                "policies": {},
+                "tokens": 0,
+            }
+            self.invoices.update((invoice["id"], invoice) for invoice in invoices)
+        return state
+
+    # -- handlers: (query, body, **path params) -> (status, body) -------------
+
+    def create_entity(self, query, body):
+        entity_id = f"ent_{uuid.uuid4().hex[:12]}"
+        self.entity(entity_id)
+        return 200, {"id": entity_id, "createdAt": _now(), **body}
+
+    def entity_token(self, query, body, entity_id):
+        state = self.entity(entity_id)
+        state["tokens"] += 1
+        return 200, f"token_{entity_id}_{state['tokens']}"
+
+    def list_invoices(self, query, body, entity_id):
+        ids = self.entity(entity_id)["invoices"]
+        limit = int(query.get("limit", ["10"])[0])
+        start = 0
+        after = query.get("startingAfter", [None])[0]
+        if after in ids:
+            start = ids.index(after) + 1
+        page = [self.invoices[i] for i in ids[start:start + limit]]
+        return 200, {"count": len(page), "hasMore": start + limit < len(ids), "data": page}
+
+    def list_vendors(self, query, body, entity_id):
+        vendors = self.entity(entity_id)["vendors"]
+        return 200, {"count": len(vendors), "hasMore": False, "data": vendors}
+
+    def list_users(self, query, body, entity_id):
+        return 200, list(self.entity(entity_id)["users"].values())
+
+    def create_user(self, query, body, entity_id):
+        user_id = f"user_{uuid.uuid4().hex[:12]}"
+        user = self.entity(entity_id)["users"][user_id] = {"id": user_id, **body}
+        return 200, user
+
+    def update_user(self, query, body, entity_id, user_id):
+        users = self.entity(entity_id)["users"]
+        if user_id not in users:
+            return 404, {"errorName": "NotFound", "errorMessage": f"User {user_id} not found"}
+        users[user_id].update(body)
+        return 200, users[user_id]
+
+    def delete_user(self, query, body, entity_id, user_id):
+        if self.entity(entity_id)["users"].pop(user_id, None) is None:
+            return 404, {"errorName": "NotFound", "errorMessage": f"User {user_id} not found"}
+        return 200, None
+
+    def list_policies(self, query, body, entity_id):
+        return 200, list(self.entity(entity_id)["policies"].values())
+
+    def create_policy(self, query, body, entity_id):
+        policy_id = f"ap_{uuid.uuid4().hex[:12]}"
+        policy = self.entity(entity_id)["policies"][policy_id] = {"id": policy_id, **body}
+        return 200, policy
+
+    def update_policy(self, query, body, entity_id, policy_id):
+        policies = self.entity(entity_id)["policies"]
+        if policy_id not in policies:
+            return 404, {"errorName": "NotFound", "errorMessage": f"Policy {policy_id} not found"}
+        policies[policy_id].update(body)
+        return 200, policies[policy_id]
+
+    def delete_policy(self, query, body, entity_id, policy_id):
+        if self.entity(entity_id)["policies"].pop(policy_id, None) is None:
+            return 404, {"errorName": "NotFound", "errorMessage": f"Policy {policy_id} not found"}
+        return 200, None
+
+    def create_invoice(self, query, body):
+        entity_id = body.get("payerId")
+        if not entity_id:
+            return 400, {"errorName": "BadRequest", "errorMessage": "payerId is required"}
+        state = self.entity(entity_id)
+        invoice = {
+            **body,
+            "id": f"inv_{uuid.uuid4().hex[:12]}",
+            "amount": body.get("amount") or sum(item.get("amount", 0) for item in body.get("lineItems") or []),
+            "createdAt": _now(),
+            "updatedAt": _now(),
+        }
+        self.invoices[invoice["id"]] = invoice
+        state["invoices"].append(invoice["id"])
+        return 200, invoice
+
+    def update_invoice(self, query, body, invoice_id):
+        invoice = self.invoices.get(invoice_id)
+        if invoice is None:
+            return 404, {"errorName": "NotFound", "errorMessage": f"Invoice {invoice_id} not found"}
+        invoice.update({k: v for k, v in body.items() if v is not None}, updatedAt=_now())
+        return 200, invoice
+
+    def approve_invoice(self, query, body, invoice_id):
+        invoice = self.invoices.get(invoice_id)
+        if invoice is None:
+            return 404, {"errorName": "NotFound", "errorMessage": f"Invoice {invoice_id} not found"}
+        invoice.update(status="APPROVED", updatedAt=_now())
+        return 200, None
+
+    def list_schemas(self, query, body):
+        return 200, list(self.schemas.values())
+
+    def create_schema(self, query, body):
+        schema_id = f"cpms_{uuid.uuid4().hex[:12]}"
+        schema = self.schemas[schema_id] = {"id": schema_id, **body}
+        return 200, schema
+
+    def delete_schema(self, query, body, schema_id):
+        if self.schemas.pop(schema_id, None) is None:
+            return 404, {"errorName": "NotFound", "errorMessage": f"Schema {schema_id} not found"}
+        return 200, None
+
+    def stats(self, query, body):
+        return 200, {"requests": dict(self.requests)}
+
+    # -- dispatch ------------------------------------------------------------
+
+    def handle(self, method, path, query, body):
+        for route_method, template, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                break
+        else:
+            return 404, {"errorName": "NotFound", "errorMessage": f"No route for {method} {path}"}
+
+        route = f"{method} {template}"
+        if handler != self.stats:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            if delay:
+                time.sleep(delay)
+            with self.lock:
+                self.requests[route] += 1
+                if self.error_rate and self.rng.random() < self.error_rate:
+                    return 503, {"errorName": "ServiceUnavailable", "errorMessage": "Injected failure"}
+        with self.lock:
+            return handler(query, body, **match.groupdict())
+
+    def start(self, host="127.0.0.1", port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    status, payload = 400, {"errorName": "BadRequest", "errorMessage": "Invalid JSON"}
+                else:
+                    status, payload = fake.handle(self.command, url.path, parse_qs(url.query), body)
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_DELETE = _dispatch
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self.url
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
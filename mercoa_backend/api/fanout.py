@@ -0,0 +1,54 @@
+import asyncio
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.conf import settings
+
+DEFAULT_CONCURRENCY = 8
+
+
+def bulk_concurrency():
+    return getattr(settings, "MERCOA_BULK_CONCURRENCY", DEFAULT_CONCURRENCY)
+
+
+def fan_out(func, items, concurrency=None):
+    """Call ``func(item)`` for every item on a bounded thread pool and yield
+    ``(index, result, error)`` in completion order.
+
+    Only ``concurrency`` items are submitted at a time - the next one goes in
+    as one finishes - so a long input never piles up in the executor queue.
+    ``error`` is the exception ``func`` raised, or None.
+    """
+    concurrency = max(1, concurrency or bulk_concurrency())
+    numbered = enumerate(items)
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="mercoa-fanout") as pool:
+        pending = {pool.submit(func, item): index for index, item in itertools.islice(numbered, concurrency)}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                error = future.exception()
+                yield index, None if error else future.result(), error
+                for next_index, item in itertools.islice(numbered, 1):
+                    pending[pool.submit(func, item)] = next_index
+
+
+async def afan_out(afunc, items, concurrency=None):
+    """Async counterpart of ``fan_out``: await ``afunc(item)`` for every item
+    with at most ``concurrency`` in flight on the event loop."""
+    concurrency = max(1, concurrency or bulk_concurrency())
+    numbered = enumerate(items)
+    pending = {asyncio.ensure_future(afunc(item)): index for index, item in itertools.islice(numbered, concurrency)}
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index = pending.pop(task)
+                error = task.exception()
+                yield index, None if error else task.result(), error
+                for next_index, item in itertools.islice(numbered, 1):
+                    pending[asyncio.ensure_future(afunc(item))] = next_index
+    finally:
+        # The consumer went away (e.g. the client hung up mid-stream)
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,64 @@
+"""Response JSON without redundant work.
+
+``dumps`` encodes with orjson when it is installed (falling back to the
+standard library), with the same output types as ``JsonResponse``'s
+DjangoJSONEncoder. ``raw_json_response`` splices JSON that is already
+encoded - an upstream response body, mirrored rows - into the usual
+``{"status": "success", <key>: ...}`` envelope without decoding it.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # the standard library encoder is used instead
+    orjson = None
+
+_django_default = DjangoJSONEncoder().default
+
+if orjson is not None:
+    # Datetimes go through DjangoJSONEncoder so they look as they did with JsonResponse
+    _OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+    def dumps(value):
+        return orjson.dumps(value, default=_django_default, option=_OPTIONS)
+
+    loads = orjson.loads
+else:
+    def dumps(value):
+        return json.dumps(value, cls=DjangoJSONEncoder).encode()
+
+    loads = json.loads
+
+
+class FastJsonResponse(HttpResponse):
+    """``JsonResponse`` encoded with ``dumps``."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
+
+
+def json_array(encoded_items):
+    """Join already-encoded JSON values (bytes or str) into one array."""
+    return b"[" + b",".join(item if isinstance(item, bytes) else item.encode() for item in encoded_items) + b"]"
+
+
+def list_page(encoded_items):
+    """A Mercoa-shaped list page, ``{"count", "hasMore", "data"}``, around
+    already-encoded items."""
+    items = list(encoded_items)
+    return dumps({"count": len(items), "hasMore": False})[:-1] + b',"data":' + json_array(items) + b"}"
+
+
+def envelope(key, raw, **fields):
+    """``{"status": "success", **fields, key: <raw>}`` as bytes, with ``raw``
+    (already-encoded JSON) copied in as is."""
+    head = dumps({"status": "success", **fields})[:-1]
+    return b"".join((head, b",", dumps(key), b":", raw.strip() or b"null", b"}"))
+
+
+def raw_json_response(key, raw, status=200, **fields):
+    return HttpResponse(envelope(key, raw, **fields), status=status, content_type="application/json")
@@ -0,0 +1,330 @@
+import hashlib
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import aging
+from .fast_json import dumps
+from .models import MercoaInvoice, InvoiceSyncState
+from .mercoa_client import get_client, get_async_client
+from .single_flight import single_flight
+
+MIRROR_FIELDS = ["entity_id", "status", "due_date", "amount", "currency",
+                 "vendor_id", "invoice_number", "updated_at", "data", "synced_at"]
+
+
+def default_max_age():
+    return getattr(settings, "INVOICE_MIRROR_MAX_AGE", 30)
+
+
+def _parse_dt(value):
+    if not value:
+        return None
+    try:
+        return parse_datetime(value)
+    except ValueError:
+        return None
+
+
+def _parse_amount(value):
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value)).quantize(Decimal("0.01"))
+    except InvalidOperation:
+        return None
+
+
+def to_row(entity_id, invoice):
+    return MercoaInvoice(
+        invoice_id=invoice["id"],
+        entity_id=entity_id,
+        status=invoice.get("status") or "",
+        due_date=_parse_dt(invoice.get("dueDate")),
+        amount=_parse_amount(invoice.get("amount")),
+        currency=invoice.get("currency") or "USD",
+        vendor_id=invoice.get("vendorId"),
+        invoice_number=invoice.get("invoiceNumber"),
+        updated_at=_parse_dt(invoice.get("updatedAt")),
+        data=invoice,
+    )
+
+
+def _upsert(rows):
+    MercoaInvoice.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["invoice_id"],
+        update_fields=MIRROR_FIELDS,
+    )
+
+
+def _invoice_digest(invoice):
+    return int.from_bytes(hashlib.blake2b(dumps(invoice), digest_size=8).digest(), "big")
+
+
+def _finish_sync(entity_id, started, content_hash):
+    with transaction.atomic():
+        # Every row written since `started` got a fresh synced_at; older ones are gone upstream.
+        MercoaInvoice.objects.filter(entity_id=entity_id, synced_at__lt=started).delete()
+        state, _ = InvoiceSyncState.objects.select_for_update().get_or_create(entity_id=entity_id)
+        state.last_synced_at = started
+        # A sync that brought nothing new keeps the version, and with it every ETag handed out
+        if state.content_hash != content_hash:
+            state.content_hash = content_hash
+            state.version += 1
+        state.save()
+        aging.rebuild(entity_id)
+
+
+def _bump_version(*entity_ids):
+    # The next full sync cannot be compared against a single-invoice change, so it bumps too
+    InvoiceSyncState.objects.filter(entity_id__in=set(entity_ids)).update(version=F("version") + 1, content_hash="")
+
+
+class MirrorWriter:
+    """Upserts one entity's invoices in batches as they are added, keeping an
+    order-independent digest of everything added so far."""
+
+    def __init__(self, entity_id, batch_size=500):
+        self.entity_id = entity_id
+        self.batch_size = batch_size
+        self.started = timezone.now()
+        self.batch = []
+        self.count = self.total = 0
+
+    def add(self, invoice):
+        if invoice.get("id"):
+            self.batch.append(to_row(self.entity_id, invoice))
+            self.count += 1
+            self.total = (self.total + _invoice_digest(invoice)) % 2 ** 64
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def add_all(self, invoices):
+        for invoice in invoices:
+            self.add(invoice)
+
+    def flush(self):
+        if self.batch:
+            _upsert(self.batch)
+            self.batch = []
+
+    def finish(self):
+        """The invoices added were the entity's complete set: drop rows no
+        longer upstream and bump the sync timestamp."""
+        self.flush()
+        _finish_sync(self.entity_id, self.started, f"{self.count}:{self.total:016x}")
+
+
+def iter_store(entity_id, invoices, replace=True, batch_size=500):
+    """Upsert ``invoices`` for ``entity_id`` in batches while yielding each
+    one back, so a caller can stream them on without holding the whole set.
+
+    With ``replace=True`` the iterable is the entity's complete invoice set:
+    once it is exhausted, rows no longer upstream are removed and the sync
+    timestamp is bumped.
+    """
+    writer = MirrorWriter(entity_id, batch_size)
+    for invoice in invoices:
+        writer.add(invoice)
+        yield invoice
+    if replace:
+        writer.finish()
+    else:
+        writer.flush()
+
+
+def store_invoices(entity_id, invoices, replace=True):
+    return sum(1 for _ in iter_store(entity_id, invoices, replace))
+
+
+def upsert_invoice(entity_id, invoice):
+    """Mirror a single invoice we already have in hand (a create/update
+    response or a webhook) and move its aging contribution accordingly.
+    An update older than the mirrored copy is ignored."""
+    if not invoice.get("id"):
+        return None
+    with transaction.atomic():
+        old = MercoaInvoice.objects.select_for_update().filter(invoice_id=invoice["id"]).first()
+        new = to_row(entity_id, invoice)
+        if old is not None:
+            if old.updated_at and new.updated_at and new.updated_at < old.updated_at:
+                return old
+            new.pk = old.pk
+        new.save()
+        aging.apply_change(old, new)
+        _bump_version(entity_id, old.entity_id if old is not None else entity_id)
+    return new
+
+
+def remove_invoice(invoice_id):
+    with transaction.atomic():
+        old = MercoaInvoice.objects.select_for_update().filter(invoice_id=invoice_id).first()
+        if old is None:
+            return False
+        old.delete()
+        aging.apply_change(old, None)
+        _bump_version(old.entity_id)
+    return True
+
+
+def iter_upstream(entity_id):
+    return get_client().paginate("/entity/{entity_id}/invoices", entity_id=entity_id)
+
+
+def sync_entity(entity_id):
+    # Concurrent refreshes of one entity share a single upstream walk
+    return single_flight.do(("sync", entity_id), lambda: store_invoices(entity_id, iter_upstream(entity_id)))
+
+
+def fresh_version(entity_id, max_age):
+    """Version of the entity's mirror if it was synced within ``max_age``
+    seconds, else None."""
+    if max_age is None or max_age <= 0:
+        return None
+    cutoff = timezone.now() - timedelta(seconds=max_age)
+    return InvoiceSyncState.objects.filter(
+        entity_id=entity_id, last_synced_at__gte=cutoff
+    ).values_list("version", flat=True).first()
+
+
+def is_fresh(entity_id, max_age):
+    return fresh_version(entity_id, max_age) is not None
+
+
+def mirror_version(entity_id):
+    return InvoiceSyncState.objects.filter(entity_id=entity_id).values_list("version", flat=True).first() or 0
+
+
+def ensure_fresh(entity_id, max_age=None):
+    """Refresh the mirror from Mercoa if it is older than ``max_age`` seconds
+    (0 forces a refresh) and return its version, which changes whenever the
+    mirrored invoices do."""
+    if max_age is None:
+        max_age = default_max_age()
+    version = fresh_version(entity_id, max_age)
+    if version is None:
+        sync_entity(entity_id)
+        version = mirror_version(entity_id)
+    return version
+
+
+def mirrored_invoices(entity_id, max_age=None, statuses=None):
+    """QuerySet of mirrored invoices, refreshed from Mercoa first if the
+    local copy is older than ``max_age`` seconds (0 forces a refresh)."""
+    ensure_fresh(entity_id, max_age)
+
+    qs = MercoaInvoice.objects.filter(entity_id=entity_id)
+    if statuses is not None:
+        qs = qs.filter(status__in=statuses)
+    return qs
+
+
+def get_entity_invoices(entity_id, max_age=None, statuses=None):
+    qs = mirrored_invoices(entity_id, max_age, statuses).order_by("due_date")
+    return [row.data for row in qs.iterator(chunk_size=1000)]
+
+
+def raw_invoices(qs):
+    # Each invoice's JSON text as stored, for responses that pass it through undecoded
+    return qs.annotate(raw=Cast("data", TextField())).values_list("raw", flat=True)
+
+
+def _entity_invoices(entity_id, statuses=None):
+    qs = MercoaInvoice.objects.filter(entity_id=entity_id)
+    if statuses is not None:
+        qs = qs.filter(status__in=statuses)
+    return qs.order_by("due_date")
+
+
+def read_entity_invoices_raw(entity_id, statuses=None):
+    # As mirrored right now, without a freshness check
+    return list(raw_invoices(_entity_invoices(entity_id, statuses)).iterator(chunk_size=1000))
+
+
+def get_entity_invoices_raw(entity_id, max_age=None, statuses=None):
+    ensure_fresh(entity_id, max_age)
+    return read_entity_invoices_raw(entity_id, statuses)
+
+
+def stream_entity_invoices(entity_id, max_age=None):
+    """Iterate an entity's invoices with flat memory: from the mirror when it
+    is fresh, otherwise straight off Mercoa's pages (mirroring them on the way)."""
+    if max_age is None:
+        max_age = default_max_age()
+    if is_fresh(entity_id, max_age):
+        qs = MercoaInvoice.objects.filter(entity_id=entity_id).order_by("due_date")
+        return (row.data for row in qs.iterator(chunk_size=1000))
+    return iter_store(entity_id, iter_upstream(entity_id))
+
+
+async def aensure_fresh(entity_id, max_age=None):
+    # Async flavour for the ASGI views: the upstream refresh goes through the
+    # async client; only the DB work is pushed to a thread.
+    if max_age is None:
+        max_age = default_max_age()
+    version = await sync_to_async(fresh_version)(entity_id, max_age)
+    if version is None:
+        async def refresh():
+            # Written a batch at a time, so memory stays flat however many invoices there are
+            writer = MirrorWriter(entity_id)
+            batch = []
+            async for invoice in get_async_client().paginate("/entity/{entity_id}/invoices", entity_id=entity_id):
+                batch.append(invoice)
+                if len(batch) >= writer.batch_size:
+                    await sync_to_async(writer.add_all)(batch)
+                    batch = []
+            await sync_to_async(writer.add_all)(batch)
+            await sync_to_async(writer.finish)()
+            return writer.count
+        await single_flight.ado(("sync", entity_id), refresh)
+        version = await sync_to_async(mirror_version)(entity_id)
+    return version
+
+
+async def astream_entity_invoices(entity_id, max_age=None):
+    """Async ``stream_entity_invoices``: Mercoa's pages are walked with the
+    async client and written to the mirror a batch at a time."""
+    if max_age is None:
+        max_age = default_max_age()
+    if await sync_to_async(is_fresh)(entity_id, max_age):
+        qs = MercoaInvoice.objects.filter(entity_id=entity_id).order_by("due_date")
+        async for row in qs.aiterator(chunk_size=1000):
+            yield row.data
+        return
+
+    writer = MirrorWriter(entity_id)
+    batch = []
+    async for invoice in get_async_client().paginate("/entity/{entity_id}/invoices", entity_id=entity_id):
+        batch.append(invoice)
+        yield invoice
+        if len(batch) >= writer.batch_size:
+            await sync_to_async(writer.add_all)(batch)
+            batch = []
+    await sync_to_async(writer.add_all)(batch)
+    await sync_to_async(writer.finish)()
+
+
+async def aget_entity_invoices(entity_id, max_age=None, statuses=None):
+    await aensure_fresh(entity_id, max_age)
+    qs = MercoaInvoice.objects.filter(entity_id=entity_id)
+    if statuses is not None:
+        qs = qs.filter(status__in=statuses)
+    return [row.data async for row in qs.order_by("due_date")]
+
+
+async def aread_entity_invoices_raw(entity_id, statuses=None):
+    return [raw async for raw in raw_invoices(_entity_invoices(entity_id, statuses))]
+
+
+async def aget_entity_invoices_raw(entity_id, max_age=None, statuses=None):
+    await aensure_fresh(entity_id, max_age)
+    return await aread_entity_invoices_raw(entity_id, statuses)
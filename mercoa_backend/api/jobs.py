@@ -0,0 +1,156 @@
+import logging
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+HANDLERS = {}
+IDEMPOTENT = set()  # kinds that are safe to run again after a worker died part-way
+DEFAULT_STALE_AFTER = 60 * 60  # seconds before a running job is assumed dead and requeued
+DEFAULT_POLL_INTERVAL = 1.0
+MIN_PRIORITY, MAX_PRIORITY = 0, 10  # range a request may ask for; higher runs first
+
+
+class JobFailed(Exception):
+    # Raised by a handler to fail its job with a result body for the caller
+    def __init__(self, message, result=None):
+        super().__init__(message)
+        self.result = result
+
+
+def register(kind, idempotent=False):
+    """Register the handler for ``kind``. Only ``idempotent`` kinds are
+    re-queued when their worker dies; the others are failed instead, since
+    running them again would repeat whatever they already did upstream."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        if idempotent:
+            IDEMPOTENT.add(kind)
+        return func
+    return decorator
+
+
+def requested_priority(value, default):
+    """A ``priority`` taken from a request, clamped to MIN_PRIORITY..MAX_PRIORITY;
+    ``default`` when it is absent. Raises ValueError if it is not a whole number."""
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError("priority must be an integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError("priority must be an integer") from None
+    return max(MIN_PRIORITY, min(value, MAX_PRIORITY))
+
+
+def enqueue(kind, payload, priority=0, serial_key=""):
+    return Job.objects.create(kind=kind, payload=payload, priority=priority, serial_key=serial_key or "")
+
+
+def describe(job):
+    return {
+        "job_id": job.pk,
+        "kind": job.kind,
+        "status": job.status,
+        "priority": job.priority,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim_next(worker):
+    """Mark the next runnable job as running for ``worker`` and return it.
+
+    Jobs run by descending priority, oldest first, skipping any whose
+    ``serial_key`` already has a running job. The claim is a conditional
+    UPDATE, so two workers racing for one job cannot both get it. A job with
+    a ``serial_key`` is claimed while holding row locks on every queued or
+    running job sharing that key: a second worker after the same key waits
+    for the first to commit and then sees its job running.
+    """
+    busy = Job.objects.filter(status=Job.RUNNING).exclude(serial_key="").values("serial_key")
+    runnable = Job.objects.filter(status=Job.QUEUED).exclude(serial_key__in=busy)
+    for job_id, serial_key in runnable.order_by("-priority", "id").values_list("id", "serial_key")[:20]:
+        with transaction.atomic():
+            if serial_key:
+                statuses = Job.objects.select_for_update().filter(
+                    serial_key=serial_key, status__in=[Job.QUEUED, Job.RUNNING]
+                ).order_by("id").values_list("status", flat=True)
+                if Job.RUNNING in list(statuses):
+                    continue
+            claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).exclude(serial_key__in=busy).update(
+                status=Job.RUNNING, worker=worker, started_at=timezone.now(), attempts=F("attempts") + 1,
+            )
+        if claimed:
+            return Job.objects.get(pk=job_id)
+    return None
+
+
+def run(job):
+    from . import tasks  # noqa: F401  registers the handlers on first use
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise JobFailed(f"Unknown job kind: {job.kind}")
+        job.result = handler(job.payload)
+        job.status = Job.SUCCEEDED
+    except JobFailed as e:
+        job.result, job.error, job.status = e.result, str(e), Job.FAILED
+    except Exception as e:
+        logger.exception("🔥 Job %s failed", job.pk)
+        job.error, job.status = str(e), Job.FAILED
+    job.finished_at = timezone.now()
+    job.save(update_fields=["result", "error", "status", "finished_at"])
+    return job
+
+
+def requeue_stale(stale_after=None):
+    """Re-queue idempotent jobs whose worker has not reported back within
+    ``stale_after`` seconds and fail the rest. Returns how many were re-queued."""
+    from . import tasks  # noqa: F401  registers the handlers on first use
+    stale_after = stale_after or getattr(settings, "JOB_STALE_AFTER", DEFAULT_STALE_AFTER)
+    cutoff = timezone.now() - timedelta(seconds=stale_after)
+    stale = Job.objects.filter(status=Job.RUNNING, started_at__lt=cutoff)
+    stale.exclude(kind__in=IDEMPOTENT).update(
+        status=Job.FAILED, finished_at=timezone.now(),
+        error="Worker stopped while the job was running; not retried, as it may have partly completed upstream",
+    )
+    return stale.filter(kind__in=IDEMPOTENT).update(status=Job.QUEUED, worker="")
+
+
+def work(worker=None, once=False, poll_interval=DEFAULT_POLL_INTERVAL, should_stop=lambda: False):
+    """Run jobs until ``should_stop()``; with ``once``, return when the queue
+    has nothing runnable. Returns the number of jobs run."""
+    worker = worker or worker_name()
+    ran = 0
+    while not should_stop():
+        close_old_connections()
+        job = claim_next(worker)
+        if job is None:
+            if once:
+                break
+            requeue_stale()
+            time.sleep(poll_interval)
+            continue
+        logger.info("⚙️ %s running %s", worker, job)
+        run(job)
+        ran += 1
+    close_old_connections()
+    return ran
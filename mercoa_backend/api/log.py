@@ -0,0 +1,171 @@
+"""Non-blocking structured logging.
+
+Records go onto a bounded in-memory queue and are formatted and written by a
+background thread, so a request never waits on stderr. Anything passed in
+``extra`` becomes a field of the record; a ``payload`` field is clipped (a
+few keys and items per level, long strings cut) before it is queued, so
+logging a large invoice list costs the same as logging a small one::
+
+    logger.debug("📄 Invoices", extra={"entity_id": entity_id, "payload": invoices})
+
+Configured through ``LOGGING`` in settings; see ``LOG_LEVEL``, ``LOG_LEVELS``
+and ``LOG_FORMAT`` there.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+from django.conf import settings
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "fields"}
+
+DEFAULT_PAYLOAD_MAX_CHARS = 2000
+DEFAULT_PAYLOAD_MAX_ITEMS = 5
+MAX_DEPTH = 3
+
+
+def _clip_str(value, max_chars):
+    return value if len(value) <= max_chars else f"{value[:max_chars]}…(+{len(value) - max_chars} chars)"
+
+
+def clip(value, max_items=DEFAULT_PAYLOAD_MAX_ITEMS, max_chars=DEFAULT_PAYLOAD_MAX_CHARS, depth=0):
+    """Copy of ``value`` small enough to log: at most ``max_items`` keys or
+    items per container, ``MAX_DEPTH`` levels deep, strings cut at
+    ``max_chars``. Work done is bounded by those limits, not by the size of
+    ``value``."""
+    if isinstance(value, str):
+        return _clip_str(value, max_chars)
+    if isinstance(value, bytes):
+        return _clip_str(value.decode("utf-8", "replace") if len(value) <= max_chars else
+                         value[:max_chars].decode("utf-8", "replace"), max_chars)
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if depth >= MAX_DEPTH:
+        return f"<{type(value).__name__}>"
+    if isinstance(value, dict):
+        clipped = {}
+        for i, (key, item) in enumerate(value.items()):
+            if i == max_items:
+                clipped["…"] = f"+{len(value) - max_items} keys"
+                break
+            clipped[str(key)] = clip(item, max_items, max_chars, depth + 1)
+        return clipped
+    if isinstance(value, (list, tuple)):
+        clipped = [clip(item, max_items, max_chars, depth + 1) for item in value[:max_items]]
+        if len(value) > max_items:
+            clipped.append(f"…(+{len(value) - max_items} items)")
+        return clipped
+    return _clip_str(repr(value), max_chars)
+
+
+def payload_size(value):
+    return len(value) if isinstance(value, (str, bytes, list, tuple, dict)) else None
+
+
+class StructuredFormatter(logging.Formatter):
+    """One JSON object per line (``json=True``) or ``LEVEL logger message
+    key=value ...`` for reading in a terminal."""
+
+    def __init__(self, json=False, **kwargs):
+        super().__init__(**kwargs)
+        self.json = json
+
+    def format(self, record):
+        fields = getattr(record, "fields", None)
+        if fields is None:
+            fields = {key: value for key, value in vars(record).items() if key not in RESERVED}
+        message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if self.json:
+            entry = {
+                "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+                "level": record.levelname,
+                "logger": record.name,
+                "message": message,
+                **fields,
+            }
+            if record.exc_text:
+                entry["exc"] = record.exc_text
+            return json.dumps(entry, default=str, ensure_ascii=False)
+        line = f"{record.levelname:<7} {record.name} {message}"
+        if fields:
+            line += " " + " ".join(f"{key}={json.dumps(value, default=str, ensure_ascii=False)}" for key, value in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+class NonBlockingHandler(QueueHandler):
+    """Queues records for a background thread that formats and writes them
+    to ``stream`` (stderr by default). When the queue is full, records are
+    dropped and counted instead of blocking the caller."""
+
+    def __init__(self, json=False, queue_size=None, stream=None):
+        super().__init__(queue.Queue(queue_size or getattr(settings, "LOG_QUEUE_SIZE", 10000)))
+        self.target = logging.StreamHandler(stream or sys.stderr)
+        self.target.setFormatter(StructuredFormatter(json=json))
+        self.dropped = 0
+        self.listener = None
+        self.start()
+        atexit.register(self.stop)
+        if hasattr(os, "register_at_fork"):
+            # run_jobs --workers forks; the listener thread does not survive it
+            os.register_at_fork(after_in_child=self._restart_in_child)
+
+    def start(self):
+        self.listener = QueueListener(self.queue, self.target, respect_handler_level=False)
+        self.listener.start()
+
+    def stop(self):
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+    def _restart_in_child(self):
+        self.queue = queue.Queue(self.queue.maxsize)
+        self.listener = None
+        self.start()
+
+    def prepare(self, record):
+        # Runs on the caller's thread: keep it bounded. The message and a
+        # clipped copy of the extra fields are captured now, since the objects
+        # they refer to may change before the listener gets to the record.
+        fields = {}
+        for key, value in vars(record).items():
+            if key in RESERVED:
+                continue
+            if key == "payload":
+                fields["payload_size"] = payload_size(value)
+                if random.random() < getattr(settings, "LOG_PAYLOAD_SAMPLE_RATE", 1.0):
+                    fields["payload"] = clip(
+                        value,
+                        getattr(settings, "LOG_PAYLOAD_MAX_ITEMS", DEFAULT_PAYLOAD_MAX_ITEMS),
+                        getattr(settings, "LOG_PAYLOAD_MAX_CHARS", DEFAULT_PAYLOAD_MAX_CHARS),
+                    )
+            else:
+                fields[key] = clip(value)
+
+        prepared = logging.makeLogRecord({
+            key: value for key, value in vars(record).items() if key in RESERVED
+        })
+        prepared.msg = _clip_str(record.getMessage(), getattr(settings, "LOG_PAYLOAD_MAX_CHARS", DEFAULT_PAYLOAD_MAX_CHARS))
+        prepared.args = None
+        prepared.fields = fields
+        if record.exc_info:
+            prepared.exc_text = self.target.formatter.formatException(record.exc_info)
+            prepared.exc_info = None
+        return prepared
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
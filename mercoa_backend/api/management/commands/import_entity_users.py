@@ -0,0 +1,31 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.user_import import RESULT_FIELDS, import_users
+
+
+class Command(BaseCommand):
+    help = "Create or update an entity's Mercoa users from a CSV of email, name and roles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("entity_id")
+        parser.add_argument("csv_file")
+        parser.add_argument("--results", default="user-import-results.csv", help="Where to write one result per row")
+        parser.add_argument("--concurrency", type=int, default=None, help="Defaults to MERCOA_BULK_CONCURRENCY")
+
+    def handle(self, *args, **options):
+        counts = {}
+        try:
+            with open(options["csv_file"], newline="", encoding="utf-8-sig") as src, \
+                    open(options["results"], "w", newline="") as out:
+                writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+                writer.writeheader()
+                for result in import_users(options["entity_id"], src, options["concurrency"]):
+                    writer.writerow(result)
+                    counts[result["status"]] = counts.get(result["status"], 0) + 1
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items())) or "no rows"
+        self.stdout.write(f"Imported users for {options['entity_id']}: {summary}. Results in {options['results']}")
@@ -0,0 +1,46 @@
+import json
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from api.webhooks import replay
+
+
+class HttpPoster:
+    # Minimal stand-in for the Django test client's post() against a live server
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def post(self, path, data, content_type, headers):
+        return self.session.post(
+            f"{self.base_url}{path}", data=data, headers={"Content-Type": content_type, **headers}, timeout=30
+        )
+
+
+def load_events(path):
+    with open(path) as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+class Command(BaseCommand):
+    help = "Sign and replay recorded Mercoa webhook events (JSON array or JSONL) against a running server."
+
+    def add_arguments(self, parser):
+        parser.add_argument("events_file")
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--path", default="/api/webhooks/mercoa/")
+        parser.add_argument("--secret", default=None, help="Defaults to MERCOA_WEBHOOK_SECRET")
+
+    def handle(self, *args, **options):
+        try:
+            events = load_events(options["events_file"])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read events: {e}")
+
+        responses = replay(events, HttpPoster(options["base_url"]), options["path"], options["secret"])
+        for event, res in zip(events, responses):
+            self.stdout.write(f"{res.status_code} {event.get('eventType')} {res.text}")
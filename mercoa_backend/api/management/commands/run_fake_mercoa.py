@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.fake_mercoa import FakeMercoa
+
+
+class Command(BaseCommand):
+    help = "Serve a local stand-in for the Mercoa API (point MERCOA_API_BASE at it)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=9000)
+        parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+        parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, up to this many seconds")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="Share of calls answered with 503")
+        parser.add_argument("--invoices", type=int, default=250, help="Invoices generated per entity")
+        parser.add_argument("--vendors", type=int, default=20, help="Vendors generated per entity")
+        parser.add_argument("--users", type=int, default=5, help="Users generated per entity")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        fake = FakeMercoa(
+            latency=options["latency"], jitter=options["jitter"], error_rate=options["error_rate"],
+            invoices_per_entity=options["invoices"], vendors_per_entity=options["vendors"],
+            users_per_entity=options["users"], seed=options["seed"],
+        )
+        url = fake.start(options["host"], options["port"])
+        self.stdout.write(f"Fake Mercoa API on {url} (MERCOA_API_BASE={url}); Ctrl-C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            fake.stop()
@@ -0,0 +1,45 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (entity onboarding, bulk invoice and user imports)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes to start")
+        parser.add_argument("--once", action="store_true", help="Exit when nothing is left to run")
+        parser.add_argument("--poll-interval", type=float, default=jobs.DEFAULT_POLL_INTERVAL)
+
+    def handle(self, *args, **options):
+        requeued = jobs.requeue_stale()
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} stale job(s)")
+
+        if options["workers"] <= 1:
+            ran = self.work(options)
+            self.stdout.write(f"Ran {ran} job(s)")
+            return
+
+        # Children must not share the parent's database connection.
+        connections.close_all()
+        ctx = multiprocessing.get_context("fork")
+        workers = [ctx.Process(target=self.work, args=(options,)) for _ in range(options["workers"])]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"Started {len(workers)} job workers")
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
+
+    def work(self, options):
+        stopping = []
+        signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+        return jobs.work(once=options["once"], poll_interval=options["poll_interval"], should_stop=lambda: bool(stopping))
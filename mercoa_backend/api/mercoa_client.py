@@ -0,0 +1,288 @@
+import asyncio
+import os
+import threading
+import time
+import weakref
+
+import requests
+from asgiref.sync import sync_to_async
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+
+from .metrics import observe_upstream
+from .rate_limit import get_rate_limiter
+from .resilience import RETRYABLE_STATUS, backoff, breakers, retries_for
+
+try:
+    import httpx
+except ImportError:  # only needed by the async views served under ASGI
+    httpx = None
+
+MERCOA_API_BASE = os.getenv("MERCOA_API_BASE", "https://api.mercoa.com")
+MERCOA_PAGE_SIZE = 100  # largest page Mercoa's list routes accept
+
+# (connect, read) timeouts in seconds, per kind of upstream operation.
+# Override any of them with settings.MERCOA_TIMEOUTS.
+DEFAULT_TIMEOUTS = {
+    "read": (3.05, 30),
+    "write": (3.05, 30),
+    "token": (3.05, 10),
+    "bulk": (3.05, 60),
+}
+
+
+class MercoaClient:
+    """Keep-alive connection pool shared by every view that talks to Mercoa.
+
+    Routes are passed as templates (``"/entity/{entity_id}/invoices"``) and
+    formatted with the keyword arguments, so the template stays available for
+    anything that wants to group calls per upstream route.
+    """
+
+    def __init__(self, api_key=None, base_url=None, pool_size=None, timeouts=None):
+        self.api_key = api_key if api_key is not None else os.getenv("MERCOA_API_KEY")
+        self.base_url = (base_url or getattr(settings, "MERCOA_API_BASE", MERCOA_API_BASE)).rstrip("/")
+        self.pool_size = pool_size or getattr(settings, "MERCOA_POOL_SIZE", 20)
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or getattr(settings, "MERCOA_TIMEOUTS", {}))}
+
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def url(self, route, **path_params):
+        return f"{self.base_url}{route.format(**path_params)}"
+
+    def request(self, method, route, op=None, params=None, json=None, **path_params):
+        if op is None:
+            op = "read" if method in ("GET", "HEAD") else "write"
+        limiter = get_rate_limiter()
+        breaker = breakers.get(route)
+        retries = retries_for(method)
+        throttled = failed = 0
+        resend = False
+        while True:
+            # A 429 re-send is the same attempt: it keeps the half-open trial slot it already holds
+            if not resend:
+                breaker.allow()
+            resend = False
+            limiter.acquire(op)
+            start = time.perf_counter()
+            try:
+                res = self.session.request(
+                    method,
+                    self.url(route, **path_params),
+                    params=params,
+                    json=json,
+                    timeout=self.timeouts.get(op, self.timeouts["read"]),
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                observe_upstream(method, route, time.perf_counter() - start, error=e)
+                breaker.failure()
+                if failed >= retries:
+                    raise
+                failed += 1
+                time.sleep(backoff(failed))
+                continue
+            observe_upstream(method, route, time.perf_counter() - start, res.status_code, len(res.content))
+
+            if res.status_code == 429:
+                if throttled < limiter.retries:
+                    # Mercoa did not process the call; wait out Retry-After and send it again
+                    throttled += 1
+                    limiter.throttle(op, res.headers.get("Retry-After"))
+                    resend = True
+                    continue
+                breaker.release()
+            elif res.status_code in RETRYABLE_STATUS:
+                breaker.failure()
+                if failed < retries:
+                    failed += 1
+                    time.sleep(backoff(failed))
+                    continue
+            else:
+                breaker.success()
+            return res
+
+    def get(self, route, **kwargs):
+        return self.request("GET", route, **kwargs)
+
+    def post(self, route, **kwargs):
+        return self.request("POST", route, **kwargs)
+
+    def delete(self, route, **kwargs):
+        return self.request("DELETE", route, **kwargs)
+
+    def paginate(self, route, params=None, page_size=MERCOA_PAGE_SIZE, **path_params):
+        """Yield every item of a Mercoa list route, one page at a time, by
+        following ``hasMore``/``startingAfter`` until the last page."""
+        params = {**(params or {}), "limit": page_size}
+        while True:
+            res = self.get(route, params=params, **path_params)
+            res.raise_for_status()
+            page = res.json()
+            items = page.get("data", [])
+            yield from items
+            if not page.get("hasMore") or not items:
+                return
+            params["startingAfter"] = items[-1]["id"]
+
+    def pool_stats(self):
+        pools = []
+        for key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            pools.append({
+                "host": f"{pool.scheme}://{pool.host}:{pool.port}",
+                "maxsize": pool.pool.maxsize if pool.pool else self.pool_size,
+                "idle": pool.pool.qsize() if pool.pool else 0,
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests,
+            })
+        return {
+            "pool_size": self.pool_size,
+            "timeouts": self.timeouts,
+            "pools": pools,
+            "rate_limits": get_rate_limiter().stats(),
+        }
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MercoaClient()
+    return _client
+
+
+class AsyncMercoaClient:
+    """Non-blocking counterpart of MercoaClient for the ``async def`` views.
+
+    httpx connection pools are tied to the event loop that created them, so
+    use ``get_async_client()`` rather than sharing one instance across loops.
+    """
+
+    def __init__(self, api_key=None, base_url=None, pool_size=None, timeouts=None):
+        if httpx is None:
+            raise ImportError("httpx is required for the async Mercoa client (pip install httpx)")
+
+        self.api_key = api_key if api_key is not None else os.getenv("MERCOA_API_KEY")
+        self.base_url = (base_url or getattr(settings, "MERCOA_API_BASE", MERCOA_API_BASE)).rstrip("/")
+        self.pool_size = pool_size or getattr(settings, "MERCOA_ASYNC_POOL_SIZE", 200)
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or getattr(settings, "MERCOA_TIMEOUTS", {}))}
+
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        self.client = httpx.AsyncClient(
+            headers=self.headers,
+            limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+        )
+
+    def url(self, route, **path_params):
+        return f"{self.base_url}{route.format(**path_params)}"
+
+    def _timeout(self, op):
+        connect, read = self.timeouts.get(op, self.timeouts["read"])
+        return httpx.Timeout(read, connect=connect)
+
+    async def request(self, method, route, op=None, params=None, json=None, **path_params):
+        if op is None:
+            op = "read" if method in ("GET", "HEAD") else "write"
+        limiter = get_rate_limiter()
+        breaker = breakers.get(route)
+        retries = retries_for(method)
+        throttled = failed = 0
+        resend = False
+        while True:
+            # A 429 re-send is the same attempt: it keeps the half-open trial slot it already holds
+            if not resend:
+                breaker.allow()
+            resend = False
+            wait = await sync_to_async(limiter.reserve, thread_sensitive=False)(op)
+            if wait:
+                await asyncio.sleep(wait)
+            start = time.perf_counter()
+            try:
+                res = await self.client.request(
+                    method,
+                    self.url(route, **path_params),
+                    params=params,
+                    json=json,
+                    timeout=self._timeout(op),
+                )
+            except httpx.TransportError as e:
+                observe_upstream(method, route, time.perf_counter() - start, error=e)
+                breaker.failure()
+                if failed >= retries:
+                    raise
+                failed += 1
+                await asyncio.sleep(backoff(failed))
+                continue
+            observe_upstream(method, route, time.perf_counter() - start, res.status_code, len(res.content))
+
+            if res.status_code == 429:
+                if throttled < limiter.retries:
+                    throttled += 1
+                    await sync_to_async(limiter.throttle, thread_sensitive=False)(op, res.headers.get("Retry-After"))
+                    resend = True
+                    continue
+                breaker.release()
+            elif res.status_code in RETRYABLE_STATUS:
+                breaker.failure()
+                if failed < retries:
+                    failed += 1
+                    await asyncio.sleep(backoff(failed))
+                    continue
+            else:
+                breaker.success()
+            return res
+
+    async def get(self, route, **kwargs):
+        return await self.request("GET", route, **kwargs)
+
+    async def post(self, route, **kwargs):
+        return await self.request("POST", route, **kwargs)
+
+    async def delete(self, route, **kwargs):
+        return await self.request("DELETE", route, **kwargs)
+
+    async def paginate(self, route, params=None, page_size=MERCOA_PAGE_SIZE, **path_params):
+        params = {**(params or {}), "limit": page_size}
+        while True:
+            res = await self.get(route, params=params, **path_params)
+            res.raise_for_status()
+            page = res.json()
+            items = page.get("data", [])
+            for item in items:
+                yield item
+            if not page.get("hasMore") or not items:
+                return
+            params["startingAfter"] = items[-1]["id"]
+
+    async def aclose(self):
+        await self.client.aclose()
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = AsyncMercoaClient()
+    return client
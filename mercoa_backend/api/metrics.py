@@ -0,0 +1,207 @@
+import contextvars
+import threading
+import time
+from collections import defaultdict
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Upper bounds in seconds; the +Inf bucket is implicit.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.values = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self.lock:
+            self.values[labels] += amount
+
+    def samples(self):
+        with self.lock:
+            values = dict(self.values)
+        for labels, value in sorted(values.items()):
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=None):
+        self.name, self.help, self.label_names = name, help, tuple(labels)
+        self.buckets = tuple(buckets or getattr(settings, "METRICS_BUCKETS", DEFAULT_BUCKETS))
+        self.values = {}  # labels -> [count per bucket..., +Inf count, sum]
+        self.lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        with self.lock:
+            row = self.values.get(labels)
+            if row is None:
+                row = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+            row[-2] += 1
+            row[-1] += value
+
+    def samples(self):
+        with self.lock:
+            values = {labels: list(row) for labels, row in self.values.items()}
+        for labels, row in sorted(values.items()):
+            for bound, count in zip(self.buckets + ("+Inf",), row):
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {row[-1]!r}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {row[-2]}"
+
+
+class Registry:
+    """In-process metrics, rendered in the Prometheus text format.
+
+    Every worker process keeps its own numbers; scrape each one (or add a
+    ``process`` label in the scrape config) rather than expecting totals.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_duration = registry.add(Histogram(
+    "http_request_duration_seconds", "Time spent handling a request, per route.", ["method", "route"]))
+http_responses = registry.add(Counter(
+    "http_responses_total", "Responses sent, per route and status code.", ["method", "route", "status"]))
+http_db_time = registry.add(Histogram(
+    "http_request_db_seconds", "Time a request spent in database queries, per route.", ["method", "route"]))
+http_db_queries = registry.add(Counter(
+    "http_request_db_queries_total", "Database queries run, per route.", ["method", "route"]))
+http_upstream_time = registry.add(Histogram(
+    "http_request_mercoa_seconds", "Time a request spent waiting on Mercoa, per route.", ["method", "route"]))
+
+upstream_duration = registry.add(Histogram(
+    "mercoa_request_duration_seconds", "Latency of calls to Mercoa, per upstream route template.", ["method", "route"]))
+upstream_responses = registry.add(Counter(
+    "mercoa_responses_total", "Mercoa responses, per upstream route and status code.", ["method", "route", "status"]))
+upstream_bytes = registry.add(Counter(
+    "mercoa_response_bytes_total", "Response body bytes received from Mercoa.", ["method", "route"]))
+upstream_errors = registry.add(Counter(
+    "mercoa_errors_total", "Mercoa calls that failed or returned 5xx, per kind of error.", ["method", "route", "error"]))
+
+# Time the current request spent in the database and in Mercoa calls
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def observe_upstream(method, route, seconds, status=None, nbytes=0, error=None):
+    """Record one HTTP call to Mercoa; ``route`` is the unformatted template."""
+    upstream_duration.observe(method, route, value=seconds)
+    if status is not None:
+        upstream_responses.inc(method, route, str(status))
+        upstream_bytes.inc(method, route, amount=nbytes)
+        if status >= 500:
+            upstream_errors.inc(method, route, f"http_{status}")
+    if error is not None:
+        upstream_errors.inc(method, route, type(error).__name__)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings["upstream"] += seconds
+
+
+def record_query(execute, sql, params, many, context):
+    """Connection execute wrapper timing every query of the current request."""
+    timings = _request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings["db"] += time.perf_counter() - start
+        timings["queries"] += 1
+
+
+def instrument_connection(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class MetricsMiddleware:
+    """Times every request and splits it into database and Mercoa time, per
+    URL route (``api/jobs/<int:job_id>/``, not the concrete path)."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token, start = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        self._finish(request, response, timings, start)
+        return response
+
+    async def __acall__(self, request):
+        timings, token, start = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        self._finish(request, response, timings, start)
+        return response
+
+    @staticmethod
+    def _start():
+        timings = {"db": 0.0, "queries": 0, "upstream": 0.0}
+        return timings, _request_timings.set(timings), time.perf_counter()
+
+    @staticmethod
+    def _finish(request, response, timings, start):
+        elapsed = time.perf_counter() - start
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match is not None else "unmatched"
+        method = request.method
+        http_duration.observe(method, route, value=elapsed)
+        http_responses.inc(method, route, str(response.status_code))
+        http_db_time.observe(method, route, value=timings["db"])
+        http_db_queries.inc(method, route, amount=timings["queries"])
+        http_upstream_time.observe(method, route, value=timings["upstream"])
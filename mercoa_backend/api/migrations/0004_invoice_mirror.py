@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_profile_mercoa_user_id_alter_profile_entity_logo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceSyncState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_id', models.CharField(max_length=100, unique=True)),
+                ('last_synced_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MercoaInvoice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('invoice_id', models.CharField(max_length=100, unique=True)),
+                ('entity_id', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=50)),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, max_digits=18, null=True)),
+                ('currency', models.CharField(default='USD', max_length=10)),
+                ('vendor_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('invoice_number', models.CharField(blank=True, max_length=255, null=True)),
+                ('updated_at', models.DateTimeField(blank=True, null=True)),
+                ('data', models.JSONField()),
+                ('synced_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['entity_id', 'status', 'due_date'], name='invoice_entity_status_due')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_invoice_mirror'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AgingState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_id', models.CharField(max_length=100, unique=True)),
+                ('as_of', models.DateField()),
+                ('boundaries', models.JSONField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AgingAggregate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity_id', models.CharField(max_length=100)),
+                ('status', models.CharField(max_length=50)),
+                ('bucket', models.PositiveSmallIntegerField()),
+                ('currency', models.CharField(max_length=10)),
+                ('count', models.IntegerField(default=0)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('entity_id', 'status', 'bucket', 'currency'), name='aging_aggregate_key')],
+            },
+        ),
+    ]
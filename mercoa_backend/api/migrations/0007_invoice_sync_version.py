@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoicesyncstate',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+        migrations.AddField(
+            model_name='invoicesyncstate',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_invoice_sync_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='profile',
+            name='entity_logo',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
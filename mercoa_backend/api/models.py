@@ -5,8 +5,92 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     entity_id = models.CharField(max_length=100, null=True, blank=True)
     entity_name = models.CharField(max_length=255, null=True, blank=True)
-    entity_logo = models.URLField(null=True, blank=True)
+    entity_logo = models.TextField(null=True, blank=True)  # data: URI, at most ENTITY_LOGO_MAX_SIZE decoded
     mercoa_user_id = models.CharField(max_length=100, null=True, blank=True)  # New field
 
     def __str__(self):
         return f"{self.user.username}'s Profile"
+
+
+class MercoaInvoice(models.Model):
+    # Local mirror of a Mercoa invoice, as listed under /entity/{entity_id}/invoices
+    invoice_id = models.CharField(max_length=100, unique=True)
+    entity_id = models.CharField(max_length=100)
+    status = models.CharField(max_length=50)
+    due_date = models.DateTimeField(null=True, blank=True)
+    amount = models.DecimalField(max_digits=18, decimal_places=2, null=True, blank=True)
+    currency = models.CharField(max_length=10, default="USD")
+    vendor_id = models.CharField(max_length=100, null=True, blank=True)
+    invoice_number = models.CharField(max_length=255, null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)  # Mercoa's updatedAt
+    data = models.JSONField()  # Full invoice object as returned by Mercoa
+    synced_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["entity_id", "status", "due_date"], name="invoice_entity_status_due"),
+        ]
+
+    def __str__(self):
+        return f"{self.invoice_id} ({self.status})"
+
+
+class InvoiceSyncState(models.Model):
+    entity_id = models.CharField(max_length=100, unique=True)
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    version = models.PositiveIntegerField(default=0)  # bumped whenever the mirrored invoices change; feeds ETags
+    content_hash = models.CharField(max_length=32, blank=True, default="")  # digest of the last full sync
+
+    def __str__(self):
+        return f"{self.entity_id} synced at {self.last_synced_at}"
+
+
+class AgingAggregate(models.Model):
+    # Running AP aging totals per entity, kept up to date by api/aging.py
+    entity_id = models.CharField(max_length=100)
+    status = models.CharField(max_length=50)
+    bucket = models.PositiveSmallIntegerField()  # index into the configured bucket boundaries
+    currency = models.CharField(max_length=10)
+    count = models.IntegerField(default=0)
+    total = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["entity_id", "status", "bucket", "currency"], name="aging_aggregate_key"),
+        ]
+
+
+class AgingState(models.Model):
+    entity_id = models.CharField(max_length=100, unique=True)
+    as_of = models.DateField()  # day the aggregates were last aged to
+    boundaries = models.JSONField()
+
+
+class Job(models.Model):
+    # Slow Mercoa work queued for the run_jobs workers (see api/jobs.py)
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUS_CHOICES = [(s, s) for s in (QUEUED, RUNNING, SUCCEEDED, FAILED)]
+
+    kind = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    priority = models.IntegerField(default=0)  # higher runs first
+    serial_key = models.CharField(max_length=255, blank=True, default="")  # jobs sharing a key run one at a time
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    attempts = models.PositiveIntegerField(default=0)
+    worker = models.CharField(max_length=255, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "-priority", "id"], name="job_queue"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
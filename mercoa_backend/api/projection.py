@@ -0,0 +1,69 @@
+import re
+
+from .fast_json import dumps, list_page, loads
+
+# Named field sets for the invoice-returning endpoints (``"view": ...``).
+# Dotted paths keep their nesting: "vendor.name" -> {"vendor": {"name": ...}}.
+PRESETS = {
+    # InvoicesPage grid
+    "grid": ["id", "invoiceNumber", "status", "amount", "currency", "dueDate", "vendorId", "vendor.name"],
+    # AgingReportPage bucket drill-down
+    "aging": ["id", "status", "amount", "currency", "dueDate", "vendor.name"],
+    # CSV / spreadsheet exports
+    "export": [
+        "id", "invoiceNumber", "status", "amount", "currency", "invoiceDate", "dueDate",
+        "vendorId", "vendor.name", "payerId", "memo", "createdAt", "updatedAt",
+    ],
+}
+PRESETS["compact"] = PRESETS["grid"]
+
+FIELD_PATTERN = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+MAX_FIELDS = 50
+
+
+def resolve_fields(fields=None, view=None):
+    """Field paths requested through ``fields`` (a list or a comma-separated
+    string; takes precedence) or a preset ``view``. None means the full
+    object. Raises ValueError for an unknown view or a malformed path."""
+    if fields:
+        if isinstance(fields, str):
+            fields = fields.split(",")
+        fields = [f.strip() for f in fields if f and f.strip()]
+        if len(fields) > MAX_FIELDS:
+            raise ValueError(f"At most {MAX_FIELDS} fields can be requested")
+        bad = [f for f in fields if not FIELD_PATTERN.match(f)]
+        if bad:
+            raise ValueError(f"Invalid field: {bad[0]}")
+        return fields or None
+    if view in (None, "", "full"):
+        return None
+    if view not in PRESETS:
+        raise ValueError(f"Unknown view: {view} (expected one of {', '.join(['full', *PRESETS])})")
+    return PRESETS[view]
+
+
+def project(obj, fields):
+    """Copy of ``obj`` with only ``fields``; absent ones come back as None
+    so every item has the same shape."""
+    if fields is None:
+        return obj
+    out = {}
+    for path in fields:
+        *parents, leaf = path.split(".")
+        # "vendor" already brings the whole vendor along with "vendor.name"
+        if any(".".join(parents[:i]) in fields for i in range(1, len(parents) + 1)):
+            continue
+        src, dst = obj, out
+        for key in parents:
+            src = src.get(key) if isinstance(src, dict) else None
+            dst = dst.setdefault(key, {})
+        dst[leaf] = src.get(leaf) if isinstance(src, dict) else None
+    return out
+
+
+def invoice_page(rows, fields):
+    """List page of mirrored invoices given as stored JSON text: passed
+    through as is for the full view, otherwise decoded and projected."""
+    if fields is None:
+        return list_page(rows)
+    return list_page(dumps(project(loads(row), fields)) for row in rows)
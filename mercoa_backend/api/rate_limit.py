@@ -0,0 +1,161 @@
+import threading
+import time
+from collections import Counter
+from email.utils import parsedate_to_datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .resilience import UpstreamUnavailable
+
+# (requests per second, burst) per kind of upstream operation - the same
+# "op" names the client uses for timeouts. Override with settings.MERCOA_RATE_LIMITS.
+DEFAULT_LIMITS = {
+    "read": (20, 40),
+    "write": (10, 20),
+    "token": (5, 10),
+    "bulk": (5, 10),
+}
+DEFAULT_MAX_WAIT = 30  # seconds a caller may be queued before giving up
+DEFAULT_RETRIES = 3  # times a 429 is waited out and the call re-sent
+MIN_FACTOR = 0.1  # a 429 halves the rate, down to this share of the budget
+RECOVERY_PER_SECOND = 0.02  # share of the budget won back per second without a 429
+LOCK_TIMEOUT = 1
+
+
+class RateLimitExceeded(UpstreamUnavailable):
+    pass
+
+
+def retry_after_seconds(value, default=1.0):
+    """Parse a Retry-After header: delay in seconds or an HTTP date."""
+    if not value:
+        return default
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class RateLimiter:
+    """Token bucket per operation class, kept in the shared Django cache so
+    every worker process draws from the same budget (use Redis for that; the
+    local-memory cache limits each process on its own).
+
+    The bucket is stored as the time the next request may go out (GCRA).
+    Every caller reserves its slot up front and sleeps until then, so callers
+    queue in arrival order instead of failing. A 429 pushes the next slot back
+    by ``Retry-After`` and halves the rate, which then recovers over time.
+    """
+
+    def __init__(self, limits=None, max_wait=None, retries=None):
+        configured = limits if limits is not None else getattr(settings, "MERCOA_RATE_LIMITS", DEFAULT_LIMITS)
+        self.limits = dict(configured or {})
+        self.max_wait = max_wait if max_wait is not None else getattr(settings, "MERCOA_RATE_LIMIT_MAX_WAIT", DEFAULT_MAX_WAIT)
+        self.retries = retries if retries is not None else getattr(settings, "MERCOA_RATE_LIMIT_RETRIES", DEFAULT_RETRIES)
+        self.lock = threading.Lock()
+        self.waits = Counter()
+        self.waited_seconds = Counter()
+        self.throttled = Counter()
+
+    def _limit(self, op):
+        return self.limits.get(op) or self.limits.get("write")
+
+    @staticmethod
+    def _keys(op):
+        return tuple(f"ratelimit:{op}:{name}" for name in ("next", "blocked", "factor", "lock"))
+
+    def _locked(self, lock_key):
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while not cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+            if time.monotonic() > deadline:
+                return False  # holder died; go ahead rather than stall everyone
+            time.sleep(0.001)
+        return True
+
+    def _factor(self, factor_key, now):
+        factor, since = cache.get(factor_key, (1.0, now))
+        return min(1.0, factor + RECOVERY_PER_SECOND * (now - since))
+
+    def reserve(self, op):
+        """Reserve the next slot for ``op`` and return how long to wait for it."""
+        limit = self._limit(op)
+        if not limit:
+            return 0.0
+        rate, burst = limit
+        next_key, blocked_key, factor_key, lock_key = self._keys(op)
+
+        with self.lock:
+            locked = self._locked(lock_key)
+            try:
+                now = time.time()
+                interval = 1.0 / (rate * self._factor(factor_key, now))
+                tolerance = interval * max(burst - 1, 0)
+                start = max(cache.get(blocked_key, now), now)  # nothing goes out before Retry-After
+                next_at = max(cache.get(next_key, now), start)
+                wait = max(next_at - tolerance - now, start - now)
+                if wait > self.max_wait:
+                    raise RateLimitExceeded(f"Mercoa {op} budget exhausted; next slot in {wait:.1f}s", retry_after=wait)
+                cache.set(next_key, next_at + interval, timeout=int(tolerance + wait + interval) + 60)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+
+        if wait:
+            self.waits[op] += 1
+            self.waited_seconds[op] += wait
+        return wait
+
+    def acquire(self, op):
+        wait = self.reserve(op)
+        if wait:
+            time.sleep(wait)
+
+    def throttle(self, op, retry_after=None):
+        """Record a 429 for ``op``: hold every caller back for ``Retry-After``
+        seconds and halve the rate."""
+        if not self._limit(op):
+            return
+        _, blocked_key, factor_key, lock_key = self._keys(op)
+        delay = retry_after_seconds(retry_after)
+        with self.lock:
+            locked = self._locked(lock_key)
+            try:
+                now = time.time()
+                cache.set(factor_key, (max(self._factor(factor_key, now) / 2, MIN_FACTOR), now), timeout=3600)
+                cache.set(blocked_key, max(cache.get(blocked_key, now), now + delay), timeout=int(delay) + 60)
+            finally:
+                if locked:
+                    cache.delete(lock_key)
+        self.throttled[op] += 1
+
+    def stats(self):
+        now = time.time()
+        return {
+            op: {
+                "rate": rate,
+                "burst": burst,
+                "factor": round(self._factor(self._keys(op)[2], now), 3),
+                "waits": self.waits[op],
+                "waited_seconds": round(self.waited_seconds[op], 3),
+                "throttled": self.throttled[op],
+            }
+            for op, (rate, burst) in self.limits.items()
+        }
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
@@ -0,0 +1,130 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Seconds each kind of reference data may be served from cache.
+# Override per resource with settings.REF_CACHE_TTLS.
+DEFAULT_TTLS = {
+    "vendors": 300,
+    "users": 300,
+    "approval_policies": 300,
+    "payment_method_schemas": 900,
+}
+DEFAULT_MAX_ENTRIES = 1000
+GLOBAL = "*"  # entity key for org-wide resources such as payment method schemas
+
+
+class ReadThroughCache:
+    """Per-process LRU of upstream reference data keyed by (resource, entity).
+
+    Entries carry the generation number stored for their key in the shared
+    Django cache; ``invalidate`` bumps it, so a write handled by one worker
+    process evicts the entry in every other process on its next read.
+    Values that are bytes also carry a digest of their content, which is
+    the same in every process and is used for ETags.
+    """
+
+    def __init__(self, max_entries=None, ttls=None):
+        self.max_entries = max_entries or getattr(settings, "REF_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or getattr(settings, "REF_CACHE_TTLS", {}))}
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = Counter()
+        self.misses = Counter()
+        self.evictions = Counter()
+        self.invalidations = Counter()
+
+    @staticmethod
+    def _generation_key(resource, entity_id):
+        return f"refcache:gen:{resource}:{entity_id or GLOBAL}"
+
+    def _lookup(self, key, generation):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at, entry_generation, _ = entry
+            if expires_at < time.monotonic() or entry_generation != generation:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            self.hits[key[0]] += 1
+            return entry
+
+    def _store(self, key, value, generation):
+        digest = hashlib.blake2b(value, digest_size=16).hexdigest() if isinstance(value, bytes) else None
+        with self.lock:
+            self.misses[key[0]] += 1
+            entry = self.entries[key] = (value, time.monotonic() + self.ttls.get(key[0], 60), generation, digest)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                self.evictions[evicted[0]] += 1
+        return entry
+
+    def get_or_load(self, resource, entity_id, loader):
+        return self.get_or_load_tagged(resource, entity_id, loader)[0]
+
+    async def aget_or_load(self, resource, entity_id, aloader):
+        return (await self.aget_or_load_tagged(resource, entity_id, aloader))[0]
+
+    def get_or_load_tagged(self, resource, entity_id, loader):
+        """``(value, content digest)``; the digest is None for non-bytes values."""
+        key = (resource, entity_id or GLOBAL)
+        generation = cache.get(self._generation_key(resource, entity_id), 0)
+        entry = self._lookup(key, generation) or self._store(key, loader(), generation)
+        return entry[0], entry[3]
+
+    async def aget_or_load_tagged(self, resource, entity_id, aloader):
+        key = (resource, entity_id or GLOBAL)
+        generation = await cache.aget(self._generation_key(resource, entity_id), 0)
+        entry = self._lookup(key, generation) or self._store(key, await aloader(), generation)
+        return entry[0], entry[3]
+
+    def invalidate(self, resource, entity_id=None):
+        generation_key = self._generation_key(resource, entity_id)
+        if not cache.add(generation_key, 1, timeout=None):
+            try:
+                cache.incr(generation_key)
+            except ValueError:  # expired between add() and incr()
+                cache.set(generation_key, 1, timeout=None)
+        self._drop(resource, entity_id)
+
+    async def ainvalidate(self, resource, entity_id=None):
+        generation_key = self._generation_key(resource, entity_id)
+        if not await cache.aadd(generation_key, 1, timeout=None):
+            try:
+                await cache.aincr(generation_key)
+            except ValueError:
+                await cache.aset(generation_key, 1, timeout=None)
+        self._drop(resource, entity_id)
+
+    def _drop(self, resource, entity_id):
+        with self.lock:
+            self.entries.pop((resource, entity_id or GLOBAL), None)
+            self.invalidations[resource] += 1
+
+    def stats(self):
+        with self.lock:
+            resources = sorted(set(self.ttls) | set(self.hits) | set(self.misses))
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "resources": {
+                    resource: {
+                        "ttl": self.ttls.get(resource),
+                        "hits": self.hits[resource],
+                        "misses": self.misses[resource],
+                        "evictions": self.evictions[resource],
+                        "invalidations": self.invalidations[resource],
+                    }
+                    for resource in resources
+                },
+            }
+
+
+ref_cache = ReadThroughCache()
@@ -0,0 +1,126 @@
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+
+RETRYABLE_METHODS = ("GET", "HEAD", "DELETE")  # safe to send twice
+RETRYABLE_STATUS = (500, 502, 503, 504)
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = (0.2, 5.0)  # (base, cap) seconds for full-jitter exponential backoff
+DEFAULT_FAILURE_THRESHOLD = 5  # consecutive failures that open a route's breaker
+DEFAULT_RESET_TIMEOUT = 30  # seconds an open breaker fails fast before letting a trial call through
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class UpstreamUnavailable(requests.exceptions.RequestException):
+    """Mercoa was not called because it is failing or our budget for it is
+    spent. ``retry_after`` is how many seconds until a retry is worthwhile."""
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpen(UpstreamUnavailable):
+    # Raised instead of calling a route whose breaker is open
+    pass
+
+
+def retries_for(method):
+    if method not in RETRYABLE_METHODS:
+        return 0
+    return getattr(settings, "MERCOA_RETRIES", DEFAULT_RETRIES)
+
+
+def backoff(attempt):
+    """Delay before retry number ``attempt`` (1-based): a random point below
+    base * 2 ** (attempt - 1), capped, so retrying workers spread out."""
+    base, cap = getattr(settings, "MERCOA_RETRY_BACKOFF", DEFAULT_BACKOFF)
+    return random.uniform(0, min(cap, base * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Per-route breaker: after ``failure_threshold`` consecutive failures
+    (connection errors, timeouts, 5xx) calls fail fast for ``reset_timeout``
+    seconds, then one trial call decides whether the route closes again."""
+
+    def __init__(self, route, failure_threshold=None, reset_timeout=None):
+        self.route = route
+        self.failure_threshold = failure_threshold or getattr(
+            settings, "MERCOA_BREAKER_FAILURE_THRESHOLD", DEFAULT_FAILURE_THRESHOLD
+        )
+        self.reset_timeout = reset_timeout or getattr(settings, "MERCOA_BREAKER_RESET_TIMEOUT", DEFAULT_RESET_TIMEOUT)
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.trial_started_at = None
+        self.rejected = 0
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.trial_started_at = None
+            if self.state == HALF_OPEN:
+                # One trial at a time; a trial that never reported back is replaced
+                if self.trial_started_at is None or now - self.trial_started_at >= self.reset_timeout:
+                    self.trial_started_at = now
+                    return
+            if self.state == CLOSED:
+                return
+            self.rejected += 1
+            retry_after = self.reset_timeout - (now - (self.opened_at if self.state == OPEN else self.trial_started_at))
+        raise CircuitOpen(f"Mercoa route {self.route} is failing; circuit open", retry_after=max(retry_after, 0))
+
+    def success(self):
+        with self.lock:
+            self.state, self.failures, self.opened_at, self.trial_started_at = CLOSED, 0, None, None
+
+    def release(self):
+        # The call told us nothing about the route's health (a 429); let the next caller try
+        with self.lock:
+            self.trial_started_at = None
+
+    def failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state, self.opened_at, self.trial_started_at = OPEN, time.monotonic(), None
+
+    def snapshot(self):
+        with self.lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = round(max(self.reset_timeout - (time.monotonic() - self.opened_at), 0), 1)
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "rejected": self.rejected,
+                "retry_in": retry_in,
+            }
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self.breakers = {}
+        self.lock = threading.Lock()
+
+    def get(self, route):
+        breaker = self.breakers.get(route)
+        if breaker is None:
+            with self.lock:
+                breaker = self.breakers.setdefault(route, CircuitBreaker(route))
+        return breaker
+
+    def stats(self):
+        return {route: breaker.snapshot() for route, breaker in sorted(self.breakers.items())}
+
+
+breakers = BreakerRegistry()
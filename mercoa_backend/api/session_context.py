@@ -0,0 +1,66 @@
+from .models import Profile
+
+SESSION_KEY = "mercoa_entity"
+
+
+def context_from_profile(profile, email):
+    return {
+        "email": email,
+        "entity_id": profile.entity_id,
+        "entity_name": profile.entity_name,
+        "entity_logo": profile.entity_logo,
+    }
+
+
+def store_entity_context(request, profile, email):
+    """Keep the user's entity in their session so later requests need no
+    user/profile queries. Called at login and whenever onboarding changes it."""
+    context = context_from_profile(profile, email)
+    request.session[SESSION_KEY] = context
+    return context
+
+
+async def astore_entity_context(request, profile, email):
+    context = context_from_profile(profile, email)
+    await request.session.aset(SESSION_KEY, context)
+    return context
+
+
+def _load(email):
+    # One query instead of user lookup + lazy profile fetch
+    return Profile.objects.select_related("user").get(user__username=email)
+
+
+def entity_context(request, email=None):
+    """Entity context for ``email`` (or the logged-in user when omitted).
+
+    Served from the session when it belongs to that user and is onboarded;
+    otherwise read from the database once and, for the session's own user,
+    stored back so the next request is free.
+    """
+    context = request.session.get(SESSION_KEY)
+    if context and (email is None or context["email"] == email) and context["entity_id"]:
+        return context
+
+    email = email or (context or {}).get("email")
+    if not email:
+        return None
+    stored, context = context, context_from_profile(_load(email), email)
+    if (stored or {}).get("email") == email and stored != context:
+        request.session[SESSION_KEY] = context
+    return context
+
+
+async def aentity_context(request, email=None):
+    context = await request.session.aget(SESSION_KEY)
+    if context and (email is None or context["email"] == email) and context["entity_id"]:
+        return context
+
+    email = email or (context or {}).get("email")
+    if not email:
+        return None
+    profile = await Profile.objects.select_related("user").aget(user__username=email)
+    fresh = context_from_profile(profile, email)
+    if (context or {}).get("email") == email and context != fresh:
+        await request.session.aset(SESSION_KEY, fresh)
+    return fresh
@@ -4,8 +4,8 @@ from django.dispatch import receiver
 from .models import Profile
 
 @receiver(post_save, sender=User)
-def create_or_update_user_profile(sender, instance, created, **kwargs):
+def create_user_profile(sender, instance, created, **kwargs):
+    # Only on creation: re-saving an unchanged profile on every User save
+    # (e.g. the last_login update at login) was a wasted write.
     if created:
         Profile.objects.create(user=instance)
-    else:
-        instance.profile.save()
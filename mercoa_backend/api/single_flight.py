@@ -0,0 +1,135 @@
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+LOCK_TIMEOUT = 30  # seconds a cross-process leader may hold a key
+RESULT_TTL = 5  # seconds a leader's result stays in the shared cache for followers
+POLL_INTERVAL = 0.05
+_MISSING = object()
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce identical concurrent upstream reads.
+
+    The first caller for a key runs the load; callers arriving while it is in
+    flight wait and get the same result (or exception) instead of issuing
+    their own call. With ``shared=True`` (settings.MERCOA_SINGLE_FLIGHT_SHARED)
+    the leader also takes a lock in the shared cache and publishes its result
+    there briefly, so other worker processes wait for it too.
+
+    Results are shared objects: callers must not mutate them.
+    """
+
+    def __init__(self, shared=None):
+        self.shared = shared if shared is not None else getattr(settings, "MERCOA_SINGLE_FLIGHT_SHARED", False)
+        self.calls = {}
+        self.lock = threading.Lock()
+        self.async_calls = weakref.WeakKeyDictionary()  # event loop -> {key: future}
+        self.leaders = Counter()
+        self.coalesced = Counter()
+
+    @staticmethod
+    def _cache_keys(key):
+        digest = hashlib.sha1(repr(key).encode()).hexdigest()
+        return f"singleflight:lock:{digest}", f"singleflight:result:{digest}"
+
+    def _load_shared(self, key, load):
+        lock_key, result_key = self._cache_keys(key)
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        waited = False
+        while True:
+            locked = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+            if waited:
+                # Another process was loading this key; take its result if it landed
+                result = cache.get(result_key, _MISSING)
+                if result is not _MISSING:
+                    if locked:
+                        cache.delete(lock_key)
+                    self.coalesced[key[0]] += 1
+                    return result
+            if locked or time.monotonic() > deadline:
+                break
+            waited = True
+            time.sleep(POLL_INTERVAL)
+
+        try:
+            result = load()
+            cache.set(result_key, result, timeout=RESULT_TTL)
+            return result
+        finally:
+            if locked:
+                cache.delete(lock_key)
+
+    def do(self, key, load):
+        """Return ``load()``, sharing one call among concurrent callers of
+        ``key`` (a tuple whose first item names the kind of read)."""
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.leaders[key[0]] += 1
+            else:
+                self.coalesced[key[0]] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._load_shared(key, load) if self.shared else load()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+
+    async def ado(self, key, aload):
+        """Async flavour of ``do``. The load runs as its own task, so a caller
+        that is cancelled (a client disconnecting) stops waiting without
+        cancelling the load the other callers share."""
+        loop = asyncio.get_running_loop()
+        calls = self.async_calls.setdefault(loop, {})
+        task = calls.get(key)
+        if task is not None:
+            self.coalesced[key[0]] += 1
+        else:
+            task = calls[key] = loop.create_task(aload())
+            self.leaders[key[0]] += 1
+
+            def finished(task):
+                calls.pop(key, None)
+                if not task.cancelled():
+                    task.exception()  # mark retrieved when nobody was left waiting
+
+            task.add_done_callback(finished)
+        return await asyncio.shield(task)
+
+    def stats(self):
+        kinds = sorted(set(self.leaders) | set(self.coalesced))
+        return {
+            "shared": self.shared,
+            "in_flight": len(self.calls) + sum(len(calls) for calls in list(self.async_calls.values())),
+            "reads": {kind: {"upstream": self.leaders[kind], "coalesced": self.coalesced[kind]} for kind in kinds},
+        }
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,103 @@
+import itertools
+import json
+
+from django.http import StreamingHttpResponse
+
+from .fast_json import dumps
+
+_END = object()
+CHUNK_ITEMS = 100  # items per chunk written to the socket
+
+
+def prime(items):
+    """Advance ``items`` to its first element so errors raised while fetching
+    it (e.g. the first upstream page) surface before the response starts."""
+    items = iter(items)
+    first = next(items, _END)
+    if first is _END:
+        return iter(())
+    return itertools.chain([first], items)
+
+
+async def aprime(items):
+    """``prime`` for an async iterator."""
+    items = aiter(items)
+    first = await anext(items, _END)
+
+    async def chained():
+        if first is _END:
+            return
+        yield first
+        async for item in items:
+            yield item
+    return chained()
+
+
+def ndjson_chunks(items, chunk_items=CHUNK_ITEMS):
+    batch = []
+    for item in items:
+        batch.append(dumps(item))
+        if len(batch) >= chunk_items:
+            yield b"\n".join(batch) + b"\n"
+            batch = []
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+
+def json_array_chunks(items, envelope_key, chunk_items=CHUNK_ITEMS):
+    """Stream ``{"status": "success", envelope_key: {"hasMore": false,
+    "data": [...], "count": n}}`` - the same shape Mercoa list pages have."""
+    yield ('{"status": "success", %s: {"hasMore": false, "data": [' % json.dumps(envelope_key)).encode()
+
+    count = 0
+    batch = []
+    for item in items:
+        batch.append(dumps(item))
+        if len(batch) >= chunk_items:
+            yield (b"," if count else b"") + b",".join(batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        yield (b"," if count else b"") + b",".join(batch)
+        count += len(batch)
+    yield ('], "count": %d}}' % count).encode()
+
+
+async def abatched(items, size=CHUNK_ITEMS):
+    batch = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def andjson_chunks(items, chunk_items=CHUNK_ITEMS):
+    async for batch in abatched(items, chunk_items):
+        yield b"\n".join(dumps(item) for item in batch) + b"\n"
+
+
+async def ajson_array_chunks(items, envelope_key, chunk_items=CHUNK_ITEMS):
+    yield ('{"status": "success", %s: {"hasMore": false, "data": [' % json.dumps(envelope_key)).encode()
+    count = 0
+    async for batch in abatched(items, chunk_items):
+        yield (b"," if count else b"") + b",".join(dumps(item) for item in batch)
+        count += len(batch)
+    yield ('], "count": %d}}' % count).encode()
+
+
+def streaming_response(items, fmt, envelope_key):
+    if hasattr(items, "__aiter__"):
+        # Produced on the event loop by an async view
+        if fmt == "ndjson":
+            chunks, content_type = andjson_chunks(items), "application/x-ndjson"
+        else:
+            chunks, content_type = ajson_array_chunks(items, envelope_key), "application/json"
+        return StreamingHttpResponse(chunks, content_type=content_type)
+    if fmt == "ndjson":
+        chunks, content_type = ndjson_chunks(items), "application/x-ndjson"
+    else:
+        chunks, content_type = json_array_chunks(items, envelope_key), "application/json"
+    return StreamingHttpResponse(chunks, content_type=content_type)
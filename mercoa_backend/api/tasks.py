@@ -0,0 +1,62 @@
+"""Job handlers run by ``python manage.py run_jobs``.
+
+Each takes the job payload queued by the matching view and returns a JSON
+result (the same body the synchronous endpoint would have answered with).
+"""
+import csv
+import os
+
+from .jobs import JobFailed, register
+from .models import Profile
+from .user_import import RESULT_FIELDS, import_users
+from .views import bulk_approve_results, bulk_create_results, bulk_summary, onboard_entity
+
+
+@register("onboard_entity")
+def onboard(payload):
+    profile = Profile.objects.filter(user__username=payload["email"]).first()
+    if profile is None:
+        raise JobFailed("User not found.")
+    if profile.entity_id:
+        return {
+            "status": "already_onboarded",
+            "entity_id": profile.entity_id,
+            "entity_name": profile.entity_name,
+            "entity_logo": profile.entity_logo,
+        }
+
+    body, status = onboard_entity(
+        profile, payload["data"], payload["saved_files"], entity_logo=payload.get("entity_logo", "")
+    )
+    if status != 200:
+        raise JobFailed(body.get("message", "Onboarding failed"), body)
+    return body
+
+
+@register("bulk_create_invoices")
+def bulk_create(payload):
+    return bulk_summary(bulk_create_results(payload["invoices"]))
+
+
+@register("bulk_approve_invoices", idempotent=True)
+def bulk_approve(payload):
+    return bulk_summary(bulk_approve_results(payload["invoice_ids"]))
+
+
+@register("import_entity_users", idempotent=True)
+def import_users_csv(payload):
+    counts = {}
+    try:
+        with open(payload["csv_path"], newline="", encoding="utf-8-sig") as src, \
+                open(payload["results_path"], "w", newline="") as out:
+            writer = csv.DictWriter(out, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for result in import_users(payload["entity_id"], src):
+                writer.writerow(result)
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+    except ValueError as e:
+        raise JobFailed(str(e))
+    finally:
+        if os.path.exists(payload["csv_path"]):
+            os.remove(payload["csv_path"])
+    return {"status": "success", "counts": counts, "results_file": payload["results_path"]}
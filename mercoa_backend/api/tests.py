@@ -1,3 +1,513 @@
-from django.test import TestCase
+import asyncio
+import csv
+import io
+import json
+import tempfile
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import include, path
+from django.utils import timezone
+from requests import Response
+
+from . import aging, async_views, jobs, urls
+from .fake_mercoa import FakeMercoa
+from .invoice_mirror import remove_invoice, upsert_invoice
+from .log import clip
+from .mercoa_client import MercoaClient, get_client
+from .models import AgingAggregate, AgingState, Job, MercoaInvoice, Profile
+from .rate_limit import get_rate_limiter
+from .ref_cache import ref_cache
+from .resilience import OPEN, breakers
+from .single_flight import SingleFlight
+from .webhooks import replay
+
+User = get_user_model()
+
+
+class AsyncURLConf:
+    # The URL conf asgi.py serves: api/urls.py with every view that has an async twin swapped for it
+    urlpatterns = [
+        path("api/", include([
+            path(str(p.pattern), getattr(async_views, p.callback.__name__, p.callback), name=p.name)
+            for p in urls.urlpatterns
+        ])),
+    ]
+
+
+def async_views_variant(test_case):
+    """The same tests, run against the async views."""
+    return override_settings(ROOT_URLCONF=AsyncURLConf, MERCOA_ASYNC_VIEWS=True)(
+        type(f"Async{test_case.__name__}", (test_case,), {"__module__": test_case.__module__})
+    )
+
+
+class FakeMercoaTestCase(TestCase):
+    """Runs the views against an in-process fake of the Mercoa API."""
+
+    invoices_per_entity = 250
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.fake = FakeMercoa(invoices_per_entity=cls.invoices_per_entity)
+        cls.client_base_url = get_client().base_url
+        get_client().base_url = cls.fake.start()
+        # Async clients are made per event loop and read MERCOA_API_BASE when created
+        cls.api_base = override_settings(MERCOA_API_BASE=get_client().base_url)
+        cls.api_base.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.api_base.disable()
+        get_client().base_url = cls.client_base_url
+        cls.fake.stop()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        ref_cache.entries.clear()
+        self.fake.requests.clear()
+
+    def post(self, path, body, **headers):
+        return self.client.post(path, json.dumps(body), content_type="application/json", headers=headers)
+
+    def upstream_calls(self, route):
+        return self.fake.requests[route]
+
+    def streamed(self, path, data, **kwargs):
+        """POST and read the whole streamed response body."""
+        if settings.MERCOA_ASYNC_VIEWS:
+            # An async stream is produced on the loop that ran the view, so read it on the same one
+            return async_to_sync(self.astreamed)(path, data, **kwargs)
+        return b"".join(self.client.post(path, data, **kwargs).streaming_content)
+
+    async def astreamed(self, path, data, **kwargs):
+        res = await self.async_client.post(path, data, **kwargs)
+        return b"".join([chunk async for chunk in res.streaming_content])
+
+
+class FakeMercoaTests(FakeMercoaTestCase):
+    def test_invoice_pages(self):
+        client = get_client()
+        invoices = list(client.paginate("/entity/{entity_id}/invoices", entity_id="ent_pages"))
+        self.assertEqual(len(invoices), 250)
+        self.assertEqual(len({invoice["id"] for invoice in invoices}), 250)
+        self.assertEqual(self.upstream_calls("GET /entity/{entity_id}/invoices"), 3)
+
+    def test_error_rate(self):
+        fake = FakeMercoa(error_rate=1.0)
+        status, _ = fake.handle("GET", "/entity/ent_1/users", {}, {})
+        self.assertEqual(status, 503)
+
+
+class InvoiceViewTests(FakeMercoaTestCase):
+    def invoice(self, **fields):
+        return {
+            "status": "NEW",
+            "payerId": "ent_views",
+            "creatorEntityId": "ent_views",
+            "payeeId": "ent_vendor",
+            "dueDate": "2030-01-01T00:00:00Z",
+            "lineItems": [{"amount": 100, "currency": "USD"}],
+            **fields,
+        }
+
+    def test_list_invoices_follows_every_page_and_mirrors(self):
+        res = self.post("/api/invoices/", {"entity_id": "ent_list"})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["invoices"]["count"], 250)
+        self.assertEqual(MercoaInvoice.objects.filter(entity_id="ent_list").count(), 250)
+
+        # Fresh mirror: no second upstream walk
+        self.post("/api/invoices/", {"entity_id": "ent_list"})
+        self.assertEqual(self.upstream_calls("GET /entity/{entity_id}/invoices"), 3)
+
+    def test_list_invoices_streams_ndjson(self):
+        body = {"entity_id": "ent_stream", "stream": "ndjson", "view": "grid"}
+        lines = self.streamed("/api/invoices/", json.dumps(body), content_type="application/json").splitlines()
+        self.assertEqual(len(lines), 250)
+        self.assertEqual(json.loads(lines[0])["vendor"].keys(), {"name"})
+
+    def test_list_invoices_projects_fields(self):
+        res = self.post("/api/invoices/", {"entity_id": "ent_fields", "view": "grid"})
+        invoice = res.json()["invoices"]["data"][0]
+        self.assertEqual(set(invoice), {"id", "invoiceNumber", "status", "amount", "currency", "dueDate", "vendorId", "vendor"})
+        self.assertEqual(set(invoice["vendor"]), {"name"})
+
+        res = self.post("/api/invoices/", {"entity_id": "ent_fields", "fields": "id,missing"})
+        self.assertEqual(res.json()["invoices"]["data"][0]["missing"], None)
+        self.assertEqual(self.post("/api/invoices/", {"entity_id": "ent_fields", "view": "nope"}).status_code, 400)
+
+    def test_served_by_the_expected_views(self):
+        res = self.post("/api/aging-report/", {"entity_id": "ent_views"})
+        module = "api.async_views" if settings.MERCOA_ASYNC_VIEWS else "api.views"
+        self.assertEqual(res.resolver_match.func.__module__, module)
+
+    def test_create_invoice_validates(self):
+        res = self.post("/api/invoices/create/", self.invoice(payerId=None))
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.json()["message"], "Missing required field: payerId")
+
+    def test_bulk_create_reports_each_invoice(self):
+        res = self.post("/api/invoices/bulk-create/", {"invoices": [self.invoice() for _ in range(5)]})
+        body = res.json()
+        self.assertEqual((body["count"], body["succeeded"], body["failed"]), (5, 5, 0))
+        self.assertEqual([r["index"] for r in body["results"]], list(range(5)))
+
+    def test_bulk_approve_keeps_going_past_failures(self):
+        with self.fake.lock:
+            ids = self.fake.entity("ent_approve")["invoices"][:3]
+        res = self.post("/api/invoice/bulk-approve/", {"invoice_ids": ids + ["inv_missing"]})
+        body = res.json()
+        self.assertEqual((body["succeeded"], body["failed"]), (3, 1))
+        self.assertEqual(body["results"][3]["code"], 404)
+
+    def test_aging_summary_matches_mirror(self):
+        res = self.post("/api/aging-report/", {"entity_id": "ent_aging", "statuses": ["NEW", "APPROVED"]})
+        self.assertEqual(res.status_code, 200)
+        expected = MercoaInvoice.objects.filter(entity_id="ent_aging", status__in=["NEW", "APPROVED"]).count()
+        self.assertEqual(sum(bucket["count"] for bucket in res.json()["buckets"]), expected)
+
+
+class RefCacheInvalidationTests(FakeMercoaTestCase):
+    def assert_relisted(self, list_call, mutate, route):
+        list_call()
+        list_call()
+        self.assertEqual(self.upstream_calls(route), 1)
+        self.assertLess(mutate().status_code, 300)
+        listed = list_call()
+        self.assertEqual(self.upstream_calls(route), 2)
+        return listed
+
+    def test_user_writes_invalidate_the_list(self):
+        def list_users():
+            return self.post("/api/entity/user/list/", {"entity_id": "ent_cache"}).json()["users"]
+
+        users = self.assert_relisted(list_users, lambda: self.post("/api/entity/user/create/", {
+            "entity_id": "ent_cache", "email": "cached@example.com", "name": "Cached",
+        }), "GET /entity/{entity_id}/users")
+        self.assertIn("cached@example.com", [user["email"] for user in users])
+
+    def test_policy_writes_invalidate_the_list(self):
+        def list_policies():
+            return self.post("/api/entity/approval-policy/list/", {"entity_id": "ent_cache"}).json()["policies"]
+
+        policies = self.assert_relisted(list_policies, lambda: self.post("/api/entity/approval-policy/create/", {
+            "entity_id": "ent_cache", "amount": 500, "roles": ["controller"],
+        }), "GET /entity/{entity_id}/approval-policies")
+        self.assertEqual(len(policies), 1)
+
+    def test_schema_writes_invalidate_the_list(self):
+        def list_schemas():
+            return self.client.get("/api/payment-method/schema/list/").json()["schemas"]
+
+        schemas = self.assert_relisted(list_schemas, lambda: self.post("/api/payment-method/schema/create/", {
+            "name": "Wire", "isSource": False, "isDestination": True, "fields": [],
+        }), "GET /paymentMethod/schema")
+        self.assertIn("Wire", [schema["name"] for schema in schemas])
+
+
+class UserImportTests(FakeMercoaTestCase):
+    def test_import_dedupes_updates_and_reports_every_row(self):
+        rows = [
+            "email,name,roles",
+            "user0@ent_import.example.com,User 0,admin",
+            "user1@ent_import.example.com,Renamed,admin;controller",
+            "new@example.com,New,admin",
+            "NEW@example.com,New again,admin",
+            "not-an-email,Nobody,admin",
+        ]
+        upload = SimpleUploadedFile("users.csv", "\n".join(rows).encode(), content_type="text/csv")
+        body = self.streamed("/api/entity/user/import/", {"entity_id": "ent_import", "file": upload})
+
+        results = sorted(csv.DictReader(io.StringIO(body.decode())), key=lambda result: int(result["row"]))
+        self.assertEqual([(r["action"], r["status"]) for r in results], [
+            ("unchanged", "success"), ("update", "success"), ("create", "success"),
+            ("skip", "skipped"), ("skip", "skipped"),
+        ])
+        self.assertEqual(results[3]["message"], "Duplicate email in file")
+        self.assertEqual(self.upstream_calls("POST /entity/{entity_id}/user"), 1)
+        self.assertEqual(self.upstream_calls("POST /entity/{entity_id}/user/{user_id}"), 1)
+
+        users = {user["email"]: user for user in self.fake.entity("ent_import")["users"].values()}
+        self.assertEqual((users["user1@ent_import.example.com"]["name"], results[1]["user_id"]),
+                         ("Renamed", users["user1@ent_import.example.com"]["id"]))
+        self.assertEqual(users["new@example.com"]["id"], results[2]["user_id"])
+
+
+class JobQueueTests(FakeMercoaTestCase):
+    def test_priority_is_validated_and_clamped(self):
+        body = {"invoice_ids": ["inv_1"], "background": True}
+        self.assertEqual(self.post("/api/invoice/bulk-approve/", {**body, "priority": "high"}).status_code, 400)
+        res = self.post("/api/invoice/bulk-approve/", {**body, "priority": 10 ** 6})
+        self.assertEqual(Job.objects.get(pk=res.json()["job_id"]).priority, jobs.MAX_PRIORITY)
+
+    def test_one_job_per_serial_key_runs_at_a_time(self):
+        first = jobs.enqueue("bulk_approve_invoices", {"invoice_ids": []}, serial_key="ent_serial")
+        jobs.enqueue("bulk_approve_invoices", {"invoice_ids": []}, serial_key="ent_serial")
+        self.assertEqual(jobs.claim_next("w1").pk, first.pk)
+        self.assertIsNone(jobs.claim_next("w2"))
+
+    def test_stale_jobs_are_only_retried_when_idempotent(self):
+        approve = jobs.enqueue("bulk_approve_invoices", {"invoice_ids": []})
+        create = jobs.enqueue("bulk_create_invoices", {"invoices": []})
+        Job.objects.update(status=Job.RUNNING, started_at=timezone.now() - timedelta(days=1))
+        self.assertEqual(jobs.requeue_stale(), 1)
+        approve.refresh_from_db()
+        create.refresh_from_db()
+        self.assertEqual((approve.status, create.status), (Job.QUEUED, Job.FAILED))
+
+
+class OnboardingUploadTests(FakeMercoaTestCase):
+    def test_uploaded_logo_is_kept_like_the_json_one(self):
+        User.objects.create_user("new@example.com", password="pw")
+        logo = SimpleUploadedFile("logo.png", b"\x89PNG", content_type="image/png")
+        data = json.dumps({"email": "new@example.com", "background": True})
+        with tempfile.TemporaryDirectory() as upload_dir, mock.patch("api.views.UPLOAD_DIR", upload_dir):
+            res = self.client.post("/api/entity/create/upload/", {"data": data, "logo": logo})
+        self.assertEqual(res.status_code, 202)
+        job = Job.objects.get(pk=res.json()["job_id"])
+        self.assertEqual(job.payload["entity_logo"], "data:image/png;base64,iVBORw==")
+
+    @override_settings(ENTITY_LOGO_MAX_SIZE=3)
+    def test_logo_has_its_own_cap(self):
+        User.objects.create_user("new@example.com", password="pw")
+        logo = SimpleUploadedFile("logo.png", b"\x89PNG", content_type="image/png")
+        data = json.dumps({"email": "new@example.com", "background": True})
+        with tempfile.TemporaryDirectory() as upload_dir, mock.patch("api.views.UPLOAD_DIR", upload_dir):
+            res = self.client.post("/api/entity/create/upload/", {"data": data, "logo": logo})
+            json_res = self.post(
+                "/api/entity/create/", {"email": "new@example.com", "logo": "data:image/png;base64,iVBORw=="}
+            )
+        self.assertEqual((res.status_code, json_res.status_code), (413, 413))
+
+    def test_json_job_carries_the_logo_once(self):
+        User.objects.create_user("new@example.com", password="pw")
+        body = {"email": "new@example.com", "background": True, "logo": "data:image/png;base64,iVBORw=="}
+        with mock.patch("api.views.save_base64_file", return_value="uploads/logo.png"):
+            res = self.post("/api/entity/create/", body)
+        job = Job.objects.get(pk=res.json()["job_id"])
+        self.assertEqual(job.payload["entity_logo"], body["logo"])
+        self.assertNotIn("logo", job.payload["data"])
+
+
+class SessionAndTokenTests(FakeMercoaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user("ap@example.com", password="pw")
+        Profile.objects.filter(user=self.user).update(entity_id="ent_token")
+
+    def test_login_puts_entity_in_session(self):
+        res = self.post("/api/login/", {"username": "ap@example.com", "password": "pw"})
+        self.assertEqual(res.json()["entity_id"], "ent_token")
+        self.assertEqual(self.client.session["mercoa_entity"]["entity_id"], "ent_token")
+
+    def test_token_is_minted_once(self):
+        self.post("/api/login/", {"username": "ap@example.com", "password": "pw"})
+        with self.assertNumQueries(0):
+            first = self.post("/api/mercoa/token/", {"email": "ap@example.com"}).json()["token"]
+        second = self.post("/api/mercoa/token/", {"email": "ap@example.com"}).json()["token"]
+        self.assertEqual(first, second)
+        self.assertEqual(self.upstream_calls("POST /entity/{entity_id}/token"), 1)
+
+
+class ConditionalGetTests(FakeMercoaTestCase):
+    def test_unchanged_invoices_are_not_resent(self):
+        res = self.post("/api/invoices/", {"entity_id": "ent_etag"})
+        tag = res["ETag"]
+        res = self.post("/api/invoices/", {"entity_id": "ent_etag"}, if_none_match=tag)
+        self.assertEqual((res.status_code, res.content), (304, b""))
+        self.assertEqual(self.upstream_calls("GET /entity/{entity_id}/invoices"), 3)
+
+        # A refresh that finds nothing new keeps the tag; a local change does not
+        self.assertEqual(self.post("/api/invoices/", {"entity_id": "ent_etag", "max_age": 0}, if_none_match=tag).status_code, 304)
+        invoice = MercoaInvoice.objects.filter(entity_id="ent_etag").first()
+        upsert_invoice("ent_etag", {**invoice.data, "status": "PAID"})
+        self.assertEqual(self.post("/api/invoices/", {"entity_id": "ent_etag"}, if_none_match=tag).status_code, 200)
+
+    def test_cached_vendors_revalidate_without_upstream(self):
+        tag = self.post("/api/vendors/list/", {"entity_id": "ent_etag"})["ETag"]
+        res = self.post("/api/vendors/list/", {"entity_id": "ent_etag"}, if_none_match=f'W/{tag}')
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(self.upstream_calls("GET /entity/{entity_id}/counterparty"), 1)
+
+
+class MetricsTests(FakeMercoaTestCase):
+    def test_routes_and_upstream_calls_are_exported(self):
+        self.post("/api/entity/user/list/", {"entity_id": "ent_metrics"})
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('http_responses_total{method="POST",route="api/entity/user/list/",status="200"}', body)
+        self.assertIn('mercoa_request_duration_seconds_count{method="GET",route="/entity/{entity_id}/users"}', body)
+
+
+class BreakerTests(TestCase):
+    def test_half_open_trial_survives_a_429(self):
+        cache.clear()
+        route = "/test/half-open"
+        breaker = breakers.get(route)
+        breaker.state, breaker.opened_at = OPEN, time.monotonic() - breaker.reset_timeout
+
+        statuses = iter([429, 200])
+
+        def send(*args, **kwargs):
+            res = Response()
+            res.status_code, res._content = next(statuses), b"[]"
+            res.headers["Retry-After"] = "0"
+            return res
+
+        client = MercoaClient(base_url="http://mercoa.invalid")
+        client.session.request = send
+        self.assertEqual(client.get(route).status_code, 200)
+        self.assertEqual(breaker.snapshot()["state"], "closed")
+
+
+class DegradedUpstreamTests(FakeMercoaTestCase):
+    def test_open_circuit_is_a_503(self):
+        breaker = breakers.get("/entity/{entity_id}/counterparty")
+        breaker.state, breaker.opened_at = OPEN, time.monotonic()
+        try:
+            res = self.post("/api/vendors/list/", {"entity_id": "ent_open"})
+        finally:
+            breaker.success()
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res["Retry-After"], str(breaker.reset_timeout))
+
+    def test_exhausted_rate_limit_is_a_503(self):
+        limiter = get_rate_limiter()
+        max_wait, limiter.max_wait = limiter.max_wait, -1
+        try:
+            res = self.post("/api/entity/user/list/", {"entity_id": "ent_limited"})
+        finally:
+            limiter.max_wait = max_wait
+        self.assertEqual(res.status_code, 503)
+        self.assertEqual(res["Retry-After"], "1")
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_cancelled_leader_does_not_fail_followers(self):
+        flight = SingleFlight(shared=False)
+        calls = []
+
+        async def load():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "users"
+
+        async def run():
+            leader = asyncio.create_task(flight.ado(("raw", "/users"), load))
+            await asyncio.sleep(0)
+            follower = asyncio.create_task(flight.ado(("raw", "/users"), load))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower, leader.cancelled()
+
+        self.assertEqual(asyncio.run(run()), ("users", True))
+        self.assertEqual(len(calls), 1)
+
+
+class AgingEngineTests(TestCase):
+    DAY = date(2026, 1, 1)
+
+    def invoice(self, invoice_id, days_past_due, status="NEW", amount="10.00"):
+        due = self.DAY - timedelta(days=days_past_due)
+        return upsert_invoice("ent_age", {
+            "id": invoice_id, "status": status, "amount": amount, "currency": "USD",
+            "dueDate": f"{due.isoformat()}T00:00:00Z",
+        })
+
+    def running(self):
+        rows = AgingAggregate.objects.filter(entity_id="ent_age", count__gt=0)
+        return sorted((row.bucket, row.status, row.count, row.total) for row in rows)
+
+    def recomputed(self, today):
+        rows = aging.aggregate_buckets("ent_age", aging.DEFAULT_BOUNDARIES, today)
+        return sorted(
+            (bucket, status, count, total) for bucket, group in rows.items() for status, _currency, count, total in group
+        )
+
+    def test_roll_forward_across_several_boundaries(self):
+        for invoice_id, days in (("inv_future", -5), ("inv_current", 0), ("inv_late", 25), ("inv_old", 95)):
+            self.invoice(invoice_id, days)
+        aging.rebuild("ent_age", self.DAY)
+
+        # inv_future and inv_current cross 0, 30 and 60 in one step, inv_late crosses 60 and 90
+        later = self.DAY + timedelta(days=70)
+        aging.ensure_current("ent_age", later)
+        self.assertEqual(AgingState.objects.get(entity_id="ent_age").as_of, later)
+        self.assertEqual(self.running(), self.recomputed(later))
+        self.assertEqual([row[:3] for row in self.running()], [(3, "NEW", 2), (4, "NEW", 2)])
+
+    def test_upsert_moves_the_invoice_between_buckets(self):
+        self.invoice("inv_move", 0)
+        self.invoice("inv_stay", 45, amount="5.00")
+        aging.rebuild("ent_age", self.DAY)
+
+        self.invoice("inv_move", 45, status="APPROVED", amount="12.50")
+        self.assertEqual(self.running(), [
+            (2, "APPROVED", 1, Decimal("12.50")), (2, "NEW", 1, Decimal("5.00")),
+        ])
+        self.assertEqual(self.running(), self.recomputed(self.DAY))
+
+        remove_invoice("inv_move")
+        self.assertEqual(self.running(), [(2, "NEW", 1, Decimal("5.00"))])
+
+    def test_custom_boundaries_are_aggregated_on_the_fly(self):
+        for invoice_id, days in (("inv_a", 0), ("inv_b", 10), ("inv_c", 16), ("inv_d", 40)):
+            self.invoice(invoice_id, days)
+        report = aging.summary("ent_age", ["NEW"], boundaries=[15, 0], today=self.DAY)
+        self.assertEqual(
+            [(row["bucket"], row["count"], row["totals"]) for row in report],
+            [("Current", 1, {"USD": "10.00"}), ("1-15 Days", 1, {"USD": "10.00"}), ("15+ Days", 2, {"USD": "20.00"})],
+        )
+        self.assertFalse(AgingState.objects.filter(entity_id="ent_age").exists())
+
+    def test_bucket_page(self):
+        for invoice_id, days in (("inv_3", 31), ("inv_1", 50), ("inv_2", 40), ("inv_new", 1)):
+            self.invoice(invoice_id, days)
+        first = aging.bucket_page("ent_age", ["NEW"], "31-60 Days", page_size=2, today=self.DAY, fields=["id"])
+        self.assertEqual(first["invoices"], [{"id": "inv_1"}, {"id": "inv_2"}])
+        self.assertTrue(first["hasMore"])
+        second = aging.bucket_page("ent_age", ["NEW"], 2, page=2, page_size=2, today=self.DAY, fields=["id"])
+        self.assertEqual((second["bucket"], second["invoices"], second["hasMore"]), ("31-60 Days", [{"id": "inv_3"}], False))
+
+
+class LogClipTests(TestCase):
+    def test_large_payloads_are_clipped(self):
+        invoices = {"count": 5000, "data": [{"id": f"inv_{i}", "memo": "x" * 5000} for i in range(5000)]}
+        clipped = clip(invoices, max_items=2, max_chars=10)
+        self.assertEqual(len(clipped["data"]), 3)
+        self.assertEqual(clipped["data"][-1], "…(+4998 items)")
+        self.assertTrue(clipped["data"][0]["memo"].startswith("x" * 10 + "…"))
+
+
+class WebhookTests(FakeMercoaTestCase):
+    @override_settings(MERCOA_WEBHOOK_SECRET="secret")
+    def test_signature_is_checked(self):
+        res = self.client.post(
+            "/api/webhooks/mercoa/", b"{}", content_type="application/json", headers={"mercoa-signature": "bad"}
+        )
+        self.assertEqual(res.status_code, 401)
+
+    @override_settings(MERCOA_WEBHOOK_SECRET="secret")
+    def test_invoice_event_updates_mirror(self):
+        invoice = {"id": "inv_hook", "payerId": "ent_hook", "status": "NEW", "amount": 10, "currency": "USD"}
+        [res] = replay([{"eventType": "invoice.created", "invoice": invoice}], self.client)
+        self.assertEqual(res.json()["result"], "mirrored")
+        self.assertTrue(MercoaInvoice.objects.filter(invoice_id="inv_hook", entity_id="ent_hook").exists())
+
+
+AsyncInvoiceViewTests = async_views_variant(InvoiceViewTests)
+AsyncSessionAndTokenTests = async_views_variant(SessionAndTokenTests)
+AsyncConditionalGetTests = async_views_variant(ConditionalGetTests)
+AsyncDegradedUpstreamTests = async_views_variant(DegradedUpstreamTests)
+AsyncRefCacheInvalidationTests = async_views_variant(RefCacheInvalidationTests)
+AsyncUserImportTests = async_views_variant(UserImportTests)
@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+
+# Entity tokens are minted by Mercoa for an hour by default; hand out cached
+# copies for a shorter window so nobody receives a token about to expire.
+DEFAULT_TTL = 45 * 60
+LOCK_TIMEOUT = 15  # seconds a cross-process refresh lock may be held
+POLL_INTERVAL = 0.05
+
+
+def token_ttl():
+    return getattr(settings, "MERCOA_TOKEN_CACHE_TTL", DEFAULT_TTL)
+
+
+def _key(entity_id):
+    return f"mercoa:token:{entity_id}"
+
+
+_locks = defaultdict(threading.Lock)
+_locks_guard = threading.Lock()
+
+
+def _local_lock(entity_id):
+    with _locks_guard:
+        return _locks[entity_id]
+
+
+def _wait_for_token(key):
+    # Another process holds the refresh lock; wait for its token to land.
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        token = cache.get(key)
+        if token:
+            return token
+        time.sleep(POLL_INTERVAL)
+    return None
+
+
+def get_entity_token(entity_id, mint):
+    """Return a cached token for ``entity_id``, calling ``mint(entity_id)`` at
+    most once at a time per entity - within this process through a lock, and
+    across processes through an ``add``-based lock in the shared cache."""
+    key = _key(entity_id)
+    token = cache.get(key)
+    if token:
+        return token
+
+    with _local_lock(entity_id):
+        token = cache.get(key)
+        if token:
+            return token
+
+        lock_key = f"{key}:lock"
+        locked = cache.add(lock_key, 1, timeout=LOCK_TIMEOUT)
+        if not locked:
+            token = _wait_for_token(key)
+            if token:
+                return token
+        try:
+            token = mint(entity_id)
+            cache.set(key, token, timeout=token_ttl())
+        finally:
+            if locked:
+                cache.delete(lock_key)
+        return token
+
+
+_async_locks = defaultdict(asyncio.Lock)
+
+
+async def aget_entity_token(entity_id, amint):
+    key = _key(entity_id)
+    token = await cache.aget(key)
+    if token:
+        return token
+
+    async with _async_locks[entity_id]:
+        token = await cache.aget(key)
+        if token:
+            return token
+
+        lock_key = f"{key}:lock"
+        locked = await cache.aadd(lock_key, 1, timeout=LOCK_TIMEOUT)
+        if not locked:
+            deadline = time.monotonic() + LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                token = await cache.aget(key)
+                if token:
+                    return token
+                await asyncio.sleep(POLL_INTERVAL)
+        try:
+            token = await amint(entity_id)
+            await cache.aset(key, token, timeout=token_ttl())
+        finally:
+            if locked:
+                await cache.adelete(lock_key)
+        return token
+
+
+def invalidate_entity_token(entity_id):
+    cache.delete(_key(entity_id))
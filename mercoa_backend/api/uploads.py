@@ -0,0 +1,124 @@
+import base64
+import os
+import re
+import uuid
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopUpload
+
+# Multipart field -> file name on disk, same names the base64 path uses
+DOCUMENT_FIELDS = {
+    "logo": "logo",
+    "w9": "w9",
+    "form1099": "form1099",
+    "bankStatement": "bank_statement",
+}
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024
+DEFAULT_MAX_TOTAL_SIZE = 4 * DEFAULT_MAX_FILE_SIZE
+# The logo is kept on the profile (and in the session) as a data: URI
+DEFAULT_MAX_LOGO_SIZE = 256 * 1024
+
+
+def max_file_size():
+    return getattr(settings, "ENTITY_UPLOAD_MAX_FILE_SIZE", DEFAULT_MAX_FILE_SIZE)
+
+
+def max_total_size():
+    return getattr(settings, "ENTITY_UPLOAD_MAX_TOTAL_SIZE", DEFAULT_MAX_TOTAL_SIZE)
+
+
+def max_logo_size():
+    return getattr(settings, "ENTITY_LOGO_MAX_SIZE", DEFAULT_MAX_LOGO_SIZE)
+
+
+def max_size(field_name):
+    return min(max_logo_size(), max_file_size()) if field_name == "logo" else max_file_size()
+
+
+def logo_too_large(uri):
+    """Whether a base64 ``data:`` URI decodes to more than ENTITY_LOGO_MAX_SIZE
+    bytes, without decoding it."""
+    encoded = uri.partition(";base64,")[2] or uri
+    return len(encoded) * 3 // 4 > max_logo_size()
+
+
+class StoredDocument(UploadedFile):
+    # An upload that was written straight to its final place on disk
+    def __init__(self, path, name, content_type, size, charset=None):
+        super().__init__(file=None, name=name, content_type=content_type, size=size, charset=charset)
+        self.path = path
+
+
+def data_uri(document):
+    """A stored document as the ``data:`` URI the JSON path receives it in.
+    Only used for the logo, which ``max_size`` keeps small."""
+    with open(document.path, "rb") as f:
+        encoded = base64.b64encode(f.read()).decode("ascii")
+    return f"data:{document.content_type or 'application/octet-stream'};base64,{encoded}"
+
+
+class DocumentUploadHandler(FileUploadHandler):
+    """Writes onboarding documents to ``upload_dir`` chunk by chunk as the
+    multipart body is parsed, so no document is ever held in memory.
+
+    A file over the size limit stops the upload and is removed; the view
+    reads ``errors`` to answer with 413. Unknown file fields are dropped.
+    """
+
+    def __init__(self, request=None, upload_dir="uploads/"):
+        super().__init__(request)
+        self.upload_dir = upload_dir
+        self.errors = []
+        self._out = None
+        self._tmp_path = None
+        self._size = 0
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+        self._out = None
+        if field_name not in DOCUMENT_FIELDS:
+            return
+        if content_length is not None and content_length > max_size(field_name):
+            self._reject(f"{field_name} exceeds {max_size(field_name)} bytes")
+
+        os.makedirs(self.upload_dir, exist_ok=True)
+        self._size = 0
+        self._tmp_path = os.path.join(self.upload_dir, f".{uuid.uuid4().hex}.part")
+        self._out = open(self._tmp_path, "wb")
+
+    def receive_data_chunk(self, raw_data, start):
+        if self._out is None:
+            return None  # not a document field: discard
+        self._size += len(raw_data)
+        if self._size > max_size(self.field_name):
+            self._discard()
+            self._reject(f"{self.field_name} exceeds {max_size(self.field_name)} bytes")
+        self._out.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if self._out is None:
+            return None
+        self._out.close()
+        self._out = None
+
+        ext = os.path.splitext(self.file_name or "")[1].lstrip(".").lower()
+        ext = re.sub(r"[^a-z0-9]", "", ext) or (self.content_type or "").split("/")[-1] or "bin"
+        path = os.path.join(self.upload_dir, f"{DOCUMENT_FIELDS[self.field_name]}.{ext}")
+        os.replace(self._tmp_path, path)
+        return StoredDocument(path, os.path.basename(path), self.content_type, self._size, self.charset)
+
+    def upload_interrupted(self):
+        self._discard()
+
+    def _discard(self):
+        if self._out is not None:
+            self._out.close()
+            self._out = None
+        if self._tmp_path and os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def _reject(self, message):
+        self.errors.append(message)
+        raise StopUpload(connection_reset=True)
@@ -1,23 +1,40 @@
+from django.conf import settings
 from django.urls import path
-from .views import get_mercoa_token, login_view, create_entity, signup
-from .views import list_invoices, create_invoice, update_invoice, approve_invoice
+from .views import get_mercoa_token, login_view, create_entity, create_entity_upload, signup
+from .views import list_invoices, create_invoice, bulk_create_invoices, update_invoice, approve_invoice, bulk_approve_invoices
 from .views import create_entity_user, list_entity_users, update_entity_user, delete_entity_user
+from .views import import_entity_users
 from .views import create_approval_policy, list_approval_policies, update_approval_policy, delete_approval_policy
 from .views import create_payment_method_schema, list_payment_method_schemas, delete_payment_method_schema
-from .views import list_vendors, ap_aging_report
+from .views import list_vendors, ap_aging_report, mercoa_pool_stats, ref_cache_stats, mercoa_webhook
+from .views import job_status, job_results_file, mercoa_breakers
+
+if settings.MERCOA_ASYNC_VIEWS:
+    # Non-blocking views for everything that calls Mercoa under ASGI; the rest stays synchronous.
+    from .async_views import get_mercoa_token, create_entity, create_entity_upload
+    from .async_views import list_invoices, create_invoice, bulk_create_invoices, update_invoice, approve_invoice, bulk_approve_invoices
+    from .async_views import create_entity_user, list_entity_users, update_entity_user, delete_entity_user
+    from .async_views import import_entity_users
+    from .async_views import create_approval_policy, list_approval_policies, update_approval_policy, delete_approval_policy
+    from .async_views import create_payment_method_schema, list_payment_method_schemas, delete_payment_method_schema
+    from .async_views import list_vendors, ap_aging_report
 
 urlpatterns = [
     path("login/", login_view),
     path("signup/", signup),      
     path("entity/create/", create_entity),
+    path("entity/create/upload/", create_entity_upload),
     path("invoices/", list_invoices),
     path("invoices/create/", create_invoice),
+    path("invoices/bulk-create/", bulk_create_invoices),
     path("invoices/update/", update_invoice),
     path("invoice/approve/", approve_invoice),
+    path("invoice/bulk-approve/", bulk_approve_invoices),
     path("mercoa/token/", get_mercoa_token),
     path('entity/user/create/', create_entity_user),
     path('entity/user/list/', list_entity_users, name='list_entity_users'),
     path("entity/user/update/", update_entity_user),
+    path("entity/user/import/", import_entity_users),
     path("entity/user/delete/", delete_entity_user),
     path("entity/approval-policy/create/", create_approval_policy),
     path("entity/approval-policy/list/", list_approval_policies),
@@ -28,5 +45,11 @@ urlpatterns = [
     path("payment-method/schema/delete/", delete_payment_method_schema),
     path("vendors/list/", list_vendors),
     path('aging-report/', ap_aging_report, name='ap_aging_report'),
+    path("mercoa/pool-stats/", mercoa_pool_stats),
+    path("mercoa/breakers/", mercoa_breakers),
+    path("cache/stats/", ref_cache_stats),
+    path("webhooks/mercoa/", mercoa_webhook),
+    path("jobs/<int:job_id>/", job_status),
+    path("jobs/<int:job_id>/results/", job_results_file),
 ]
 
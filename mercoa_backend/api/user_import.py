@@ -0,0 +1,182 @@
+"""Bulk import of entity users from a CSV with ``email``, ``name`` and
+``roles`` columns (roles separated by ``;``).
+
+Rows are read, deduplicated, sent upstream and written out one at a time.
+Besides the entity's user list, memory holds one entry per distinct email in
+the file (to drop repeats), so it grows with the number of unique emails
+rather than with the number of rows or their size.
+"""
+import csv
+import re
+
+from .fanout import afan_out, fan_out
+from .mercoa_client import get_async_client, get_client
+from .ref_cache import ref_cache
+
+RESULT_FIELDS = ["row", "email", "action", "status", "user_id", "message"]
+DEFAULT_ROLES = ["admin"]
+
+
+def user_payload(email, name, roles):
+    return {
+        "email": email,
+        "name": name,
+        "foreignId": email,
+        "roles": roles,
+    }
+
+
+def parse_roles(value):
+    roles = [role.strip() for role in re.split(r"[;|]", value or "") if role.strip()]
+    return roles or list(DEFAULT_ROLES)
+
+
+def read_rows(lines):
+    """Yield ``(row_number, email, name, roles)`` from CSV text lines.
+    ``row_number`` counts data rows from 1, as spreadsheets show them after
+    the header."""
+    reader = csv.DictReader(lines)
+    if not reader.fieldnames or "email" not in [f.strip().lower() for f in reader.fieldnames]:
+        raise ValueError("CSV must have a header row with an 'email' column")
+    for number, row in enumerate(reader, start=1):
+        row = {(k or "").strip().lower(): (v or "").strip() for k, v in row.items()}
+        yield number, row.get("email", "").lower(), row.get("name", ""), parse_roles(row.get("roles"))
+
+
+def _user_map(users):
+    if isinstance(users, dict):
+        users = users.get("data", [])
+    return {(user.get("email") or "").lower(): user for user in users if user.get("email")}
+
+
+def existing_users(entity_id, client=None):
+    client = client or get_client()
+    res = client.get("/entity/{entity_id}/users", entity_id=entity_id)
+    res.raise_for_status()
+    return _user_map(res.json())
+
+
+async def aexisting_users(entity_id):
+    res = await get_async_client().get("/entity/{entity_id}/users", entity_id=entity_id)
+    res.raise_for_status()
+    return _user_map(res.json())
+
+
+def plan(entity_id, rows, existing):
+    """Turn CSV rows into import operations, dropping repeats of an email
+    already seen in the file and users that already match. Every distinct
+    email is remembered for the rest of the file: O(unique emails) memory."""
+    seen = set()
+    for number, email, name, roles in rows:
+        op = {"row": number, "email": email, "entity_id": entity_id, "name": name, "roles": roles}
+        if not email or "@" not in email:
+            yield {**op, "action": "skip", "message": "Invalid email"}
+            continue
+        if email in seen:
+            yield {**op, "action": "skip", "message": "Duplicate email in file"}
+            continue
+        seen.add(email)
+
+        user = existing.get(email)
+        if user is None:
+            yield {**op, "action": "create"}
+        elif user.get("name") == name and sorted(user.get("roles") or []) == sorted(roles):
+            yield {**op, "action": "unchanged", "user_id": user.get("id")}
+        else:
+            yield {**op, "action": "update", "user_id": user.get("id")}
+
+
+def _upstream_call(op):
+    # (route, keyword arguments) of the create or update call for an import operation
+    payload = user_payload(op["email"], op["name"], op["roles"])
+    if op["action"] == "create":
+        return "/entity/{entity_id}/user", {"json": payload, "entity_id": op["entity_id"]}
+    return "/entity/{entity_id}/user/{user_id}", {"json": payload, "entity_id": op["entity_id"], "user_id": op["user_id"]}
+
+
+def _applied(op, result, res):
+    user = res.json()
+    user_id = user.get("id", op.get("user_id")) if isinstance(user, dict) else op.get("user_id")
+    return {**result, "status": "success", "user_id": user_id, "message": ""}
+
+
+def _failed(result, e):
+    response = getattr(e, "response", None)
+    return {**result, "status": "error", "message": response.text if response is not None else str(e)}
+
+
+def _skipped(op, result):
+    return {**result, "status": "skipped" if op["action"] == "skip" else "success", "message": op.get("message", "")}
+
+
+def apply(op, client=None):
+    result = {"row": op["row"], "email": op["email"], "action": op["action"], "user_id": op.get("user_id")}
+    if op["action"] in ("skip", "unchanged"):
+        return _skipped(op, result)
+
+    client = client or get_client()
+    route, kwargs = _upstream_call(op)
+    try:
+        res = client.post(route, op="bulk", **kwargs)
+        res.raise_for_status()
+        return _applied(op, result, res)
+    except Exception as e:
+        return _failed(result, e)
+
+
+async def aapply(op):
+    result = {"row": op["row"], "email": op["email"], "action": op["action"], "user_id": op.get("user_id")}
+    if op["action"] in ("skip", "unchanged"):
+        return _skipped(op, result)
+
+    route, kwargs = _upstream_call(op)
+    try:
+        res = await get_async_client().post(route, op="bulk", **kwargs)
+        res.raise_for_status()
+        return _applied(op, result, res)
+    except Exception as e:
+        return _failed(result, e)
+
+
+def import_users(entity_id, lines, concurrency=None, client=None):
+    """Import users from CSV ``lines`` into ``entity_id`` and yield one result
+    dict (``RESULT_FIELDS``) per row, in completion order."""
+    existing = existing_users(entity_id, client)
+    ops = plan(entity_id, read_rows(lines), existing)
+    try:
+        for _, result, error in fan_out(lambda op: apply(op, client), ops, concurrency):
+            yield result if error is None else {"status": "error", "message": str(error)}
+    finally:
+        ref_cache.invalidate("users", entity_id)
+
+
+async def aimport_users(entity_id, lines, concurrency=None):
+    """Async ``import_users`` for the ASGI views: the upstream calls run on
+    the event loop, at most ``concurrency`` at a time."""
+    existing = await aexisting_users(entity_id)
+    ops = plan(entity_id, read_rows(lines), existing)
+    try:
+        async for _, result, error in afan_out(aapply, ops, concurrency):
+            yield result if error is None else {"status": "error", "message": str(error)}
+    finally:
+        await ref_cache.ainvalidate("users", entity_id)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def result_csv_lines(results):
+    """Render results as CSV text, one line per result, for streaming."""
+    writer = csv.DictWriter(_Echo(), fieldnames=RESULT_FIELDS, extrasaction="ignore")
+    yield writer.writeheader()
+    for result in results:
+        yield writer.writerow(result)
+
+
+async def aresult_csv_lines(results):
+    writer = csv.DictWriter(_Echo(), fieldnames=RESULT_FIELDS, extrasaction="ignore")
+    yield writer.writeheader()
+    async for result in results:
+        yield writer.writerow(result)
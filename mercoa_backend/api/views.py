@@ -1,30 +1,51 @@
 import json
+import math
 import os
 import base64
+import io
 import requests
-import traceback
-from django.http import JsonResponse, HttpResponseNotAllowed
+import logging
+import uuid
+from django.http import FileResponse, HttpResponse, JsonResponse, HttpResponseNotAllowed, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate, login
 from django.contrib.auth import get_user_model
 from django.contrib.auth.hashers import make_password
-from .models import Profile
+from .models import Job, Profile
+from .mercoa_client import get_client
+from .resilience import UpstreamUnavailable, breakers
+from .metrics import registry as metrics_registry
+from .single_flight import single_flight
+from .session_context import entity_context, store_entity_context
+from . import aging
+from .invoice_mirror import ensure_fresh, read_entity_invoices_raw, stream_entity_invoices, upsert_invoice
+from .streaming import prime, streaming_response
+from .fast_json import FastJsonResponse, raw_json_response
+from .conditional import etag, not_modified, not_modified_response, with_etag
+from .projection import invoice_page, project, resolve_fields
+from .token_cache import get_entity_token
+from .ref_cache import ref_cache
+from . import webhooks
+from . import uploads
+from .fanout import fan_out
+from . import jobs
+from . import user_import
+from .user_import import user_payload
 from django.conf import settings
 
-from datetime import datetime, timezone
 from dateutil.parser import parse as parse_date
 
-MERCOA_API_KEY = os.getenv("MERCOA_API_KEY")
-MERCOA_API_URL = "https://api.mercoa.com/entity"
 UPLOAD_DIR = "uploads/"
+IMPORT_DIR = os.path.join(UPLOAD_DIR, "imports")
+logger = logging.getLogger(__name__)
 User = get_user_model()
+mercoa = get_client()
 
-
-def make_headers():
-    return {
-        "Authorization": f"Bearer {MERCOA_API_KEY}",
-        "Content-Type": "application/json"
-    }
+def unavailable_response(e):
+    # Mercoa is failing or our budget for it is spent: say when to come back rather than a bare 500
+    response = JsonResponse({"status": "error", "message": str(e)}, status=503)
+    response["Retry-After"] = str(max(math.ceil(e.retry_after or 0), 1))
+    return response
 
 @csrf_exempt
 def get_mercoa_token(request):
@@ -35,40 +56,46 @@ def get_mercoa_token(request):
         data = json.loads(request.body)
         email = data.get("email")
 
-        user = User.objects.get(username=email)
-        profile = user.profile
+        context = entity_context(request, email)
+        if context is None:
+            return JsonResponse({"status": "error", "message": "Email required."}, status=400)
 
-        if not profile.entity_id:
+        if not context["entity_id"]:
             return JsonResponse({"status": "error", "message": "Entity not onboarded"}, status=400)
 
-        url = f"https://api.mercoa.com/entity/{profile.entity_id}/token"
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        res = requests.post(url, headers=headers, json={})
-        res.raise_for_status()
-
-        print("📨 Mercoa token raw response:", res.text)
-
-        token = res.text.strip('"')  # ✅ just clean the raw string
+        token = get_entity_token(context["entity_id"], mint_entity_token)
         return JsonResponse({"status": "success", "token": token})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.HTTPError as api_err:
-        print("❌ Mercoa API Error:", api_err)
-        print("🔍 Mercoa Response:", res.text if 'res' in locals() else "No response")
+        res = api_err.response
+        logger.warning("❌ Mercoa API error: %s", api_err, extra={"payload": res.text if res is not None else None})
         return JsonResponse({
             "status": "error",
             "message": "Mercoa API failed",
             "details": str(api_err),
-            "response": res.text if 'res' in locals() else None,
-        }, status=res.status_code if 'res' in locals() else 500)
+            "response": res.text if res is not None else None,
+        }, status=res.status_code if res is not None else 500)
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+def fetch_raw(route, **path_params):
+    # Identical concurrent reads share one upstream call; the body stays
+    # undecoded for views that pass it straight through
+    def load():
+        res = mercoa.get(route, **path_params)
+        res.raise_for_status()
+        return res.content
+    return single_flight.do(("raw", mercoa.url(route, **path_params)), load)
+
+def mint_entity_token(entity_id):
+    res = mercoa.post("/entity/{entity_id}/token", op="token", json={}, entity_id=entity_id)
+    res.raise_for_status()
+    return res.text.strip('"')  # ✅ just clean the raw string
+
 def save_base64_file(base64_string, filename, upload_dir=UPLOAD_DIR):
     try:
         format, imgstr = base64_string.split(';base64,')
@@ -83,7 +110,7 @@ def save_base64_file(base64_string, filename, upload_dir=UPLOAD_DIR):
 
         return file_path
     except Exception as e:
-        print(f"❌ Error while saving {filename}: {e}")
+        logger.warning("❌ Error while saving %s: %s", filename, e)
         raise ValueError(f"Error saving {filename}: {e}")
 
 @csrf_exempt
@@ -128,17 +155,159 @@ def login_view(request):
         if user:
             login(request, user)
             profile, _ = Profile.objects.get_or_create(user=user)
+            context = store_entity_context(request, profile, user.username)
             return JsonResponse({
                 "status": "ok",
-                "entity_id": profile.entity_id,
-                "entity_name": profile.entity_name,
-                "entity_logo": profile.entity_logo,
+                "entity_id": context["entity_id"],
+                "entity_name": context["entity_name"],
+                "entity_logo": context["entity_logo"],
             })
         return JsonResponse({"status": "invalid"}, status=401)
 
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=400)
 
+def build_entity_payload(data):
+    address = data["address"]
+    return {
+        "isCustomer": True,
+        "isPayor": True,
+        "isPayee": False,
+        "accountType": "business",
+        "foreignId": data.get("foreignId"),
+        "profile": {
+            "business": {
+                "email": data.get("email"),
+                "legalBusinessName": data.get("legalBusinessName"),
+                "website": data.get("website"),
+                "businessType": data.get("businessType", "llc").lower(),
+                "phone": {
+                    "countryCode": "1",
+                    "number": data.get("phone")
+                },
+                "address": {
+                    "addressLine1": address.get("addressLine1"),
+                    "addressLine2": address.get("addressLine2"),
+                    "city": address.get("city"),
+                    "stateOrProvince": address.get("stateOrProvince"),
+                    "postalCode": address.get("postalCode"),
+                    "country": address.get("country", "US")
+                },
+                "taxId": {
+                    "ein": {
+                        "number": data.get("ein")
+                    }
+                }
+            }
+        }
+    }
+
+
+def onboard_entity(profile, data, saved_files, entity_logo=""):
+    """Create the Mercoa entity for ``profile`` and store its id.
+    Returns the response body and HTTP status for the caller to send."""
+    res = mercoa.post("/entity", json=build_entity_payload(data))
+    return finish_onboarding(profile, data, res, saved_files, entity_logo)
+
+
+def finish_onboarding(profile, data, res, saved_files, entity_logo=""):
+    # Mercoa's answer to the entity creation, stored on the profile when it worked
+    if res.status_code != 200:
+        logger.warning("❌ Mercoa API error: %s", res.status_code, extra={"payload": res.text})
+        return {
+            "status": "error",
+            "message": "Mercoa API error",
+            "details": res.text
+        }, res.status_code
+
+    response_data = res.json()
+    entity_id = response_data.get("id")
+
+    if not entity_id:
+        logger.error("❌ Missing entityId in response", extra={"payload": response_data})
+        return {
+            "status": "error",
+            "message": "Mercoa API did not return entityId",
+            "raw_response": response_data
+        }, 500
+
+    profile.entity_id = entity_id
+    profile.entity_name = data.get("legalBusinessName", "")
+    profile.entity_logo = entity_logo or ""
+    profile.save()
+
+    return {
+        "status": "success",
+        "entity_id": entity_id,
+        "saved_files": saved_files,
+    }, 200
+
+
+def queued(job):
+    return JsonResponse({"status": "queued", "job_id": job.pk, "job_url": f"/api/jobs/{job.pk}/"}, status=202)
+
+
+def queue_job(kind, payload, priority, default_priority, serial_key=""):
+    # "priority" comes from the caller: clamped to jobs.MIN_PRIORITY..MAX_PRIORITY, 400 if not a whole number
+    try:
+        priority = jobs.requested_priority(priority, default_priority)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    return queued(jobs.enqueue(kind, payload, priority=priority, serial_key=serial_key))
+
+
+def onboarding_profile(email):
+    try:
+        user = User.objects.select_related("profile").get(username=email)
+    except User.DoesNotExist:
+        return None
+    return getattr(user, "profile", None) or Profile.objects.create(user=user)
+
+
+def already_onboarded(profile):
+    return JsonResponse({
+        "status": "already_onboarded",
+        "entity_id": profile.entity_id,
+        "entity_name": profile.entity_name,
+        "entity_logo": profile.entity_logo,
+    })
+
+
+def save_base64_documents(data):
+    # Optional base64 file save
+    def try_save(key, filename):
+        try:
+            return save_base64_file(data[key], filename) if data.get(key) else None
+        except Exception as e:
+            logger.warning("⚠️ Skipping %s due to error: %s", key, e)
+            return None
+
+    return {
+        "logo": try_save("logo", "logo"),
+        "w9": try_save("w9", "w9"),
+        "form1099": try_save("form1099", "form1099"),
+        "bankStatement": try_save("bankStatement", "bank_statement"),
+    }
+
+
+def oversized_logo(data):
+    if data.get("logo") and uploads.logo_too_large(data["logo"]):
+        return JsonResponse({
+            "status": "error",
+            "message": f"logo exceeds {uploads.max_logo_size()} bytes"
+        }, status=413)
+    return None
+
+
+def queue_onboarding(email, data, saved_files):
+    # Documents are on disk already and the logo travels as entity_logo;
+    # don't copy the base64 blobs into the queue
+    job_data = {k: v for k, v in data.items() if k not in ("logo", "w9", "form1099", "bankStatement")}
+    return queue_job("onboard_entity", {
+        "email": email, "data": job_data, "saved_files": saved_files, "entity_logo": data.get("logo", ""),
+    }, data.get("priority"), 10, serial_key=email)
+
+
 @csrf_exempt
 def create_entity(request):
     if request.method != "POST":
@@ -148,109 +317,109 @@ def create_entity(request):
         email = data.get("email")
         if not email:
             return JsonResponse({"status": "error", "message": "Email required."}, status=400)
+        logo_error = oversized_logo(data)
+        if logo_error is not None:
+            return logo_error
 
-        try:
-            user = User.objects.get(username=email)
-            profile, _ = Profile.objects.get_or_create(user=user)
-        except User.DoesNotExist:
+        profile = onboarding_profile(email)
+        if profile is None:
             return JsonResponse({"status": "error", "message": "User not found."}, status=400)
 
         # ✅ If already onboarded
         if profile.entity_id:
-            return JsonResponse({
-                "status": "already_onboarded",
-                "entity_id": profile.entity_id,
-                "entity_name": profile.entity_name,
-                "entity_logo": profile.entity_logo,
-            })
+            return already_onboarded(profile)
 
-        # Optional base64 file save
-        def try_save(key, filename):
-            try:
-                return save_base64_file(data[key], filename) if data.get(key) else None
-            except Exception as e:
-                print(f"⚠️ Skipping {key} due to error: {e}")
-                return None
-
-        logo_path = try_save("logo", "logo")
-        w9_path = try_save("w9", "w9")
-        form1099_path = try_save("form1099", "form1099")
-        bank_statement_path = try_save("bankStatement", "bank_statement")
-
-        payload = {
-            "isCustomer": True,
-            "isPayor": True,
-            "isPayee": False,
-            "accountType": "business",
-            "foreignId": data.get("foreignId"),
-            "profile": {
-                "business": {
-                    "email": data.get("email"),
-                    "legalBusinessName": data.get("legalBusinessName"),
-                    "website": data.get("website"),
-                    "businessType": data.get("businessType", "llc").lower(),
-                    "phone": {
-                        "countryCode": "1",
-                        "number": data.get("phone")
-                    },
-                    "address": {
-                        "addressLine1": data["address"].get("addressLine1"),
-                        "addressLine2": data["address"].get("addressLine2"),
-                        "city": data["address"].get("city"),
-                        "stateOrProvince": data["address"].get("stateOrProvince"),
-                        "postalCode": data["address"].get("postalCode"),
-                        "country": data["address"].get("country", "US")
-                    },
-                    "taxId": {
-                        "ein": {
-                            "number": data.get("ein")
-                        }
-                    }
-                }
-            }
-        }
+        saved_files = save_base64_documents(data)
+        if data.get("background"):
+            return queue_onboarding(email, data, saved_files)
 
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        body, status = onboard_entity(profile, data, saved_files, entity_logo=data.get("logo", ""))
+        if status == 200:
+            store_entity_context(request, profile, email)
+        return JsonResponse(body, status=status)
 
-        res = requests.post(MERCOA_API_URL, headers=headers, json=payload)
-        if res.status_code != 200:
-            print("❌ Mercoa API Error:", res.status_code, res.text)
-            return JsonResponse({
-                "status": "error",
-                "message": "Mercoa API error",
-                "details": res.text
-            }, status=res.status_code)
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except requests.exceptions.RequestException as api_err:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API request failed.",
+            "details": str(api_err)
+        }, status=500)
 
-        response_data = res.json()
-        entity_id = response_data.get("id")
+    except Exception as general_err:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({
+            "status": "error",
+            "message": f"Unexpected error: {str(general_err)}"
+        }, status=500)
 
-        if not entity_id:
-            print("❌ Missing entityId in response:", response_data)
-            return JsonResponse({
-                "status": "error",
-                "message": "Mercoa API did not return entityId",
-                "raw_response": response_data
-            }, status=500)
+def read_onboarding_upload(request):
+    """Parse a multipart onboarding request, its documents streamed to disk.
+    Returns ``(response, None)`` when it can be answered right away, else
+    ``(None, (email, data, profile, saved_files, entity_logo))``."""
+    try:
+        content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        content_length = 0
+    if content_length > uploads.max_total_size():
+        return JsonResponse({
+            "status": "error",
+            "message": f"Upload exceeds {uploads.max_total_size()} bytes."
+        }, status=413), None
 
-        profile.entity_id = entity_id
-        profile.entity_name = data.get("legalBusinessName", "")
-        profile.entity_logo = data.get("logo", "")
-        profile.save()
+    handler = uploads.DocumentUploadHandler(request, UPLOAD_DIR)
+    request.upload_handlers = [handler]
+    data = json.loads(request.POST.get("data") or "{}")
+    files = request.FILES
+    if handler.errors:
+        return JsonResponse({"status": "error", "message": handler.errors[0]}, status=413), None
 
-        return JsonResponse({
-            "status": "success",
-            "entity_id": entity_id,
-            "saved_files": {
-                "logo": logo_path,
-                "w9": w9_path,
-                "form1099": form1099_path,
-                "bankStatement": bank_statement_path
-            }
-        })
+    email = data.get("email")
+    if not email:
+        return JsonResponse({"status": "error", "message": "Email required."}, status=400), None
+
+    profile = onboarding_profile(email)
+    if profile is None:
+        return JsonResponse({"status": "error", "message": "User not found."}, status=400), None
+
+    if profile.entity_id:
+        return already_onboarded(profile), None
+
+    saved_files = {field: files[field].path if field in files else None for field in uploads.DOCUMENT_FIELDS}
+    # Same representation as the JSON path, so clients can render it directly
+    entity_logo = uploads.data_uri(files["logo"]) if "logo" in files else ""
+    return None, (email, data, profile, saved_files, entity_logo)
+
+
+def queue_upload_onboarding(email, data, saved_files, entity_logo):
+    return queue_job("onboard_entity", {
+        "email": email, "data": data, "saved_files": saved_files, "entity_logo": entity_logo,
+    }, data.get("priority"), 10, serial_key=email)
+
+
+@csrf_exempt
+def create_entity_upload(request):
+    """Multipart variant of create_entity: the JSON body goes in the ``data``
+    field and the documents as file parts, streamed to disk as they arrive."""
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
 
+    try:
+        response, upload = read_onboarding_upload(request)
+        if response is not None:
+            return response
+        email, data, profile, saved_files, entity_logo = upload
+        if data.get("background"):
+            return queue_upload_onboarding(email, data, saved_files, entity_logo)
+
+        body, status = onboard_entity(profile, data, saved_files, entity_logo=entity_logo)
+        if status == 200:
+            store_entity_context(request, profile, email)
+        return JsonResponse(body, status=status)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as api_err:
         return JsonResponse({
             "status": "error",
@@ -259,7 +428,7 @@ def create_entity(request):
         }, status=500)
 
     except Exception as general_err:
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({
             "status": "error",
             "message": f"Unexpected error: {str(general_err)}"
@@ -277,35 +446,75 @@ def list_invoices(request):
         if not entity_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
 
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        # ✅ Correct endpoint
-        url = f"https://api.mercoa.com/entity/{entity_id}/invoices"
-        res = requests.get(url, headers=headers)
-        res.raise_for_status()
-
-        invoices = res.json()
-        print("📄 Invoices:", invoices)
-
-        return JsonResponse({"status": "success", "invoices": invoices})
-
+        # "fields": ["id", "vendor.name", ...] or "view": "grid" | "aging" | "export" | "compact"
+        try:
+            fields = resolve_fields(data.get("fields"), data.get("view"))
+        except ValueError as e:
+            return JsonResponse({"status": "error", "message": str(e)}, status=400)
+
+        # "stream": "json" | "ndjson" follows every upstream page and streams invoices as they arrive
+        stream = data.get("stream")
+        if stream:
+            invoices = prime(project(invoice, fields) for invoice in stream_entity_invoices(entity_id, max_age=data.get("max_age")))
+            return streaming_response(invoices, stream, "invoices")
+
+        # Served from the local mirror; refreshed from Mercoa when older than max_age seconds
+        # and passed through as stored, without decoding every invoice
+        version = ensure_fresh(entity_id, max_age=data.get("max_age"))
+        tag = etag("invoices", entity_id, version, fields)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+
+        rows = read_entity_invoices_raw(entity_id)
+        logger.debug("📄 Invoices", extra={"entity_id": entity_id, "count": len(rows)})
+
+        return with_etag(raw_json_response("invoices", invoice_page(rows, fields)), tag)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
-        print("❌ Invoice fetch failed:", e)
-        print("🔍 Response:", res.text if 'res' in locals() else "No response")
+        response_text = e.response.text if e.response is not None else None
+        logger.warning("❌ Invoice fetch failed: %s", e, extra={"payload": response_text})
         return JsonResponse({
             "status": "error",
             "message": "API request failed",
             "details": str(e),
-            "response": res.text if 'res' in locals() else None
+            "response": response_text
         }, status=500)
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+INVOICE_REQUIRED_FIELDS = ["status", "payerId", "creatorEntityId", "payeeId", "dueDate", "lineItems"]
+
+
+def validate_invoice(data):
+    for field in INVOICE_REQUIRED_FIELDS:
+        if not data.get(field):
+            return f"Missing required field: {field}"
+    return None
+
+
+def build_invoice_payload(data):
+    return {
+        "status": data["status"],
+        "payerId": data["payerId"],
+        "creatorEntityId": data["creatorEntityId"],
+        "vendorId": data["payeeId"],  # Mercoa expects vendorId not payeeId
+        "dueDate": data["dueDate"],
+        "invoiceDate": data.get("invoiceDate", data["dueDate"]),
+        "memo": data.get("memo", ""),
+        "noteToSelf": data.get("noteToSelf", ""),
+        "invoiceNumber": data.get("invoiceNumber", ""),
+        "currency": data.get("currency", "USD"),
+        "lineItems": data["lineItems"],
+        "foreignId": data.get("foreignId"),
+        "paymentSourceId": data.get("paymentSourceId"),
+        "paymentDestinationId": data.get("paymentDestinationId"),
+        "paymentDestinationOptions": data.get("paymentDestinationOptions"),
+    }
+
 @csrf_exempt
 def create_invoice(request):
     if request.method != "POST":
@@ -314,45 +523,123 @@ def create_invoice(request):
     try:
         data = json.loads(request.body)
 
-        required_fields = ["status", "payerId", "creatorEntityId", "payeeId", "dueDate", "lineItems"]
-        for field in required_fields:
-            if not data.get(field):
-                return JsonResponse({"status": "error", "message": f"Missing required field: {field}"}, status=400)
-
-        payload = {
-            "status": data["status"],
-            "payerId": data["payerId"],
-            "creatorEntityId": data["creatorEntityId"],
-            "vendorId": data["payeeId"],  # Mercoa expects vendorId not payeeId
-            "dueDate": data["dueDate"],
-            "invoiceDate": data.get("invoiceDate", data["dueDate"]),
-            "memo": data.get("memo", ""),
-            "noteToSelf": data.get("noteToSelf", ""),
-            "invoiceNumber": data.get("invoiceNumber", ""),
-            "currency": data.get("currency", "USD"),
-            "lineItems": data["lineItems"],
-            "foreignId": data.get("foreignId"),
-            "paymentSourceId": data.get("paymentSourceId"),
-            "paymentDestinationId": data.get("paymentDestinationId"),
-            "paymentDestinationOptions": data.get("paymentDestinationOptions"),
-        }
-
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        error = validate_invoice(data)
+        if error:
+            return JsonResponse({"status": "error", "message": error}, status=400)
 
-        res = requests.post("https://api.mercoa.com/invoice", headers=headers, json=payload)
+        res = mercoa.post("/invoice", json=build_invoice_payload(data))
         res.raise_for_status()
-        return JsonResponse({"status": "success", "invoice": res.json()})
+        invoice = res.json()
+        upsert_invoice(data["payerId"], invoice)
+        return JsonResponse({"status": "success", "invoice": invoice})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
         return JsonResponse({
             "status": "error", "message": "Mercoa API error", "details": str(e),
             "response": e.response.text if e.response else None
         }, status=500)
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+def bulk_item_error(index, error):
+    response = getattr(error, "response", None)
+    if response is None:
+        return {"index": index, "status": "error", "message": str(error)}
+    return {
+        "index": index,
+        "status": "error",
+        "message": "Mercoa API error",
+        "code": response.status_code,
+        "details": response.text,
+    }
+
+
+def create_one_invoice(data):
+    res = mercoa.post("/invoice", op="bulk", json=build_invoice_payload(data))
+    res.raise_for_status()
+    return res.json()
+
+
+def bulk_create_results(invoices, concurrency=None):
+    for index, invoice, error in fan_out(create_one_invoice, invoices, concurrency):
+        if error is not None:
+            yield bulk_item_error(index, error)
+            continue
+        try:
+            upsert_invoice(invoices[index]["payerId"], invoice)
+        except Exception as e:
+            logger.warning("⚠️ Created invoice not mirrored: %s", e)
+        yield {"index": index, "status": "success", "invoice": invoice}
+
+
+def bulk_summary(results):
+    results = sorted(results, key=lambda r: r["index"])
+    succeeded = sum(1 for r in results if r["status"] == "success")
+    return {
+        "status": "success",
+        "count": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "results": results,
+    }
+
+
+def bulk_create_error(invoices):
+    if not isinstance(invoices, list) or not invoices:
+        return JsonResponse({"status": "error", "message": "Missing invoices"}, status=400)
+    if len(invoices) > settings.MERCOA_BULK_MAX_ITEMS:
+        return JsonResponse({
+            "status": "error",
+            "message": f"At most {settings.MERCOA_BULK_MAX_ITEMS} invoices per request"
+        }, status=400)
+
+    # Nothing is created unless every invoice is valid
+    errors = []
+    for index, invoice in enumerate(invoices):
+        error = validate_invoice(invoice) if isinstance(invoice, dict) else "Invoice must be an object"
+        if error:
+            errors.append({"index": index, "message": error})
+    if errors:
+        return JsonResponse({"status": "error", "message": "Validation failed", "errors": errors}, status=400)
+    return None
+
+
+def queue_bulk_create(invoices, priority):
+    payers = {invoice["payerId"] for invoice in invoices}
+    return queue_job(
+        "bulk_create_invoices", {"invoices": invoices},
+        priority, 0, serial_key=payers.pop() if len(payers) == 1 else "",
+    )
+
+
+@csrf_exempt
+def bulk_create_invoices(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        data = json.loads(request.body)
+        invoices = data.get("invoices")
+
+        error = bulk_create_error(invoices)
+        if error is not None:
+            return error
+
+        if data.get("background"):
+            return queue_bulk_create(invoices, data.get("priority"))
+
+        logger.info("📦 Creating %d invoices", len(invoices))
+        results = bulk_create_results(invoices)
+        stream = data.get("stream")
+        if stream:
+            return streaming_response(results, stream, "results")
+        return FastJsonResponse(bulk_summary(results))
+
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 @csrf_exempt
@@ -367,25 +654,16 @@ def create_entity_user(request):
         name = data.get("name", "")
         roles = data.get("roles", ["admin"])  # must be a list
 
-        payload = {
-            "email": email,
-            "name": name,
-            "foreignId": email,
-            "roles": roles
-        }
+        payload = user_payload(email, name, roles)
 
-        res = requests.post(
-            f"https://api.mercoa.com/entity/{entity_id}/user",
-            headers={
-                "Authorization": f"Bearer {MERCOA_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            data=json.dumps(payload)
-        )
+        res = mercoa.post("/entity/{entity_id}/user", json=payload, entity_id=entity_id)
 
         res.raise_for_status()
+        ref_cache.invalidate("users", entity_id)
         return JsonResponse({"status": "success", "user": res.json()})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
         return JsonResponse({
             "status": "error",
@@ -409,20 +687,17 @@ def list_entity_users(request):
         if not entity_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
 
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        url = f"https://api.mercoa.com/entity/{entity_id}/users"
-        res = requests.get(url, headers=headers)
-        res.raise_for_status()
+        users, digest = ref_cache.get_or_load_tagged(
+            "users", entity_id, lambda: fetch_raw("/entity/{entity_id}/users", entity_id=entity_id)
+        )
+        tag = etag("users", digest)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
 
-        return JsonResponse({
-            "status": "success",
-            "users": res.json()
-        })
+        return with_etag(raw_json_response("users", users), tag)
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
         return JsonResponse({
             "status": "error",
@@ -433,6 +708,63 @@ def list_entity_users(request):
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+def queue_user_import(entity_id, upload, priority):
+    priority = jobs.requested_priority(priority, 0)  # before anything is written
+    os.makedirs(IMPORT_DIR, exist_ok=True)
+    csv_path = os.path.join(IMPORT_DIR, f"users-{uuid.uuid4().hex}.csv")
+    with open(csv_path, "wb") as f:
+        for chunk in upload.chunks():
+            f.write(chunk)
+    return queued(jobs.enqueue(
+        "import_entity_users",
+        {"entity_id": entity_id, "csv_path": csv_path, "results_path": f"{csv_path[:-4]}-results.csv"},
+        priority=priority, serial_key=entity_id,
+    ))
+
+
+def user_import_response(results):
+    response = StreamingHttpResponse(results, content_type="text/csv")
+    response["Content-Disposition"] = 'attachment; filename="user-import-results.csv"'
+    return response
+
+
+@csrf_exempt
+def import_entity_users(request):
+    """Create or update entity users from an uploaded CSV (``file``) and
+    stream back a CSV with one result per row."""
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        entity_id = request.POST.get("entity_id")
+        upload = request.FILES.get("file")
+
+        if not entity_id or upload is None:
+            return JsonResponse({"status": "error", "message": "Missing entity_id or file"}, status=400)
+
+        if request.POST.get("background"):
+            return queue_user_import(entity_id, upload, request.POST.get("priority"))
+
+        logger.info("👥 Importing users for %s from %s", entity_id, upload.name)
+        lines = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        results = user_import.result_csv_lines(prime(user_import.import_users(entity_id, lines)))
+        return user_import_response(results)
+
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except requests.exceptions.RequestException as e:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API error",
+            "details": str(e),
+            "response": e.response.text if e.response is not None else None
+        }, status=500)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
 @csrf_exempt
 def update_entity_user(request):
     if request.method != "POST":
@@ -449,31 +781,20 @@ def update_entity_user(request):
         if not entity_id or not user_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id or user_id"}, status=400)
 
-        payload = {
-            "email": email,
-            "name": name,
-            "roles": roles,
-            "foreignId": email,  # You can customize this if needed
-        }
+        payload = user_payload(email, name, roles)
 
-        url = f"https://api.mercoa.com/entity/{entity_id}/user/{user_id}"
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        logger.debug("📦 Updating entity user", extra={"entity_id": entity_id, "user_id": user_id, "payload": payload})
 
-        print("📥 Incoming data:", data)
-        print("🔗 POST URL:", url)
-        print("📦 POST payload:", payload)
-
-        res = requests.post(url, headers=headers, json=payload)
+        res = mercoa.post("/entity/{entity_id}/user/{user_id}", json=payload, entity_id=entity_id, user_id=user_id)
         res.raise_for_status()
+        ref_cache.invalidate("users", entity_id)
 
         return JsonResponse({"status": "success", "user": res.json()})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
-        print("❌ Mercoa API error:", e)
-        print("🔍 Response:", e.response.text if e.response else "No response")
+        logger.warning("❌ Mercoa API error: %s", e, extra={"payload": e.response.text if e.response else None})
         return JsonResponse({
             "status": "error",
             "message": "Mercoa API error",
@@ -482,8 +803,7 @@ def update_entity_user(request):
         }, status=500)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 @csrf_exempt
@@ -499,17 +819,14 @@ def delete_entity_user(request):
         if not entity_id or not user_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id or user_id"}, status=400)
 
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        url = f"https://api.mercoa.com/entity/{entity_id}/user/{user_id}"
-        res = requests.delete(url, headers=headers)
+        res = mercoa.delete("/entity/{entity_id}/user/{user_id}", entity_id=entity_id, user_id=user_id)
         res.raise_for_status()
+        ref_cache.invalidate("users", entity_id)
 
         return JsonResponse({"status": "success", "message": "User deleted"})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
         return JsonResponse({
             "status": "error",
@@ -520,6 +837,27 @@ def delete_entity_user(request):
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+def build_policy_payload(amount, currency, roles, num_approvers):
+    return {
+        "trigger": [
+            {
+                "type": "amount",
+                "amount": amount,
+                "currency": currency,
+            }
+        ],
+        "rule": {
+            "type": "approver",
+            "numApprovers": num_approvers,
+            "identifierList": {
+                "type": "rolesList",
+                "value": roles
+            }
+        },
+        "upstreamPolicyId": "root"
+    }
+
+
 @csrf_exempt
 def create_approval_policy(request):
     if request.method != "POST":
@@ -537,36 +875,16 @@ def create_approval_policy(request):
         if not entity_id or not amount or not roles:
             return JsonResponse({"status": "error", "message": "Missing required fields"}, status=400)
 
-        payload = {
-            "trigger": [
-                {
-                    "type": "amount",
-                    "amount": amount,
-                    "currency": currency,
-                }
-            ],
-            "rule": {
-                "type": "approver",
-                "numApprovers": num_approvers,
-                "identifierList": {
-                    "type": "rolesList",
-                    "value": roles
-                }
-            },
-            "upstreamPolicyId": "root"
-        }
-
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
+        payload = build_policy_payload(amount, currency, roles, num_approvers)
 
-        url = f"https://api.mercoa.com/entity/{entity_id}/approval-policy"
-        res = requests.post(url, headers=headers, json=payload)
+        res = mercoa.post("/entity/{entity_id}/approval-policy", json=payload, entity_id=entity_id)
         res.raise_for_status()
+        ref_cache.invalidate("approval_policies", entity_id)
 
         return JsonResponse({"status": "success", "policy": res.json()})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
         return JsonResponse({
             "status": "error",
@@ -576,7 +894,7 @@ def create_approval_policy(request):
         }, status=500)
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 @csrf_exempt
@@ -591,20 +909,21 @@ def list_approval_policies(request):
         if not entity_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
 
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        url = f"https://api.mercoa.com/entity/{entity_id}/approval-policies"  # ← ✅ this must end with -policies
-        res = requests.get(url, headers=headers)
-        res.raise_for_status()
+        # ← ✅ this must end with -policies
+        policies, digest = ref_cache.get_or_load_tagged(
+            "approval_policies", entity_id,
+            lambda: fetch_raw("/entity/{entity_id}/approval-policies", entity_id=entity_id),
+        )
+        tag = etag("policies", digest)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
 
-        return JsonResponse({"status": "success", "policies": res.json()})
+        return with_etag(raw_json_response("policies", policies), tag)
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
-        print("❌ Mercoa API error:", str(e))
-        print("🔍 Response:", e.response.text if e.response else "No response")
+        logger.warning("❌ Mercoa API error: %s", e, extra={"payload": e.response.text if e.response else None})
         return JsonResponse({
             "status": "error",
             "message": "Mercoa API error",
@@ -613,8 +932,7 @@ def list_approval_policies(request):
         }, status=500)
 
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 @csrf_exempt
@@ -634,37 +952,22 @@ def update_approval_policy(request):
         if not all([entity_id, policy_id]):
             return JsonResponse({"status": "error", "message": "Missing entity_id or policy_id"}, status=400)
 
-        payload = {
-            "trigger": [{
-                "type": "amount",
-                "amount": amount,
-                "currency": currency
-            }],
-            "rule": {
-                "type": "approver",
-                "numApprovers": num_approvers,
-                "identifierList": {
-                    "type": "rolesList",
-                    "value": roles
-                }
-            },
-            "upstreamPolicyId": "root"
-        }
+        payload = build_policy_payload(amount, currency, roles, num_approvers)
 
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        url = f"https://api.mercoa.com/entity/{entity_id}/approval-policy/{policy_id}"
-        print("📦 PATCH payload:", payload)
-        res = requests.post(url, headers=headers, json=payload)
+        logger.debug("📦 Updating approval policy", extra={"entity_id": entity_id, "policy_id": policy_id, "payload": payload})
+        res = mercoa.post(
+            "/entity/{entity_id}/approval-policy/{policy_id}",
+            json=payload, entity_id=entity_id, policy_id=policy_id,
+        )
         res.raise_for_status()
+        ref_cache.invalidate("approval_policies", entity_id)
 
         return JsonResponse({"status": "success", "policy": res.json()})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
-        print("❌ Mercoa PATCH error:", e)
+        logger.warning("❌ Mercoa approval policy update failed: %s", e)
         return JsonResponse({
             "status": "error",
             "message": "Mercoa API error",
@@ -672,8 +975,7 @@ def update_approval_policy(request):
             "response": e.response.text if e.response else None
         }, status=500)
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 
@@ -690,16 +992,16 @@ def delete_approval_policy(request):
         if not entity_id or not policy_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id or policy_id"}, status=400)
 
-        url = f"https://api.mercoa.com/entity/{entity_id}/approval-policy/{policy_id}"
-        headers = {
-            "Authorization": f"Bearer {MERCOA_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        res = requests.delete(url, headers=headers)
+        res = mercoa.delete(
+            "/entity/{entity_id}/approval-policy/{policy_id}",
+            entity_id=entity_id, policy_id=policy_id,
+        )
         res.raise_for_status()
+        ref_cache.invalidate("approval_policies", entity_id)
         return JsonResponse({"status": "success", "message": "Policy deleted"})
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
         return JsonResponse({
             "status": "error", "message": "Mercoa API error", "details": str(e),
@@ -708,6 +1010,38 @@ def delete_approval_policy(request):
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+def build_invoice_update_payload(data):
+    # Mercoa requires a full invoice object to update
+    payload = {
+        "status": "NEW",
+        "amount": data["amount"],
+        "currency": data["currency"],
+        "invoiceDate": data["invoiceDate"],
+        "dueDate": data["dueDate"],
+        "invoiceNumber": data["invoiceNumber"],
+        "noteToSelf": data["noteToSelf"],
+        "memo": data["memo"],
+        "payerId": data["payerId"],
+        "vendorId": data["vendorId"],
+        "creatorEntityId": data["creatorEntityId"],
+    }
+
+    # Only include if provided and non-empty
+    if data.get("paymentSourceId"):
+        payload["paymentSourceId"] = data["paymentSourceId"]
+
+    if data.get("paymentDestinationId"):
+        payload["paymentDestinationId"] = data["paymentDestinationId"]
+
+    if data.get("creatorUserId"):
+        payload["creatorUserId"] = data["creatorUserId"]
+
+    if data.get("lineItems"):
+        payload["lineItems"] = data["lineItems"]
+
+    return payload
+
+
 @csrf_exempt
 def update_invoice(request):
     if request.method != "POST":
@@ -719,52 +1053,24 @@ def update_invoice(request):
         if not invoice_id:
             return JsonResponse({"status": "error", "message": "Missing invoice_id"}, status=400)
 
-        print("📥 Received update payload:", data)
-
-        # Mercoa requires a full invoice object to update
-        payload = {
-            "status": "NEW",
-            "amount": data["amount"],
-            "currency": data["currency"],
-            "invoiceDate": data["invoiceDate"],
-            "dueDate": data["dueDate"],
-            "invoiceNumber": data["invoiceNumber"],
-            "noteToSelf": data["noteToSelf"],
-            "memo": data["memo"],
-            "payerId": data["payerId"],
-            "vendorId": data["vendorId"],
-            "creatorEntityId": data["creatorEntityId"],
-        }
-
-        # Only include if provided and non-empty
-        if data.get("paymentSourceId"):
-            payload["paymentSourceId"] = data["paymentSourceId"]
-
-        if data.get("paymentDestinationId"):
-            payload["paymentDestinationId"] = data["paymentDestinationId"]
-
-        if data.get("creatorUserId"):
-            payload["creatorUserId"] = data["creatorUserId"]
-
-        if data.get("lineItems"):
-            payload["lineItems"] = data["lineItems"]
+        payload = build_invoice_update_payload(data)
 
-        print("🔧 Sending update to Mercoa:", payload)
+        logger.debug("🔧 Sending invoice update to Mercoa", extra={"invoice_id": invoice_id, "payload": payload})
 
-        headers = make_headers()
-        url = f"https://api.mercoa.com/invoice/{invoice_id}"
-
-        res = requests.post(url, headers=headers, json=payload)
+        res = mercoa.post("/invoice/{invoice_id}", json=payload, invoice_id=invoice_id)
         res.raise_for_status()
+        invoice = res.json()
+        upsert_invoice(data["payerId"], invoice)
 
         return JsonResponse({
             "status": "success",
-            "invoice": res.json()
+            "invoice": invoice
         })
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.HTTPError as e:
-        print("❌ Mercoa API error:", e)
-        print("🔍 Response:", e.response.text if e.response else "No response")
+        logger.warning("❌ Mercoa API error: %s", e, extra={"payload": e.response.text if e.response else None})
         return JsonResponse({
             "status": "error",
             "message": "Mercoa API error",
@@ -773,7 +1079,7 @@ def update_invoice(request):
         }, status=e.response.status_code if e.response else 500)
 
     except Exception as e:
-        traceback.print_exc()
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 
@@ -784,7 +1090,7 @@ def create_payment_method_schema(request):
 
     try:
         payload = json.loads(request.body)
-        print("📥 Received schema creation payload:", payload)
+        logger.debug("📥 Creating payment method schema", extra={"payload": payload})
 
         # Validate required keys
         required_keys = ["name", "isSource", "isDestination", "fields"]
@@ -793,24 +1099,24 @@ def create_payment_method_schema(request):
             return JsonResponse({"status": "error", "message": f"Missing fields: {', '.join(missing_keys)}"}, status=400)
 
         # Mercoa request
-        api_url = "https://api.mercoa.com/paymentMethod/schema"
-        headers = make_headers()
-
-        response = requests.post(api_url, headers=headers, json=payload)
+        response = mercoa.post("/paymentMethod/schema", json=payload)
         if response.status_code in [200, 201]:
+            ref_cache.invalidate("payment_method_schemas")
             return JsonResponse({"status": "success", "schema": response.json()}, status=201)
         else:
-            print("❌ Mercoa API error:", response.status_code, response.text)
+            logger.warning("❌ Mercoa API error: %s", response.status_code, extra={"payload": response.text})
             return JsonResponse({
                 "status": "error",
                 "message": "Mercoa API error",
                 "details": response.text
             }, status=response.status_code)
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except json.JSONDecodeError:
         return JsonResponse({"status": "error", "message": "Invalid JSON"}, status=400)
     except Exception as e:
-        print("🔥 Exception:", str(e))
+        logger.exception("🔥 Payment method schema creation failed")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 @csrf_exempt
@@ -819,17 +1125,21 @@ def list_payment_method_schemas(request):
         return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
     
     try:
-        headers = make_headers()
-        response = requests.get("https://api.mercoa.com/paymentMethod/schema", headers=headers)
-        
-        if response.status_code == 200:
-            return JsonResponse({"status": "success", "schemas": response.json()})
-        else:
-            return JsonResponse({
-                "status": "error",
-                "message": "Mercoa API error",
-                "details": response.text
-            }, status=response.status_code)
+        schemas, digest = ref_cache.get_or_load_tagged(
+            "payment_method_schemas", None, lambda: fetch_raw("/paymentMethod/schema")
+        )
+        tag = etag("schemas", digest)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+        return with_etag(raw_json_response("schemas", schemas), tag)
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except requests.exceptions.HTTPError as e:
+        return JsonResponse({
+            "status": "error",
+            "message": "Mercoa API error",
+            "details": e.response.text
+        }, status=e.response.status_code)
     except Exception as e:
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
@@ -844,20 +1154,38 @@ def delete_payment_method_schema(request):
         if not schema_id:
             return JsonResponse({"status": "error", "message": "Missing schema_id"}, status=400)
 
-        print(f"🗑️ Deleting schema: {schema_id}")
-        url = f"https://api.mercoa.com/paymentMethod/schema/{schema_id}"
-        response = requests.delete(url, headers=make_headers())
+        logger.info("🗑️ Deleting schema %s", schema_id)
+        response = mercoa.delete("/paymentMethod/schema/{schema_id}", schema_id=schema_id)
 
         if response.status_code in [200, 204]:
+            ref_cache.invalidate("payment_method_schemas")
             return JsonResponse({"status": "success", "message": "Schema deleted"})
         else:
-            print("❌ Mercoa API error:", response.status_code, response.text)
+            logger.warning("❌ Mercoa API error: %s", response.status_code, extra={"payload": response.text})
             return JsonResponse({"status": "error", "message": "Mercoa API error", "details": response.text}, status=500)
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except Exception as e:
-        print("❌ Exception during deletion:", str(e))
+        logger.exception("❌ Exception during schema deletion")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+# 💡 Use your Mercoa business account user ID here
+APPROVER_USER_ID = "user_abcdef123456"  # Replace with dynamic lookup if needed
+
+
+def post_approval(invoice_id, user_id=APPROVER_USER_ID, op=None):
+    payload = {
+        "userId": user_id
+    }
+    return mercoa.post("/invoice/{invoice_id}/approve", op=op, json=payload, invoice_id=invoice_id)
+
+
+def approve_one_invoice(invoice_id):
+    response = post_approval(invoice_id, op="bulk")
+    response.raise_for_status()
+    return invoice_id
+
 @csrf_exempt
 def approve_invoice(request):
     if request.method != "POST":
@@ -870,29 +1198,67 @@ def approve_invoice(request):
         if not invoice_id:
             return JsonResponse({"status": "error", "message": "Missing invoice_id"}, status=400)
 
-        # 💡 Use your Mercoa business account user ID here
-        user_id = "user_abcdef123456"  # Replace with dynamic lookup if needed
-
-        url = f"https://api.mercoa.com/invoice/{invoice_id}/approve"
-
-        headers = make_headers()
-        payload = {
-            "userId": user_id
-        }
-
-        response = requests.post(url, headers=headers, json=payload)
+        response = post_approval(invoice_id)
 
         if response.status_code == 200:
             return JsonResponse({"status": "success"})
         else:
-            print("❌ Approval API error:", response.status_code, response.text)
+            logger.warning("❌ Approval API error: %s", response.status_code, extra={"payload": response.text})
             return JsonResponse({
                 "status": "error",
                 "message": "Mercoa API error",
                 "details": response.text
             }, status=response.status_code)
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
+    except Exception as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+def bulk_approve_results(invoice_ids):
+    for index, _, error in fan_out(approve_one_invoice, invoice_ids):
+        if error is not None:
+            logger.warning("❌ Approval failed for %s: %s", invoice_ids[index], error)
+            yield {**bulk_item_error(index, error), "invoice_id": invoice_ids[index]}
+        else:
+            yield {"index": index, "status": "success", "invoice_id": invoice_ids[index]}
+
+
+def bulk_approve_error(invoice_ids):
+    if not isinstance(invoice_ids, list) or not invoice_ids:
+        return JsonResponse({"status": "error", "message": "Missing invoice_ids"}, status=400)
+    if len(invoice_ids) > settings.MERCOA_BULK_MAX_ITEMS:
+        return JsonResponse({
+            "status": "error",
+            "message": f"At most {settings.MERCOA_BULK_MAX_ITEMS} invoices per request"
+        }, status=400)
+    return None
+
+
+@csrf_exempt
+def bulk_approve_invoices(request):
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "message": "Invalid method"}, status=405)
+
+    try:
+        data = json.loads(request.body)
+        invoice_ids = data.get("invoice_ids")
+
+        error = bulk_approve_error(invoice_ids)
+        if error is not None:
+            return error
+
+        if data.get("background"):
+            return queue_job("bulk_approve_invoices", {"invoice_ids": invoice_ids}, data.get("priority"), 5)
+
+        logger.info("✅ Approving %d invoices", len(invoice_ids))
+        stream = data.get("stream")
+        if stream:
+            return streaming_response(bulk_approve_results(invoice_ids), stream, "results")
+        return FastJsonResponse(bulk_summary(bulk_approve_results(invoice_ids)))
+
     except Exception as e:
+        logger.exception("🔥 Unexpected error")
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
 @csrf_exempt
@@ -907,18 +1273,29 @@ def list_vendors(request):
         if not entity_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
 
-        url = f"https://api.mercoa.com/entity/{entity_id}/counterparty"
-        headers = make_headers()
-
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
+        vendors, digest = ref_cache.get_or_load_tagged(
+            "vendors", entity_id, lambda: fetch_raw("/entity/{entity_id}/counterparty", entity_id=entity_id)
+        )
+        tag = etag("vendors", digest)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
 
-        return JsonResponse({"status": "success", "vendors": response.json()})
+        return with_etag(raw_json_response("vendors", vendors), tag)
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as e:
-        print("❌ Mercoa API Error:", e)
+        logger.warning("❌ Mercoa API error: %s", e)
         return JsonResponse({"status": "error", "message": str(e)}, status=500)
 
+def aging_report_etag(entity_id, version, data, fields):
+    # The report is a function of the mirror, the day it is aged to and the request
+    return etag(
+        "aging", entity_id, version, aging.today_utc(), aging.default_boundaries(),
+        data.get("statuses", ["APPROVED"]), data.get("boundaries"),
+        data.get("bucket"), data.get("page", 1), data.get("page_size", 50), fields,
+    )
+
 @csrf_exempt
 def ap_aging_report(request):
     if request.method != "POST":
@@ -930,61 +1307,104 @@ def ap_aging_report(request):
         if not entity_id:
             return JsonResponse({"status": "error", "message": "Missing entity_id"}, status=400)
 
-        url = f"https://api.mercoa.com/entity/{entity_id}/invoices"  # ✅ GET not POST
-        headers = make_headers()
-
-        # ✅ Fix: change to GET instead of POST
-        res = requests.get(url, headers=headers)
-        res.raise_for_status()
-        all_invoices = res.json().get("data", [])
-
-        now = datetime.now(timezone.utc)
-        aging_buckets = {
-            "Current": [],
-            "1-30 Days": [],
-            "31-60 Days": [],
-            "61-90 Days": [],
-            "90+ Days": [],
-        }
-        
         statuses = data.get("statuses", ["APPROVED"])
-        
-        for invoice in all_invoices:
-            if invoice.get("status") not in statuses:
-                continue
-
-            due_date_str = invoice.get("dueDate")
-            if not due_date_str:
-                continue
-
-            due_date = datetime.fromisoformat(due_date_str.replace("Z", "+00:00"))
-            days_past_due = (now - due_date).days
-
-            if days_past_due <= 0:
-                aging_buckets["Current"].append(invoice)
-            elif days_past_due <= 30:
-                aging_buckets["1-30 Days"].append(invoice)
-            elif days_past_due <= 60:
-                aging_buckets["31-60 Days"].append(invoice)
-            elif days_past_due <= 90:
-                aging_buckets["61-90 Days"].append(invoice)
-            else:
-                aging_buckets["90+ Days"].append(invoice)
-
-        return JsonResponse({
+        boundaries = data.get("boundaries")  # e.g. [0, 15, 30, 60, 90, 120]
+
+        fields = resolve_fields(data.get("fields"), data.get("view"))
+
+        # Make sure the local mirror is within the caller's freshness bound
+        version = ensure_fresh(entity_id, max_age=data.get("max_age"))
+        tag = aging_report_etag(entity_id, version, data, fields)
+        if not_modified(request, tag):
+            return not_modified_response(tag)
+
+        # One bucket's invoices, a page at a time, only when asked for
+        if data.get("bucket") is not None:
+            page = aging.bucket_page(
+                entity_id, statuses, data["bucket"],
+                page=data.get("page", 1), page_size=data.get("page_size", 50), boundaries=boundaries,
+                fields=fields,
+            )
+            return with_etag(FastJsonResponse({"status": "success", **page}), tag)
+
+        return with_etag(FastJsonResponse({
             "status": "success",
-            "aging": aging_buckets
-        })
+            "as_of": aging.today_utc().isoformat(),
+            "buckets": aging.summary(entity_id, statuses, boundaries),
+        }), tag)
 
+    except UpstreamUnavailable as e:
+        return unavailable_response(e)
     except requests.exceptions.RequestException as api_err:
-        print("❌ Mercoa API Error:", api_err)
+        logger.warning("❌ Mercoa API error: %s", api_err)
         return JsonResponse({
             "status": "error",
             "message": str(api_err)
         }, status=500)
+    except ValueError as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=400)
     except Exception as e:
-        print("❌ General error:", e)
+        logger.exception("❌ Aging report failed")
         return JsonResponse({
             "status": "error",
             "message": str(e)
         }, status=500)
+
+def mercoa_pool_stats(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    return JsonResponse({"status": "success", "pool": mercoa.pool_stats(), "single_flight": single_flight.stats()})
+
+
+def mercoa_breakers(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    return JsonResponse({"status": "success", "breakers": breakers.stats()})
+
+def ref_cache_stats(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    return JsonResponse({"status": "success", "cache": ref_cache.stats()})
+
+
+def prometheus_metrics(request):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    return HttpResponse(metrics_registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@csrf_exempt
+def mercoa_webhook(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    try:
+        webhooks.verify(request.body, request.META.get(webhooks.SIGNATURE_HEADER))
+    except webhooks.InvalidSignature as e:
+        return JsonResponse({"status": "error", "message": str(e)}, status=401)
+
+    try:
+        event = json.loads(request.body)
+        result = webhooks.handle_event(event)
+        return JsonResponse({"status": "success", "result": result})
+    except Exception as e:
+        logger.exception("🔥 Unexpected error")
+        return JsonResponse({"status": "error", "message": str(e)}, status=500)
+
+
+def job_status(request, job_id):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    job = Job.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({"status": "error", "message": "Job not found"}, status=404)
+    return JsonResponse({"status": "success", "job": jobs.describe(job)})
+
+
+def job_results_file(request, job_id):
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+    job = Job.objects.filter(pk=job_id, status=Job.SUCCEEDED).first()
+    path = (job.result or {}).get("results_file") if job else None
+    if not path or not os.path.exists(path):
+        return JsonResponse({"status": "error", "message": "No results file for this job"}, status=404)
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=os.path.basename(path), content_type="text/csv")
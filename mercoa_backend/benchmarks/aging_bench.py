@@ -0,0 +1,119 @@
+"""Benchmark AP aging bucketing: the per-invoice loop ap_aging_report used to
+run versus api.aging.aggregate_buckets, end to end against a populated mirror
+table (query, transfer and grouping included).
+
+    cd mercoa_backend && python benchmarks/aging_bench.py [10000 100000 1000000]
+
+The mirror lives in a throwaway SQLite file (DB_PROFILE=sqlite). The loop is
+timed from the upstream JSON body, decoded as the old view did, but without
+the network round trips it also needed.
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+TMP_DIR = tempfile.mkdtemp()
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mercoa_backend.settings")
+os.environ["DB_PROFILE"] = "sqlite"
+os.environ["SQLITE_PATH"] = os.path.join(TMP_DIR, "bench.sqlite3")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+
+from api.aging import DEFAULT_BOUNDARIES, aggregate_buckets  # noqa: E402
+from api.invoice_mirror import _upsert, to_row  # noqa: E402
+
+STATUSES = ["APPROVED", "NEW", "PAID", "DRAFT"]
+
+
+def make_invoices(n, today):
+    rng = random.Random(42)
+    invoices = []
+    for i in range(n):
+        due = today - timedelta(days=rng.randint(-60, 200))
+        invoices.append({
+            "id": f"inv_{n}_{i}",
+            "status": rng.choice(STATUSES),
+            "dueDate": f"{due.isoformat()}T00:00:00Z",
+            "amount": round(rng.uniform(10, 10000), 2),
+            "currency": "USD",
+        })
+    return invoices
+
+
+def mirror(entity_id, invoices, batch_size=5000):
+    for start in range(0, len(invoices), batch_size):
+        _upsert([to_row(entity_id, invoice) for invoice in invoices[start:start + batch_size]])
+
+
+def loop_buckets(all_invoices, statuses, now):
+    # The loop ap_aging_report ran on every request before the aging engine.
+    aging_buckets = {"Current": [], "1-30 Days": [], "31-60 Days": [], "61-90 Days": [], "90+ Days": []}
+    for invoice in all_invoices:
+        if invoice.get("status") not in statuses:
+            continue
+        due_date_str = invoice.get("dueDate")
+        if not due_date_str:
+            continue
+        due_date = datetime.fromisoformat(due_date_str.replace("Z", "+00:00"))
+        days_past_due = (now - due_date).days
+        if days_past_due <= 0:
+            aging_buckets["Current"].append(invoice)
+        elif days_past_due <= 30:
+            aging_buckets["1-30 Days"].append(invoice)
+        elif days_past_due <= 60:
+            aging_buckets["31-60 Days"].append(invoice)
+        elif days_past_due <= 90:
+            aging_buckets["61-90 Days"].append(invoice)
+        else:
+            aging_buckets["90+ Days"].append(invoice)
+    return aging_buckets
+
+
+def best_of(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main(sizes):
+    call_command("migrate", verbosity=0)
+    today = date.today()
+    now = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc) + timedelta(hours=12)
+    statuses = ["APPROVED", "NEW"]
+
+    print(f"{'invoices':>10} {'loop':>10} {'aggregate':>10} {'speedup':>8}")
+    for n in sizes:
+        invoices = make_invoices(n, today)
+        entity_id = f"ent_bench_{n}"
+        mirror(entity_id, invoices)
+
+        body = json.dumps(invoices)
+        loop_time, loop_result = best_of(lambda: loop_buckets(json.loads(body), statuses, now))
+        agg_time, agg_result = best_of(
+            lambda: aggregate_buckets(entity_id, DEFAULT_BOUNDARIES, today, statuses)
+        )
+
+        assert [len(v) for v in loop_result.values()] == [
+            sum(count for _status, _currency, count, _total in rows) for rows in agg_result.values()
+        ]
+        print(f"{n:>10} {loop_time * 1000:>8.1f}ms {agg_time * 1000:>8.1f}ms {loop_time / agg_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    try:
+        main([int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
+    finally:
+        shutil.rmtree(TMP_DIR, ignore_errors=True)
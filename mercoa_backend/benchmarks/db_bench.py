@@ -0,0 +1,139 @@
+"""Benchmark the database profiles (DB_PROFILE in settings.py) on the login and
+session paths under concurrent requests.
+
+    cd mercoa_backend && python benchmarks/db_bench.py [--threads 16] [--rounds 20] [profile ...]
+
+Profiles default to "sqlite sqlite-wal"; add "postgres" to include the
+configured PostgreSQL server (a throwaway test database is created on it).
+Every profile runs in its own process, since settings are read at import.
+Passwords are hashed with MD5 here so the numbers measure the database, not
+PBKDF2.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def run_profile(threads, rounds):
+    """Child process: run the workload against the profile in DB_PROFILE and
+    print its results as JSON."""
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mercoa_backend.settings")
+
+    import django
+
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import setup_test_environment
+
+    from api.models import Profile
+
+    setup_test_environment()
+    postgres = settings.DB_PROFILE == "postgres"
+    if postgres:
+        connection.creation.create_test_db(verbosity=0)
+    else:
+        call_command("migrate", verbosity=0)
+
+    hashers = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    with override_settings(PASSWORD_HASHERS=hashers):
+        User = get_user_model()
+        for i in range(threads):
+            user = User.objects.create_user(f"bench{i}@example.com", password="pw")
+            Profile.objects.filter(user=user).update(entity_id=f"ent_bench{i}", entity_name="Bench")
+            cache.set(f"mercoa:token:ent_bench{i}", "token", timeout=None)  # no upstream call
+
+        timings = {"login": [], "session": []}
+        errors = {"login": 0, "session": 0}
+        lock = threading.Lock()
+
+        def worker(i):
+            client = Client()
+            email = f"bench{i}@example.com"
+            for _ in range(rounds):
+                for op, path, body in (
+                    ("login", "/api/login/", {"username": email, "password": "pw"}),
+                    ("session", "/api/mercoa/token/", {"email": email}),
+                ):
+                    start = time.perf_counter()
+                    try:
+                        ok = client.post(path, json.dumps(body), content_type="application/json").status_code == 200
+                    except Exception:
+                        ok = False
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        timings[op].append(elapsed)
+                        errors[op] += not ok
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        wall = time.perf_counter() - start
+
+    if postgres:
+        connection.creation.destroy_test_db(settings.DATABASES["default"]["NAME"], verbosity=0)
+
+    print(json.dumps({
+        op: {
+            "requests": len(samples),
+            "errors": errors[op],
+            "p50_ms": percentile(samples, 0.50) * 1000,
+            "p95_ms": percentile(samples, 0.95) * 1000,
+        } for op, samples in timings.items()
+    } | {"throughput": sum(len(s) for s in timings.values()) / wall}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("profiles", nargs="*", default=["sqlite", "sqlite-wal"])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_profile(args.threads, args.rounds)
+        return
+
+    print(f"{args.threads} threads x {args.rounds} rounds of login + session request")
+    print(f"{'profile':>12} {'path':>8} {'requests':>9} {'errors':>7} {'p50':>9} {'p95':>9} {'req/s':>8}")
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "DB_PROFILE": profile, "SQLITE_PATH": os.path.join(tmp, "bench.sqlite3")}
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", "--threads", str(args.threads), "--rounds", str(args.rounds)],
+                env=env, capture_output=True, text=True,
+            )
+        if out.returncode != 0:
+            print(f"{profile:>12} failed:\n{out.stderr.strip()}")
+            continue
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        for op in ("login", "session"):
+            r = result[op]
+            print(f"{profile:>12} {op:>8} {r['requests']:>9} {r['errors']:>7} "
+                  f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {result['throughput']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Load-test every route in api/urls.py against a local Mercoa stand-in.
+
+    cd mercoa_backend && python benchmarks/load_test.py [--concurrency 16] [--requests 200]
+
+By default this starts the fake Mercoa (api/fake_mercoa.py) in-process and
+the backend on a throwaway SQLite database, under uvicorn when it is installed
+(``--server runserver`` otherwise), with its outbound rate limits lifted, then
+drives each route in turn and prints throughput and p50/p95/p99 latency per
+route. ``--base-url`` targets a backend that is already running instead; it
+must be pointed at a fake Mercoa (``manage.py run_fake_mercoa``), share
+``MERCOA_WEBHOOK_SECRET`` with this script and have its outbound rate limits
+raised (``UNTHROTTLED``) so the numbers measure the endpoints.
+
+Every request goes out on a fresh connection (``Connection: close``): the
+development server stalls keep-alive requests by ~40ms each, which would
+otherwise swamp the endpoint latencies. Its listen backlog is 10, so keep
+``--concurrency`` below that with ``--server runserver``.
+
+Delete scenarios create what they delete first; only the delete is timed.
+"""
+import argparse
+import importlib.util
+import io
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "mercoa_backend.settings")
+
+WEBHOOK_SECRET = os.environ.setdefault("MERCOA_WEBHOOK_SECRET", "load-test")
+# The backend's own outbound rate limits would otherwise be what gets measured
+UNTHROTTLED = {
+    "MERCOA_READ_RATE": "100000",
+    "MERCOA_WRITE_RATE": "100000",
+    "MERCOA_TOKEN_RATE": "100000",
+    "MERCOA_BULK_RATE": "100000",
+}
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Backend did not come up at {url}")
+
+
+def spawn_backend(mercoa_url, tmp, server="runserver", workers=1):
+    """Run migrations and start the backend against ``mercoa_url``: under
+    uvicorn (ASGI, ``workers`` processes) or ``manage.py runserver``."""
+    env = {
+        **os.environ,
+        **UNTHROTTLED,
+        "MERCOA_API_BASE": mercoa_url,
+        "DB_PROFILE": "sqlite-wal",
+        "SQLITE_PATH": os.path.join(tmp, "load.sqlite3"),
+    }
+    manage = os.path.join(BASE_DIR, "manage.py")
+    subprocess.run([sys.executable, manage, "migrate", "--verbosity", "0"], env=env, check=True)
+    port = free_port()
+    if server == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "mercoa_backend.asgi:application",
+                   "--port", str(port), "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    else:
+        command = [sys.executable, manage, "runserver", "--noreload", "--skip-checks", f"127.0.0.1:{port}"]
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return process, f"http://127.0.0.1:{port}"
+
+
+class LoadTest:
+    def __init__(self, base_url, concurrency, requests_per_route, users_per_entity):
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.requests_per_route = requests_per_route
+        self.users_per_entity = users_per_entity
+        self.entity_id = None
+        self.job_id = None
+
+    def call(self, method, path, headers=None, **kwargs):
+        headers = {**(headers or {}), "Connection": "close"}
+        return requests.request(method, f"{self.base_url}/api/{path}", headers=headers, timeout=60, **kwargs)
+
+    def setup(self):
+        email = f"load-{uuid.uuid4().hex[:8]}@example.com"
+        self.call("POST", "signup/", json={"email": email, "password": "load-test"}).raise_for_status()
+        res = self.call("POST", "entity/create/", json={
+            "email": email,
+            "legalBusinessName": "Load Test LLC",
+            "address": {"addressLine1": "1 Main St", "city": "Austin", "stateOrProvince": "TX", "postalCode": "78701"},
+        })
+        res.raise_for_status()
+        self.email = email
+        self.entity_id = res.json()["entity_id"]
+        res = self.call("POST", "invoice/bulk-approve/", json={"invoice_ids": [self.invoice_id(0)], "background": True})
+        self.job_id = res.json()["job_id"]
+
+    def invoice_id(self, i):
+        # Ids of the invoices the fake generates for every entity
+        return f"inv_{self.entity_id}_{i % 100:06d}"
+
+    def invoice(self, i):
+        return {
+            "status": "NEW",
+            "payerId": self.entity_id,
+            "creatorEntityId": self.entity_id,
+            "payeeId": f"ent_vendor_{self.entity_id}_0",
+            "dueDate": "2030-01-01T00:00:00Z",
+            "invoiceNumber": f"LOAD-{i}",
+            "lineItems": [{"amount": 100, "currency": "USD"}],
+        }
+
+    # -- scenarios: i -> (method, path, requests kwargs) -----------------------
+
+    def scenarios(self):
+        from api.webhooks import sign
+
+        entity = {"entity_id": self.entity_id}
+
+        def webhook(i):
+            body = json.dumps({"eventType": "invoice.updated", "invoice": {
+                "id": self.invoice_id(i), "payerId": self.entity_id, "status": "NEW", "amount": 10, "currency": "USD",
+            }}).encode()
+            return "POST", "webhooks/mercoa/", {
+                "data": body, "headers": {"Content-Type": "application/json", "mercoa-signature": sign(body, WEBHOOK_SECRET)},
+            }
+
+        def delete_user(i):
+            res = self.call("POST", "entity/user/create/", json={**entity, "email": f"del{uuid.uuid4().hex}@example.com"})
+            return "POST", "entity/user/delete/", {"json": {**entity, "user_id": res.json()["user"]["id"]}}
+
+        def delete_policy(i):
+            res = self.call("POST", "entity/approval-policy/create/", json={**entity, "amount": 100, "roles": ["admin"]})
+            return "POST", "entity/approval-policy/delete/", {"json": {**entity, "policy_id": res.json()["policy"]["id"]}}
+
+        def delete_schema(i):
+            res = self.call("POST", "payment-method/schema/create/", json={
+                "name": f"Load {i}", "isSource": False, "isDestination": True, "fields": [],
+            })
+            return "POST", "payment-method/schema/delete/", {"json": {"schema_id": res.json()["schema"]["id"]}}
+
+        def import_users(i):
+            rows = "email,name,roles\n" + "".join(f"imp{i}-{n}@example.com,User {n},admin\n" for n in range(5))
+            return "POST", "entity/user/import/", {
+                "data": entity, "files": {"file": ("users.csv", io.BytesIO(rows.encode()), "text/csv")},
+            }
+
+        return {
+            "login/": lambda i: ("POST", "login/", {"json": {"username": self.email, "password": "load-test"}}),
+            "signup/": lambda i: ("POST", "signup/", {"json": {"email": f"s{uuid.uuid4().hex}@example.com", "password": "x"}}),
+            "entity/create/": lambda i: ("POST", "entity/create/", {"json": {"email": self.email}}),
+            "entity/create/upload/": lambda i: ("POST", "entity/create/upload/", {"data": {"data": json.dumps({"email": self.email})}}),
+            "invoices/": lambda i: ("POST", "invoices/", {"json": entity}),
+            "invoices/create/": lambda i: ("POST", "invoices/create/", {"json": self.invoice(i)}),
+            "invoices/bulk-create/": lambda i: ("POST", "invoices/bulk-create/", {"json": {"invoices": [self.invoice(i)] * 5}}),
+            "invoices/update/": lambda i: ("POST", "invoices/update/", {"json": {
+                "invoice_id": self.invoice_id(i), "amount": 100, "currency": "USD", "invoiceDate": "2030-01-01T00:00:00Z",
+                "dueDate": "2030-01-01T00:00:00Z", "invoiceNumber": f"UPD-{i}", "noteToSelf": "", "memo": "",
+                "payerId": self.entity_id, "vendorId": f"ent_vendor_{self.entity_id}_0", "creatorEntityId": self.entity_id,
+            }}),
+            "invoice/approve/": lambda i: ("POST", "invoice/approve/", {"json": {"invoice_id": self.invoice_id(i)}}),
+            "invoice/bulk-approve/": lambda i: ("POST", "invoice/bulk-approve/", {"json": {
+                "invoice_ids": [self.invoice_id(i + n) for n in range(5)],
+            }}),
+            "mercoa/token/": lambda i: ("POST", "mercoa/token/", {"json": {"email": self.email}}),
+            "entity/user/create/": lambda i: ("POST", "entity/user/create/", {"json": {
+                **entity, "email": f"u{uuid.uuid4().hex}@example.com", "name": "Load",
+            }}),
+            "entity/user/list/": lambda i: ("POST", "entity/user/list/", {"json": entity}),
+            "entity/user/update/": lambda i: ("POST", "entity/user/update/", {"json": {
+                **entity, "user_id": f"user_{self.entity_id}_{i % self.users_per_entity}", "name": f"Load {i}",
+            }}),
+            "entity/user/import/": import_users,
+            "entity/user/delete/": delete_user,
+            "entity/approval-policy/create/": lambda i: ("POST", "entity/approval-policy/create/", {"json": {
+                **entity, "amount": 100 + i, "roles": ["admin"],
+            }}),
+            "entity/approval-policy/list/": lambda i: ("POST", "entity/approval-policy/list/", {"json": entity}),
+            "entity/approval-policy/update/": None,  # needs a policy id, filled in below
+            "entity/approval-policy/delete/": delete_policy,
+            "payment-method/schema/create/": lambda i: ("POST", "payment-method/schema/create/", {"json": {
+                "name": f"Load {i}", "isSource": False, "isDestination": True, "fields": [],
+            }}),
+            "payment-method/schema/list/": lambda i: ("GET", "payment-method/schema/list/", {}),
+            "payment-method/schema/delete/": delete_schema,
+            "vendors/list/": lambda i: ("POST", "vendors/list/", {"json": entity}),
+            "aging-report/": lambda i: ("POST", "aging-report/", {"json": {**entity, "statuses": ["NEW", "APPROVED"]}}),
+            "mercoa/pool-stats/": lambda i: ("GET", "mercoa/pool-stats/", {}),
+            "mercoa/breakers/": lambda i: ("GET", "mercoa/breakers/", {}),
+            "cache/stats/": lambda i: ("GET", "cache/stats/", {}),
+            "webhooks/mercoa/": webhook,
+            "jobs/<int:job_id>/": lambda i: ("GET", f"jobs/{self.job_id}/", {}),
+            "jobs/<int:job_id>/results/": lambda i: ("GET", f"jobs/{self.job_id}/results/", {}),
+        }
+
+    def policy_update(self):
+        res = self.call("POST", "entity/approval-policy/create/", json={"entity_id": self.entity_id, "amount": 1, "roles": ["admin"]})
+        policy_id = res.json()["policy"]["id"]
+        return lambda i: ("POST", "entity/approval-policy/update/", {"json": {
+            "entity_id": self.entity_id, "policy_id": policy_id, "amount": 100 + i, "roles": ["admin"],
+        }})
+
+    # -- running -----------------------------------------------------------------
+
+    def run_route(self, scenario):
+        def one(i):
+            method, path, kwargs = scenario(i)
+            start = time.perf_counter()
+            try:
+                ok = self.call(method, path, **kwargs).status_code < 500
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - start, ok
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            results = list(pool.map(one, range(self.requests_per_route)))
+        wall = time.perf_counter() - start
+        timings = [elapsed for elapsed, _ in results]
+        return {
+            "requests": len(results),
+            "errors": sum(not ok for _, ok in results),
+            "rps": len(results) / wall,
+            "p50_ms": percentile(timings, 0.50) * 1000,
+            "p95_ms": percentile(timings, 0.95) * 1000,
+            "p99_ms": percentile(timings, 0.99) * 1000,
+        }
+
+    def run(self, only=None):
+        import django
+
+        django.setup()
+        from api.urls import urlpatterns
+
+        self.setup()
+        scenarios = self.scenarios()
+        scenarios["entity/approval-policy/update/"] = self.policy_update()
+
+        print(f"{self.concurrency} clients x {self.requests_per_route} requests per route")
+        print(f"{'route':<32} {'requests':>8} {'errors':>7} {'req/s':>8} {'p50':>9} {'p95':>9} {'p99':>9}")
+        for pattern in urlpatterns:
+            route = str(pattern.pattern)
+            if only and not any(o in route for o in only):
+                continue
+            scenario = scenarios.get(route)
+            if scenario is None:
+                print(f"⚠️ {route}: no load-test scenario")
+                continue
+            r = self.run_route(scenario)
+            print(f"{route:<32} {r['requests']:>8} {r['errors']:>7} {r['rps']:>8.0f} "
+                  f"{r['p50_ms']:>7.1f}ms {r['p95_ms']:>7.1f}ms {r['p99_ms']:>7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("routes", nargs="*", help="only routes containing one of these strings")
+    parser.add_argument("--base-url", help="backend to test instead of spawning one")
+    parser.add_argument("--server", choices=["uvicorn", "runserver"],
+                        default="uvicorn" if importlib.util.find_spec("uvicorn") else "runserver",
+                        help="server to run the backend under (default: uvicorn when installed)")
+    parser.add_argument("--workers", type=int, default=4, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per route")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake Mercoa latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.01)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--invoices", type=int, default=500, help="invoices per fake entity")
+    parser.add_argument("--users", type=int, default=5, help="users per fake entity")
+    args = parser.parse_args()
+
+    if args.base_url:
+        LoadTest(args.base_url, args.concurrency, args.requests, args.users).run(args.routes)
+        return
+
+    from api.fake_mercoa import FakeMercoa
+
+    fake = FakeMercoa(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      invoices_per_entity=args.invoices, users_per_entity=args.users)
+    mercoa_url = fake.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        server, base_url = spawn_backend(mercoa_url, tmp, args.server, args.workers)
+        try:
+            wait_until_up(base_url)
+            LoadTest(base_url, args.concurrency, args.requests, args.users).run(args.routes)
+            print(f"📊 Upstream calls: {sum(fake.requests.values())}")
+        finally:
+            server.terminate()
+            server.wait()
+            fake.stop()
+
+
+if __name__ == "__main__":
+    main()
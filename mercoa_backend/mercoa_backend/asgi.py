@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mercoa_backend.settings')
+# Under ASGI the Mercoa proxy views run natively async instead of in a thread pool.
+os.environ.setdefault('MERCOA_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -1,5 +1,6 @@
 from pathlib import Path
 import os
+from corsheaders.defaults import default_headers
 from dotenv import load_dotenv
 load_dotenv()
 
@@ -33,6 +34,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # Must be at the top!
+    'api.metrics.MetricsMiddleware',  # per-route latency, DB and Mercoa time for /metrics
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -44,6 +46,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'mercoa_backend.urls'
 
+# Sessions carry the user's entity context (api/session_context.py); read them
+# from the cache and only fall back to the database on a miss.
+SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -62,13 +68,69 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'mercoa_backend.wsgi.application'
 
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Database, chosen with DB_PROFILE:
+#   sqlite      - plain SQLite file, for local development (default)
+#   sqlite-wal  - SQLite tuned for concurrent requests: WAL journal, busy timeout,
+#                 IMMEDIATE write transactions and persistent connections
+#   postgres    - PostgreSQL (POSTGRES_* variables) with persistent connections,
+#                 or a psycopg connection pool when DB_POOL=1
+DB_PROFILE = os.getenv("DB_PROFILE", "sqlite")
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+SQLITE_PATH = os.getenv("SQLITE_PATH", str(BASE_DIR / 'db.sqlite3'))
+
+if DB_PROFILE == "postgres":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv("POSTGRES_DB", "mercoa"),
+            'USER': os.getenv("POSTGRES_USER", "postgres"),
+            'PASSWORD': os.getenv("POSTGRES_PASSWORD", ""),
+            'HOST': os.getenv("POSTGRES_HOST", "localhost"),
+            'PORT': os.getenv("POSTGRES_PORT", "5432"),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+    if os.getenv("DB_POOL") == "1":
+        # Needs psycopg[pool]; pooled connections replace CONN_MAX_AGE
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                'max_size': int(os.getenv("DB_POOL_MAX_SIZE", "20")),
+                'timeout': 10,
+            },
+        }
+    else:
+        DATABASES['default']['CONN_MAX_AGE'] = DB_CONN_MAX_AGE
+elif DB_PROFILE == "sqlite-wal":
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                'timeout': 20,  # busy timeout, seconds
+                # Take the write lock when a transaction starts, so concurrent
+                # writers queue on the busy timeout instead of failing with
+                # "database is locked" when a read lock cannot be upgraded.
+                'transaction_mode': 'IMMEDIATE',
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA cache_size=-20000;'
+                    'PRAGMA temp_store=MEMORY;'
+                    'PRAGMA mmap_size=134217728;'
+                ),
+            },
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': SQLITE_PATH,
+        }
     }
-}
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -105,7 +167,135 @@ CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
 ]
 
+# Conditional requests on the list and report endpoints (api/conditional.py)
+CORS_ALLOW_HEADERS = (*default_headers, "if-none-match")
+CORS_EXPOSE_HEADERS = ["ETag"]
+
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:3000"
 ]
 
+# Mercoa client: keep-alive pool size and (connect, read) timeouts per operation
+MERCOA_POOL_SIZE = int(os.getenv("MERCOA_POOL_SIZE", "20"))
+MERCOA_TIMEOUTS = {
+    "read": (3.05, float(os.getenv("MERCOA_READ_TIMEOUT", "30"))),
+    "write": (3.05, float(os.getenv("MERCOA_WRITE_TIMEOUT", "30"))),
+    "token": (3.05, 10),
+}
+
+# Outbound rate limit per operation class: (requests per second, burst), shared
+# by all workers through CACHES. Callers queue for up to MERCOA_RATE_LIMIT_MAX_WAIT
+# seconds; a 429 is waited out (Retry-After) and re-sent up to MERCOA_RATE_LIMIT_RETRIES times.
+MERCOA_RATE_LIMITS = {
+    "read": (float(os.getenv("MERCOA_READ_RATE", "20")), 40),
+    "write": (float(os.getenv("MERCOA_WRITE_RATE", "10")), 20),
+    "token": (float(os.getenv("MERCOA_TOKEN_RATE", "5")), 10),
+    "bulk": (float(os.getenv("MERCOA_BULK_RATE", "5")), 10),
+}
+MERCOA_RATE_LIMIT_MAX_WAIT = float(os.getenv("MERCOA_RATE_LIMIT_MAX_WAIT", "30"))
+MERCOA_RATE_LIMIT_RETRIES = int(os.getenv("MERCOA_RATE_LIMIT_RETRIES", "3"))
+
+# Idempotent calls (GET/DELETE) are retried on connection errors, timeouts and 5xx
+# with jittered exponential backoff: (base, cap) seconds. Each upstream route has a
+# circuit breaker that fails fast for MERCOA_BREAKER_RESET_TIMEOUT seconds after
+# MERCOA_BREAKER_FAILURE_THRESHOLD consecutive failures.
+MERCOA_RETRIES = int(os.getenv("MERCOA_RETRIES", "3"))
+MERCOA_RETRY_BACKOFF = (0.2, 5.0)
+MERCOA_BREAKER_FAILURE_THRESHOLD = int(os.getenv("MERCOA_BREAKER_FAILURE_THRESHOLD", "5"))
+MERCOA_BREAKER_RESET_TIMEOUT = int(os.getenv("MERCOA_BREAKER_RESET_TIMEOUT", "30"))
+
+# Serve the Mercoa proxy views as ``async def`` views (set by asgi.py).
+MERCOA_ASYNC_VIEWS = os.getenv("MERCOA_ASYNC_VIEWS", "0") == "1"
+MERCOA_ASYNC_POOL_SIZE = int(os.getenv("MERCOA_ASYNC_POOL_SIZE", "200"))
+
+# Seconds a locally mirrored invoice list may be served before re-syncing from
+# Mercoa. Callers can pass their own "max_age" (0 forces a refresh).
+INVOICE_MIRROR_MAX_AGE = int(os.getenv("INVOICE_MIRROR_MAX_AGE", "30"))
+
+# AP aging buckets: upper bound in days past due of each bucket except the last
+# ([0, 30, 60, 90] -> Current, 1-30, 31-60, 61-90, 90+). Changing this rebuilds
+# the stored aggregates on next use.
+AP_AGING_BOUNDARIES = [0, 30, 60, 90]
+
+# Shared cache. Use Redis in production so cached Mercoa tokens (and the
+# single-flight refresh locks) are shared by every worker process.
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.getenv("REDIS_URL"),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+# Seconds a minted Mercoa entity token is reused; keep below its validity window.
+MERCOA_TOKEN_CACHE_TTL = int(os.getenv("MERCOA_TOKEN_CACHE_TTL", str(45 * 60)))
+
+# Read-through cache for rarely changing Mercoa reference data (seconds per resource)
+REF_CACHE_TTLS = {
+    "vendors": 300,
+    "users": 300,
+    "approval_policies": 300,
+    "payment_method_schemas": 900,
+}
+REF_CACHE_MAX_ENTRIES = int(os.getenv("REF_CACHE_MAX_ENTRIES", "1000"))
+
+# Signing secret of the Mercoa webhook pointed at /api/webhooks/mercoa/
+MERCOA_WEBHOOK_SECRET = os.getenv("MERCOA_WEBHOOK_SECRET")
+
+
+# Limits for multipart onboarding uploads (/api/entity/create/upload/), in bytes
+ENTITY_UPLOAD_MAX_FILE_SIZE = int(os.getenv("ENTITY_UPLOAD_MAX_FILE_SIZE", str(10 * 1024 * 1024)))
+ENTITY_UPLOAD_MAX_TOTAL_SIZE = int(os.getenv("ENTITY_UPLOAD_MAX_TOTAL_SIZE", str(40 * 1024 * 1024)))
+# The logo is stored on the profile as a data: URI, so it gets a much smaller cap (both endpoints)
+ENTITY_LOGO_MAX_SIZE = int(os.getenv("ENTITY_LOGO_MAX_SIZE", str(256 * 1024)))
+
+# Bulk endpoints: upstream calls in flight per request (keep below MERCOA_POOL_SIZE)
+# and the largest batch accepted in one request
+MERCOA_BULK_CONCURRENCY = int(os.getenv("MERCOA_BULK_CONCURRENCY", "8"))
+MERCOA_BULK_MAX_ITEMS = int(os.getenv("MERCOA_BULK_MAX_ITEMS", "5000"))
+
+# Background jobs (python manage.py run_jobs): seconds before a job still marked
+# running is considered abandoned by a dead worker and queued again
+JOB_STALE_AFTER = int(os.getenv("JOB_STALE_AFTER", "3600"))
+
+# Identical concurrent upstream reads are coalesced within each process. Set to 1
+# (with a shared cache such as Redis) to also coalesce them across processes.
+MERCOA_SINGLE_FLIGHT_SHARED = os.getenv("MERCOA_SINGLE_FLIGHT_SHARED", "0") == "1"
+
+# Logging (api/log.py): records are queued and written to stderr by a background
+# thread. LOG_FORMAT=json for one JSON object per line; LOG_LEVELS sets levels per
+# module, e.g. "api.views=DEBUG,api.jobs=WARNING". Logged payloads are clipped to
+# LOG_PAYLOAD_MAX_ITEMS keys/items per level and LOG_PAYLOAD_MAX_CHARS per string,
+# and kept on a LOG_PAYLOAD_SAMPLE_RATE share of records (the rest log their size).
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_PAYLOAD_MAX_ITEMS = int(os.getenv("LOG_PAYLOAD_MAX_ITEMS", "5"))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", "2000"))
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "1.0"))
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "queue": {
+            "()": "api.log.NonBlockingHandler",
+            "json": os.getenv("LOG_FORMAT", "text") == "json",
+        },
+    },
+    "root": {"handlers": ["queue"], "level": LOG_LEVEL},
+    "loggers": {
+        # Drop Django's own console handler; its records reach the queue via root
+        "django": {"level": "INFO"},
+        "httpx": {"level": "WARNING"},  # logs every request at INFO
+        "httpcore": {"level": "WARNING"},
+    } | {
+        name.strip(): {"level": level.strip().upper()}
+        for name, _, level in (part.partition("=") for part in os.getenv("LOG_LEVELS", "").split(","))
+        if name.strip() and level.strip()
+    },
+}